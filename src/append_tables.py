@@ -0,0 +1,219 @@
+import io
+import os
+import json
+import hashlib
+import pandas as pd
+from pathlib import Path
+from logger_config import logger
+from utils import CSV_EXTENSIONS, get_file_extension, has_compression_suffix, is_glob_source
+from transform_data import get_source_transforms, apply_filters
+from checkpoint import hash_file
+from compressed_files import get_compression
+
+# Constants
+APPEND_STATE_SUFFIX = ".append_state.json"
+PREFIX_HASH_BYTES = 64 * 1024  # Leading bytes of a CSV hashed to detect a replaced (rather than grown) file
+
+
+def _hash_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def get_append_state_path(output_path) -> str:
+    return f"{output_path}{APPEND_STATE_SUFFIX}"
+
+
+def get_source_config_hash(data_source) -> str:
+    """Fingerprints the configuration of an append source; a change means the table is rewritten in full."""
+    return _hash_bytes(json.dumps(data_source, sort_keys=True, default=str).encode("utf-8"))
+
+
+def reads_by_byte_offset(file_name) -> bool:
+    """True for sources appended from a byte offset: single, uncompressed CSV files."""
+    return get_file_extension(file_name) in CSV_EXTENSIONS and not has_compression_suffix(file_name) and not is_glob_source(file_name)
+
+
+def validate_append_settings(source_settings, file_name):
+    """
+    Checks that a source can be appended: only row filters are allowed, and sources other than
+    uncompressed CSV files need an `append_key`.
+
+    Raises:
+        ValueError: If the source settings cannot be used in append mode.
+    """
+    transforms = get_source_transforms(source_settings)
+    if transforms is not None and (transforms["group_by"] or transforms["aggregate"] or transforms["sort"]):
+        raise ValueError(f"❌ Error: `append` on '{file_name}' cannot be combined with group_by, aggregate or sort.")
+    if not reads_by_byte_offset(file_name) and not source_settings.get("append_key"):
+        raise ValueError(f"❌ Error: `append` on '{file_name}' needs an `append_key` column (only uncompressed CSV files are appended by byte offset).")
+
+
+def load_append_state(output_path, template_path):
+    """
+    Loads the append state of a previous output, if it can be trusted.
+
+    The state is only used when the previous output still exists unchanged (same hash as recorded
+    after it was saved) and was rendered from the same template. Otherwise the output is rebuilt.
+
+    Returns:
+        dict | None: {"template_hash", "output_hash", "tables": {table_name: table_state}}, or None.
+    """
+    state_path = get_append_state_path(output_path)
+    if not os.path.exists(state_path) or not os.path.exists(output_path):
+        return None
+
+    with open(state_path, "r", encoding="utf-8") as file:
+        state = json.load(file)
+
+    if state.get("template_hash") != hash_file(template_path):
+        logger.info(f"Template changed since {output_path} was written; rebuilding it.")
+        return None
+    if state.get("output_hash") != hash_file(output_path):
+        logger.info(f"{output_path} does not match its append state; rebuilding it.")
+        return None
+
+    return state
+
+
+def save_append_state(output_path, template_path, tables):
+    """Records the append state of a saved output, together with the hashes of the output and its template."""
+    state = {
+        "template_hash": hash_file(template_path),
+        "output_hash": hash_file(output_path),
+        "tables": tables,
+    }
+    state_path = get_append_state_path(output_path)
+    tmp_path = f"{state_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        json.dump(state, file, indent=2)
+    os.replace(tmp_path, state_path)
+
+
+def read_new_csv_rows(file_path, columns_to_load, table_state=None):
+    """
+    Reads the rows appended to a CSV file since the recorded byte offset.
+
+    The recorded offset is used only if the header and the leading bytes of the file are unchanged
+    and the file has not shrunk; otherwise the file is read from the start. Only complete lines are
+    read: a last line still being written is left for the next run, as the offset is recorded after
+    the last newline.
+
+    Parameters:
+        file_path (Path): Path to the CSV file.
+        columns_to_load (list): Input columns to read.
+        table_state (dict): State recorded by the previous run (optional).
+
+    Returns:
+        tuple: (df, new_state, from_start)
+            - df (pd.DataFrame): The new rows.
+            - new_state (dict): {"offset", "header_hash", "prefix_hash"} to record for the next run.
+            - from_start (bool): True if the file was read from the start.
+    """
+    if get_compression(file_path) is not None:
+        raise ValueError(f"❌ Error: '{Path(file_path).name}' is compressed and cannot be appended by byte offset; set an `append_key`.")
+
+    file_size = os.path.getsize(file_path)
+    with open(file_path, "rb") as file:
+        header = file.readline()
+        header_hash = _hash_bytes(header)
+
+        offset = len(header)
+        if table_state is not None and table_state.get("header_hash") == header_hash and table_state["offset"] <= file_size:
+            file.seek(0)
+            prefix = file.read(min(table_state["offset"], PREFIX_HASH_BYTES))
+            if _hash_bytes(prefix) == table_state["prefix_hash"]:
+                offset = table_state["offset"]
+        from_start = offset == len(header)
+
+        file.seek(offset)
+        data = file.read(file_size - offset)
+        data = data[: data.rfind(b"\n") + 1]
+        if not header.endswith(b"\n"):
+            header += b"\n"
+
+        file.seek(0)
+        new_offset = offset + len(data)
+        prefix_hash = _hash_bytes(file.read(min(new_offset, PREFIX_HASH_BYTES)))
+
+    logger.info(f"Reading {len(data):,} new bytes of '{Path(file_path).name}' from byte offset {offset:,}.")
+    df = pd.read_csv(io.BytesIO(header + data), usecols=columns_to_load)
+
+    return df, {"offset": new_offset, "header_hash": header_hash, "prefix_hash": prefix_hash}, from_start
+
+
+def _key_to_json(value):
+    if isinstance(value, pd.Timestamp):
+        return {"timestamp": value.isoformat()}
+    return value.item() if hasattr(value, "item") else value
+
+
+def _key_from_json(value):
+    if isinstance(value, dict) and "timestamp" in value:
+        return pd.Timestamp(value["timestamp"])
+    return value
+
+
+def select_new_rows_by_key(df, key_column, table_state=None):
+    """
+    Selects the rows whose `key_column` is greater than the last key written by the previous run.
+
+    Parameters:
+        df (pd.DataFrame): All rows of the source.
+        key_column (str): Column that increases as rows are added (e.g. an id or a timestamp).
+        table_state (dict): State recorded by the previous run (optional).
+
+    Returns:
+        tuple: (df, new_state, from_start)
+    """
+    from_start = table_state is None or "last_key" not in table_state
+    if not from_start:
+        df = df[df[key_column] > _key_from_json(table_state["last_key"])]
+
+    last_key = df[key_column].max() if len(df) else (None if from_start else _key_from_json(table_state["last_key"]))
+    new_state = {} if last_key is None or pd.isna(last_key) else {"last_key": _key_to_json(last_key)}
+
+    return df, new_state, from_start
+
+
+def get_new_source_rows(input_files_folder, data_source, source_settings, table_state, load_all_rows):
+    """
+    Returns the rows of an append source that were not written by the previous run.
+
+    - CSV files are read from the recorded byte offset.
+    - Other sources are read in full by `load_all_rows` and filtered on `append_key`.
+
+    Parameters:
+        input_files_folder (str): Folder containing the input files.
+        data_source (dict): Single-key dictionary from `settings.yaml`.
+        source_settings (dict): Settings block of the source.
+        table_state (dict): State recorded for the table by the previous run, or None to start over.
+        load_all_rows (callable): Returns all rows of the source with output column names.
+
+    Returns:
+        tuple: (df, new_state, from_start) with output column names in `df`.
+    """
+    file_name = next(iter(data_source))
+    validate_append_settings(source_settings, file_name)
+    column_mapping = source_settings["column_mapping"]
+    config_hash = get_source_config_hash(data_source)
+
+    if table_state is not None and table_state.get("config_hash") != config_hash:
+        logger.info(f"Configuration of '{file_name}' changed; rewriting the table in full.")
+        table_state = None
+
+    if reads_by_byte_offset(file_name):
+        transforms = get_source_transforms(source_settings)
+        columns = list(column_mapping)
+        if transforms is not None:
+            columns += [condition["column"] for condition in transforms["filter"] if condition["column"] not in columns]
+
+        df, new_state, from_start = read_new_csv_rows(Path(input_files_folder) / file_name, columns, table_state)
+        if transforms is not None:
+            df = apply_filters(df, transforms)
+        df = df.rename(columns=column_mapping)[list(column_mapping.values())]
+    else:
+        key_column = column_mapping.get(source_settings["append_key"], source_settings["append_key"])
+        df, new_state, from_start = select_new_rows_by_key(load_all_rows(), key_column, table_state)
+
+    new_state["config_hash"] = config_hash
+    return df, new_state, from_start
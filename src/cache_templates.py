@@ -0,0 +1,214 @@
+import io
+import os
+import sys
+import stat
+import pickle
+import hashlib
+import openpyxl
+import pandas as pd
+from pathlib import Path
+from openpyxl.utils.indexed_list import IndexedList
+from openpyxl.worksheet.table import TableList
+from openpyxl.utils.bound_dictionary import BoundDictionary
+from logger_config import logger
+
+# Constants
+TEMPLATE_CACHE_FORMAT = 2
+DEFAULT_TEMPLATE_CACHE_BYTES = 256 * 1024 ** 2
+TEMPLATE_CACHE_SUFFIX = ".pickle"
+
+
+def get_cache_version() -> str:
+    """
+    Returns the tag of the libraries a cached template was parsed with.
+    Entries written by other versions of openpyxl, pandas or Python are never restored.
+    """
+    return (
+        f"openpyxl{openpyxl.__version__}-pandas{pd.__version__}"
+        f"-py{sys.version_info.major}.{sys.version_info.minor}-v{TEMPLATE_CACHE_FORMAT}"
+    )
+
+
+def _restore_indexed_list(values, state):
+    indexed_list = IndexedList()
+    list.extend(indexed_list, values)
+    indexed_list.__dict__.update(state)
+    return indexed_list
+
+
+def _restore_table_list(tables):
+    table_list = TableList()
+    for table in tables:
+        table_list.add(table)
+    return table_list
+
+
+def _restore_bound_dictionary(cls, state, default_factory, items):
+    bound_dictionary = cls.__new__(cls)
+    bound_dictionary.__dict__.update(state)
+    bound_dictionary.default_factory = default_factory
+    dict.update(bound_dictionary, items)
+    return bound_dictionary
+
+
+class _WorkbookPickler(pickle.Pickler):
+    """
+    Pickles openpyxl workbooks, whose containers do not survive the default pickling:
+    - `IndexedList` (styles, fonts, number formats...) would be rebuilt through `append` before its
+      index is restored, which de-duplicates into the class-level index shared by every instance.
+    - `TableList` pickles as a dict, but yields (name, ref) pairs from `items()`, so the default
+      reduction stores strings instead of tables.
+    - `BoundDictionary` (row and column dimensions) pickles as a `defaultdict`, which drops its
+      attributes and passes its factory as the worksheet, so new rows and columns could not be added.
+    """
+
+    def reducer_override(self, obj):
+        if type(obj) is IndexedList:
+            return _restore_indexed_list, (list(obj), dict(obj.__dict__))
+        if type(obj) is TableList:
+            return _restore_table_list, (list(dict.values(obj)),)
+        if isinstance(obj, BoundDictionary):
+            return _restore_bound_dictionary, (type(obj), dict(obj.__dict__), obj.default_factory, list(dict.items(obj)))
+        return NotImplemented
+
+
+def dump_workbook_state(state) -> bytes:
+    """
+    Serialises a parsed template, e.g. (wb, table_details), into bytes that `load_workbook_state` restores.
+    Restoring is several times faster than parsing the xlsx again and gives an independent copy each time.
+    """
+    buffer = io.BytesIO()
+    _WorkbookPickler(buffer, protocol=pickle.HIGHEST_PROTOCOL).dump(state)
+    return buffer.getvalue()
+
+
+def load_workbook_state(data: bytes):
+    """Restores a parsed template serialised by `dump_workbook_state`."""
+    return pickle.loads(data)
+
+
+def is_private_folder(folder) -> bool:
+    """
+    Returns whether only the current user can write to a folder: owned by the current user, and not
+    writable by its group or others. Always True where ownership is not available (Windows).
+    """
+    if not hasattr(os, "getuid"):
+        return True
+    folder_stat = os.stat(folder)
+    return folder_stat.st_uid == os.getuid() and not folder_stat.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+
+
+class ParsedTemplateCache:
+    """
+    Persistent cache of parsed templates: the openpyxl workbook with its tables and the validated
+    table layout from `get_excel_table_details`, so warm runs skip parsing the template XML.
+
+    Entries are files in `cache_folder`, named after the SHA-256 of the template's content and the
+    library versions (see `get_cache_version`). A template that changed, or a new openpyxl/pandas, simply
+    misses; entries of other library versions are deleted when a new entry is written, and the least
+    recently used entries are deleted while the cache exceeds `max_bytes`.
+
+    Entries are pickles, so restoring one runs code chosen by whoever wrote it. The cache folder is
+    created private to the current user, and a folder that other users could write to is never used
+    (see `is_private_folder`).
+    """
+
+    def __init__(self, cache_folder, max_bytes=DEFAULT_TEMPLATE_CACHE_BYTES):
+        self.cache_folder = cache_folder
+        self.max_bytes = max_bytes
+        self.version = get_cache_version()
+        self.enabled = None  # Checked on first use
+
+    def get_entry_path(self, template_bytes) -> str:
+        content_hash = hashlib.sha256(template_bytes).hexdigest()
+        return os.path.join(self.cache_folder, f"{content_hash}-{self.version}{TEMPLATE_CACHE_SUFFIX}")
+
+    def get(self, template_path, parse):
+        """
+        Returns the parsed state of a template, restored from the cache or parsed and cached.
+
+        Parameters:
+            template_path (str): Path to the template.
+            parse (callable): Called with `template_path` on a cache miss; returns the state to cache,
+                e.g. (wb, table_details). It must not have been modified yet.
+
+        Returns:
+            The parsed state, a copy that the caller is free to modify.
+        """
+        if not self._check_folder():
+            return parse(template_path)
+
+        with open(template_path, "rb") as file:
+            template_bytes = file.read()
+        entry_path = self.get_entry_path(template_bytes)
+
+        if os.path.exists(entry_path):
+            try:
+                with open(entry_path, "rb") as file:
+                    state = load_workbook_state(file.read())
+                os.utime(entry_path)  # Mark as recently used
+                logger.info(f"♻️ Restored parsed template {Path(template_path).name} from {entry_path}")
+                return state
+            except Exception as e:
+                logger.warning(f"⚠️ Ignoring unreadable template cache entry {entry_path}: {e}")
+                self._remove(entry_path)
+
+        state = parse(template_path)
+        self._store(entry_path, dump_workbook_state(state))
+        return state
+
+    def _check_folder(self) -> bool:
+        """Creates the cache folder, private to the current user, and checks no other user can write to it."""
+        if self.enabled is None:
+            try:
+                os.makedirs(self.cache_folder, mode=0o700, exist_ok=True)
+                self.enabled = is_private_folder(self.cache_folder)
+            except OSError as e:
+                logger.warning(f"⚠️ Could not create template cache folder {self.cache_folder}: {e}")
+                self.enabled = False
+            else:
+                if not self.enabled:
+                    logger.warning(
+                        f"⚠️ Not using template cache folder {self.cache_folder}: other users can write to it, "
+                        f"and its entries are pickles. Use a folder only you can write to."
+                    )
+        return self.enabled
+
+    def _store(self, entry_path, data):
+        """Writes an entry and evicts stale and old entries; a read-only cache folder only costs the cache."""
+        try:
+            tmp_path = f"{entry_path}.tmp"
+            with open(tmp_path, "wb") as file:
+                file.write(data)
+            os.replace(tmp_path, entry_path)
+            logger.info(f"Cached parsed template in {entry_path} ({len(data):,} bytes).")
+        except OSError as e:
+            logger.warning(f"⚠️ Could not write template cache entry {entry_path}: {e}")
+            return
+        self._evict()
+
+    def _evict(self):
+        entries = []
+        for entry in os.scandir(self.cache_folder):
+            if not entry.name.endswith(TEMPLATE_CACHE_SUFFIX):
+                continue
+            if not entry.name.endswith(f"-{self.version}{TEMPLATE_CACHE_SUFFIX}"):
+                self._remove(entry.path)  # Written by other library versions, never restored again
+                continue
+            stat = entry.stat()
+            entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+
+        total_bytes = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_bytes <= self.max_bytes:
+                break
+            self._remove(path)
+            total_bytes -= size
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+            logger.info(f"Evicted template cache entry {path}")
+        except OSError:
+            pass
@@ -0,0 +1,286 @@
+import os
+import sqlite3
+import zipfile
+import xml.etree.ElementTree as ET
+import pandas as pd
+from pathlib import Path
+from openpyxl import load_workbook
+from logger_config import logger
+from utils import CSV_EXTENSIONS, COLUMNAR_EXTENSIONS, SQLITE_EXTENSIONS, EXCEL_MAX_ROWS, get_file_extension, is_glob_source
+from transform_data import get_source_transforms, get_transform_columns, get_transform_output_columns
+from load_input_data import quote_sql_identifier
+from update_xlsx_data import get_source_settings
+from run_plan import estimate_source_rows
+from xlsx_package import MAIN_NS
+from compressed_files import CsvStream
+from partitioned_sources import expand_source_files, get_metadata_cache
+
+# Constants
+ESTIMATED_BYTES_PER_CELL = 8  # Rough compressed size of a written cell in an xlsx package
+
+
+def read_xlsx_table_headers(file_path, include_calculated=True) -> dict:
+    """
+    Reads the column names of every Excel table in a workbook from the table definitions,
+    without loading the workbook.
+
+    Parameters:
+        file_path (str): Path to the workbook.
+        include_calculated (bool): Include calculated columns, which templates fill with their formula.
+
+    Returns:
+        dict: {table_name: [column names]}
+    """
+    tables = {}
+    with zipfile.ZipFile(file_path) as zf:
+        for part_name in zf.namelist():
+            if part_name.startswith("xl/tables/") and part_name.endswith(".xml"):
+                table = ET.fromstring(zf.read(part_name))
+                columns = [
+                    col.get("name") for col in table.iter(f"{{{MAIN_NS}}}tableColumn")
+                    if include_calculated or col.find(f"{{{MAIN_NS}}}calculatedColumnFormula") is None
+                ]
+                tables[table.get("displayName") or table.get("name")] = columns
+    return tables
+
+
+def read_xlsx_sheet_headers(file_path, sheet_names) -> dict:
+    """
+    Reads the header row (row 1) of selected sheets in read-only mode.
+
+    Returns:
+        dict: {sheet_name: [header values]} for the sheets that exist.
+    """
+    headers = {}
+    wb = load_workbook(file_path, read_only=True)
+    try:
+        for sheet_name in sheet_names:
+            if sheet_name in wb.sheetnames:
+                ws = wb[sheet_name]
+                first_row = next(ws.iter_rows(min_row=1, max_row=1, values_only=True), ())
+                headers[sheet_name] = list(first_row)
+    finally:
+        wb.close()
+    return headers
+
+
+def read_flat_file_headers(file_path) -> list:
+    """Reads the column names of a CSV or columnar file."""
+    if get_file_extension(file_path) in CSV_EXTENSIONS:
+        with CsvStream(file_path, log_throughput=False) as csv_stream:
+            return list(pd.read_csv(csv_stream.file, nrows=0).columns)
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if get_file_extension(file_path) == ".parquet":
+        return list(pq.read_schema(file_path).names)
+    with pa.memory_map(str(file_path)) as source:
+        return list(pa.ipc.open_file(source).schema.names)
+
+
+def read_glob_source_headers(input_files_folder, pattern, partition_column=None) -> list:
+    """
+    Reads the column names every file matching a glob source provides, plus its partition column.
+    Headers of files unchanged since an earlier run come from the metadata cache.
+    """
+    metadata_cache = get_metadata_cache(input_files_folder)
+    columns = None
+    for relative_path in expand_source_files(input_files_folder, pattern):
+        file_columns = metadata_cache.get(relative_path, "columns", read_flat_file_headers)
+        columns = file_columns if columns is None else [col for col in columns if col in file_columns]
+    metadata_cache.save()
+    return columns + ([partition_column] if partition_column else [])
+
+
+def read_source_headers(input_files_folder, data_source) -> list:
+    """
+    Reads only the column names a data source provides (header row, schema or table definition).
+
+    Parameters:
+        input_files_folder (str): Folder containing the input files.
+        data_source (dict): Single-key dictionary from `settings.yaml`, e.g. {"customer_data.csv": {...}}.
+
+    Returns:
+        list: Column names of the source.
+
+    Raises:
+        FileNotFoundError: If the input file does not exist.
+        ValueError: If the sheet or table does not exist.
+    """
+    file_name, data_config = next(iter(data_source.items()))
+    file_path = Path(input_files_folder) / file_name
+    file_extension = get_file_extension(file_name)
+
+    if is_glob_source(file_name):
+        if file_extension not in CSV_EXTENSIONS | COLUMNAR_EXTENSIONS:
+            raise ValueError(f"Glob sources must match CSV or columnar files, not '{file_extension}'")
+        return read_glob_source_headers(input_files_folder, file_name, data_config.get("partition_column"))
+
+    if not file_path.exists():
+        raise FileNotFoundError(f"Input file not found: {file_path}")
+
+    if file_extension in CSV_EXTENSIONS | COLUMNAR_EXTENSIONS:
+        return read_flat_file_headers(file_path)
+
+    if file_extension == ".xlsx":
+        xl_type, xl_settings = next(iter(data_config.items()))
+        name = xl_settings["name"]
+        if xl_type == "xl_table":
+            tables = read_xlsx_table_headers(file_path)
+            if name not in tables:
+                raise ValueError(f"Table '{name}' not found in '{file_name}'. Available tables: {sorted(tables)}")
+            return tables[name]
+        headers = read_xlsx_sheet_headers(file_path, [name])
+        if name not in headers:
+            raise ValueError(f"Sheet '{name}' not found in '{file_name}'.")
+        return [col for col in headers[name] if col is not None]
+
+    if file_extension in SQLITE_EXTENSIONS:
+        sqlite_settings = data_config["sqlite"]
+        if sqlite_settings.get("table"):
+            sql = f"SELECT * FROM {quote_sql_identifier(sqlite_settings['table'])} LIMIT 0"
+        else:
+            sql = f"SELECT * FROM ({sqlite_settings['query'].strip().rstrip(';')}) LIMIT 0"
+
+        connection = sqlite3.connect(f"{file_path.resolve().as_uri()}?mode=ro", uri=True)
+        try:
+            return [description[0] for description in connection.execute(sql).description]
+        except sqlite3.Error as e:
+            raise ValueError(f"SQLite source in '{file_name}' cannot be read: {e}")
+        finally:
+            connection.close()
+
+    raise ValueError(f"Unsupported file extension: {file_extension}")
+
+
+def check_source_columns(source_settings, input_columns) -> list:
+    """Checks that the mapped and transformed columns exist in the input. Returns the problems found."""
+    problems = []
+    required = set(source_settings.get("column_mapping", {}))
+    transforms = get_source_transforms(source_settings)
+    if transforms is not None:
+        required |= get_transform_columns(transforms)
+
+    missing = sorted(col for col in required if col not in input_columns)
+    if missing:
+        problems.append(f"columns {missing} not found in the input (available: {input_columns})")
+
+    if transforms is not None and transforms["aggregate"]:
+        kept = set(get_transform_output_columns(transforms, list(source_settings.get("column_mapping", {}))))
+        dropped = sorted(col for col in source_settings.get("column_mapping", {}) if col not in kept)
+        if dropped:
+            problems.append(f"columns {dropped} are mapped but neither grouped nor aggregated")
+
+    return problems
+
+
+def check_target_columns(target_type, target_headers, output_columns) -> list:
+    """
+    Checks the mapped output columns against the headers of a template table or sheet,
+    with the same rules as the writers (`align_feed_data` for tables, exact names for sheets).
+    """
+    if target_type == "tables":
+        output_lower = {str(col).lower() for col in output_columns}
+        missing = [col for col in target_headers if str(col).lower() not in output_lower]
+    else:
+        if None in target_headers:
+            return ["the sheet contains empty column headers"]
+        missing = [col for col in target_headers if col not in output_columns]
+
+    if missing:
+        return [f"template columns {missing} are not provided by `column_mapping` (provides: {list(output_columns)})"]
+    return []
+
+
+def check_config(output_from_input_dict, input_files_folder, xlsx_templates_folder):
+    """
+    Validates every mapping in the configuration and estimates the cost of each output,
+    reading only input headers and template table/sheet headers.
+
+    Parameters:
+        output_from_input_dict (dict): Template configuration from `settings.yaml`.
+        input_files_folder (str): Folder containing the input files.
+        xlsx_templates_folder (str): Folder containing the templates.
+
+    Returns:
+        tuple: (problems, cost_plan)
+            - problems (list[str]): Problems found; empty if the configuration is valid.
+            - cost_plan (dict): {template_name: {"rows", "cells", "expected_size_bytes"}}
+    """
+    for _ in range(2): logger.info("")
+    logger.info("-" * 50)
+    logger.info("🔎 CHECKING CONFIGURATION")
+    logger.info("-" * 50)
+
+    problems = []
+    cost_plan = {}
+    header_cache = {}
+    row_cache = {}
+
+    for template_name, type_config in output_from_input_dict.items():
+        template_path = os.path.join(xlsx_templates_folder, template_name)
+        if not os.path.exists(template_path):
+            problems.append(f"{template_name}: template not found at '{template_path}'")
+            continue
+
+        table_headers = read_xlsx_table_headers(template_path, include_calculated=False)
+        sheet_headers = read_xlsx_sheet_headers(template_path, list(type_config.get("sheets", {})))
+        plan = {"rows": 0, "cells": 0, "expected_size_bytes": os.path.getsize(template_path)}
+
+        for target_type, targets in type_config.items():
+            if target_type not in ("tables", "sheets"):
+                problems.append(f"{template_name}: unsupported output type '{target_type}'")
+                continue
+
+            available = table_headers if target_type == "tables" else sheet_headers
+            for target_name, data_source in targets.items():
+                label = f"{template_name} -> {target_type[:-1]} '{target_name}'"
+
+                if target_name not in available:
+                    problems.append(f"{label}: not found in the template (available: {sorted(available)})")
+                    continue
+
+                try:
+                    source_settings = get_source_settings(data_source)
+                    cache_key = (
+                        next(iter(data_source)),
+                        source_settings.get("name") or source_settings.get("table") or source_settings.get("query"),
+                    )
+                    if cache_key not in header_cache:
+                        header_cache[cache_key] = read_source_headers(input_files_folder, data_source)
+                    input_columns = header_cache[cache_key]
+                    n_rows = estimate_source_rows(input_files_folder, data_source, row_cache)
+                except (FileNotFoundError, ValueError, KeyError, StopIteration) as e:
+                    problems.append(f"{label}: {e}")
+                    continue
+
+                target_problems = check_source_columns(source_settings, input_columns)
+                target_problems += check_target_columns(
+                    target_type, available[target_name], list(source_settings.get("column_mapping", {}).values())
+                )
+                if target_type == "tables" and n_rows > EXCEL_MAX_ROWS - 1:
+                    target_problems.append(f"about {n_rows:,} rows exceed Excel's row limit")
+                problems.extend(f"{label}: {problem}" for problem in target_problems)
+
+                n_cols = len(available[target_name])
+                plan["rows"] += n_rows
+                plan["cells"] += n_rows * n_cols
+                plan["expected_size_bytes"] += n_rows * n_cols * ESTIMATED_BYTES_PER_CELL
+
+        cost_plan[template_name] = plan
+
+    logger.info("📋 Estimated cost per output (rows before filters):")
+    for template_name, plan in cost_plan.items():
+        logger.info(
+            f"  {template_name}: {plan['rows']:,} rows, {plan['cells']:,} cells, "
+            f"~{plan['expected_size_bytes'] / 1024 ** 2:.2f} MB"
+        )
+
+    if problems:
+        for problem in problems:
+            logger.error(f"❌ {problem}")
+    else:
+        logger.info("✅ Configuration is valid.")
+
+    return problems, cost_plan
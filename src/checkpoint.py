@@ -0,0 +1,156 @@
+import os
+import json
+import hashlib
+from datetime import datetime
+from logger_config import logger
+from utils import is_glob_source
+from partitioned_sources import expand_source_files
+
+# Constants
+CHECKPOINT_NAME = "run_checkpoint.json"
+HASH_BLOCK_BYTES = 8 * 1024 * 1024
+
+
+def hash_file(file_path) -> str:
+    """Returns the SHA-256 of a file, read in large blocks."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for block in iter(lambda: file.read(HASH_BLOCK_BYTES), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def get_template_inputs(type_config) -> list:
+    """Returns the input files a template reads, in configuration order."""
+    file_names = []
+    for targets in type_config.values():
+        for data_source in targets.values():
+            for file_name in data_source:
+                if file_name not in file_names:
+                    file_names.append(file_name)
+    return file_names
+
+
+def get_template_hashes(template_name, type_config, input_files_folder, xlsx_templates_folder, hash_cache=None) -> dict:
+    """
+    Fingerprints everything a rendered output depends on: its input files, the template and its configuration.
+
+    Parameters:
+        template_name (str): Name of the template file.
+        type_config (dict): The template's entry in `output_from_input_dict`.
+        input_files_folder (str): Folder containing the input files.
+        xlsx_templates_folder (str): Folder containing the templates.
+        hash_cache (dict): File hashes shared across templates (optional).
+
+    Returns:
+        dict: {"inputs": {file_name: sha256}, "template": sha256, "config": sha256}
+            Missing files are recorded as None.
+    """
+    hash_cache = {} if hash_cache is None else hash_cache
+
+    def cached_hash(file_path):
+        if file_path not in hash_cache:
+            hash_cache[file_path] = hash_file(file_path) if os.path.exists(file_path) else None
+        return hash_cache[file_path]
+
+    def source_hash(file_name):
+        if not is_glob_source(file_name):
+            return cached_hash(os.path.join(input_files_folder, file_name))
+        # A glob source changes when any matched file changes, or files are added or removed
+        try:
+            files = expand_source_files(input_files_folder, file_name)
+        except FileNotFoundError:
+            return None
+        file_hashes = {path: cached_hash(os.path.join(input_files_folder, path)) for path in files}
+        return hashlib.sha256(json.dumps(file_hashes, sort_keys=True).encode("utf-8")).hexdigest()
+
+    return {
+        "inputs": {file_name: source_hash(file_name) for file_name in get_template_inputs(type_config)},
+        "template": cached_hash(os.path.join(xlsx_templates_folder, template_name)),
+        "config": hashlib.sha256(json.dumps(type_config, sort_keys=True, default=str).encode("utf-8")).hexdigest(),
+    }
+
+
+class RunCheckpoint:
+    """
+    Records the outcome of every output of a run in a JSON file, updated as each template finishes.
+
+    With `--resume`, outputs that finished successfully for the same report date, with unchanged
+    inputs, template and configuration, are skipped; failed and pending outputs are rendered again.
+    """
+
+    def __init__(self, checkpoint_path, report_date):
+        self.checkpoint_path = checkpoint_path
+        self.report_date = report_date
+        self.templates = {}
+
+    @classmethod
+    def load(cls, checkpoint_path, report_date):
+        """Loads an existing checkpoint, or returns an empty one if there is none for this report date."""
+        checkpoint = cls(checkpoint_path, report_date)
+        if not os.path.exists(checkpoint_path):
+            logger.info(f"No checkpoint found at {checkpoint_path}; rendering every output.")
+            return checkpoint
+
+        with open(checkpoint_path, "r", encoding="utf-8") as file:
+            data = json.load(file)
+
+        if data.get("report_date") != report_date:
+            logger.info(f"Checkpoint is for report date {data.get('report_date')}, not {report_date}; rendering every output.")
+            return checkpoint
+
+        checkpoint.templates = data.get("templates", {})
+        return checkpoint
+
+    def is_complete(self, template_name, hashes) -> bool:
+        """True if the template finished successfully with the same fingerprints and its output still exists."""
+        entry = self.templates.get(template_name)
+        return (
+            entry is not None
+            and entry["status"] == "success"
+            and entry["hashes"] == hashes
+            and os.path.exists(entry.get("output_path") or "")
+        )
+
+    def select_pending(self, output_from_input_dict, template_hashes) -> dict:
+        """
+        Returns the part of `output_from_input_dict` that still needs rendering.
+
+        Parameters:
+            output_from_input_dict (dict): Template configuration from `settings.yaml`.
+            template_hashes (dict): {template_name: fingerprints} (see `get_template_hashes`).
+
+        Returns:
+            dict: The templates to render, in configuration order.
+        """
+        pending = {}
+        for template_name, type_config in output_from_input_dict.items():
+            if self.is_complete(template_name, template_hashes[template_name]):
+                logger.info(f"⏭️ Skipping {template_name}: already rendered with unchanged inputs.")
+            else:
+                pending[template_name] = type_config
+
+        logger.info(f"Resuming with {len(pending)} of {len(output_from_input_dict)} outputs to render.")
+        return pending
+
+    def mark(self, template_name, status, hashes=None, output_path=None, error=None):
+        """Records the status ("pending", "success" or "failed") of a template and saves the checkpoint."""
+        entry = self.templates.setdefault(template_name, {})
+        entry.update({
+            "status": status,
+            "updated_at": datetime.now().isoformat(timespec="seconds"),
+            "error": error,
+        })
+        if hashes is not None:
+            entry["hashes"] = hashes
+        if output_path is not None:
+            entry["output_path"] = output_path
+        self.save()
+
+    def save(self):
+        """Writes the checkpoint through a temporary file, so an interrupted run never leaves it half-written."""
+        data = {"report_date": self.report_date, "templates": self.templates}
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(data, file, indent=2)
+        os.replace(tmp_path, self.checkpoint_path)
@@ -0,0 +1,120 @@
+import io
+import gzip
+import time
+from pathlib import Path
+from logger_config import logger
+from utils import CSV_COMPRESSION_SUFFIXES
+
+# Constants
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+STREAM_BUFFER_BYTES = 1024 * 1024
+
+
+def get_compression(file_path):
+    """
+    Detects a compressed file from its suffix (`.gz`, `.zst`) or, failing that, its magic bytes.
+
+    Returns:
+        str | None: "gzip", "zstd", or None for an uncompressed file.
+    """
+    suffix = Path(file_path).suffix.lower()
+    if suffix in CSV_COMPRESSION_SUFFIXES:
+        return CSV_COMPRESSION_SUFFIXES[suffix]
+
+    with open(file_path, "rb") as file:
+        magic = file.read(len(ZSTD_MAGIC))
+    if magic.startswith(GZIP_MAGIC):
+        return "gzip"
+    if magic.startswith(ZSTD_MAGIC):
+        return "zstd"
+    return None
+
+
+class _CountingReader(io.RawIOBase):
+    """Raw stream counting the bytes read from a decompressor."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.bytes_read = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self.stream.read(len(buffer))
+        buffer[:len(data)] = data
+        self.bytes_read += len(data)
+        return len(data)
+
+
+class CsvStream:
+    """
+    Opens a CSV file for reading, decompressing gzip and zstd files on the fly.
+
+    The decompressed data is never written to disk or held in full: the parser reads from
+    `file` as it goes, so column projection (`usecols`) and chunked reading work as usual.
+    For compressed files, the compressed and uncompressed throughput is logged on close.
+
+    Example:
+        with CsvStream(file_path) as csv_stream:
+            df = pd.read_csv(csv_stream.file, usecols=columns)
+    """
+
+    def __init__(self, file_path, log_throughput=True):
+        self.file_path = Path(file_path)
+        self.log_throughput = log_throughput
+        self.compression = None
+        self.file = None
+        self._raw = None
+        self._decompressor = None
+        self._counter = None
+        self._start_time = None
+
+    def __enter__(self):
+        self.compression = get_compression(self.file_path)
+        self._raw = open(self.file_path, "rb")
+        self._start_time = time.perf_counter()
+
+        if self.compression is None:
+            self.file = self._raw
+            return self
+
+        if self.compression == "gzip":
+            self._decompressor = gzip.GzipFile(fileobj=self._raw, mode="rb")
+        else:
+            try:
+                import zstandard
+            except ImportError:
+                self._raw.close()
+                raise ImportError(f"❌ Error: Reading zstd-compressed files requires `zstandard` (pip install zstandard).")
+            self._decompressor = zstandard.ZstdDecompressor().stream_reader(self._raw, read_across_frames=True)
+
+        self._counter = _CountingReader(self._decompressor)
+        self.file = io.BufferedReader(self._counter, buffer_size=STREAM_BUFFER_BYTES)
+        return self
+
+    @property
+    def compressed_bytes_read(self) -> int:
+        """Bytes read from the file on disk so far."""
+        return self._raw.tell()
+
+    @property
+    def uncompressed_bytes_read(self) -> int:
+        """Bytes passed to the reader so far (equal to `compressed_bytes_read` for uncompressed files)."""
+        return self._counter.bytes_read if self._counter is not None else self._raw.tell()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.compression is not None and self.log_throughput and exc_type is None:
+            seconds = max(time.perf_counter() - self._start_time, 1e-9)
+            compressed_mb = self.compressed_bytes_read / 1024 ** 2
+            uncompressed_mb = self.uncompressed_bytes_read / 1024 ** 2
+            logger.info(
+                f"Decompressed {self.file_path.name} ({self.compression}): {compressed_mb:,.1f} MB -> {uncompressed_mb:,.1f} MB "
+                f"in {seconds:.2f} s ({compressed_mb / seconds:,.1f} MB/s compressed, {uncompressed_mb / seconds:,.1f} MB/s uncompressed)."
+            )
+
+        for stream in (self.file, self._decompressor, self._raw):
+            if stream is not None:
+                stream.close()
+        return False
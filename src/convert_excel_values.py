@@ -0,0 +1,123 @@
+import numpy as np
+import pandas as pd
+from logger_config import logger
+
+# Constants
+EXCEL_EPOCH = pd.Timestamp("1899-12-30")  # Day zero of Excel's 1900 date system
+DATE_TYPES = {"date", "datetime", "datetime64", "datetime64[ns]"}
+DEFAULT_DATE_FORMAT = "yyyy-mm-dd"
+
+
+def is_date_column(series: pd.Series, column_type=None) -> bool:
+    """
+    Determines whether a column should be written to Excel as a date.
+
+    Parameters:
+        series (pd.Series): Column data.
+        column_type (str): Declared type from `column_types` (optional).
+
+    Returns:
+        bool: True if the column is declared as a date or already holds datetimes.
+    """
+    if column_type is not None and str(column_type).lower() in DATE_TYPES:
+        return True
+    return pd.api.types.is_datetime64_any_dtype(series.dtype)
+
+
+def dates_to_excel_serials(series: pd.Series, date_input_format=None) -> pd.Series:
+    """
+    Converts a column of dates into Excel serial numbers in one vectorized pass.
+
+    - Strings are parsed with `date_input_format` if given, otherwise day-first
+      (e.g. `15-02-25` is 15 Feb 2025).
+    - Timezones are dropped, as Excel has no timezone support.
+    - Missing or unparseable values become NaN.
+
+    Parameters:
+        series (pd.Series): Column of dates, timestamps or date strings.
+        date_input_format (str): strftime format of date strings, e.g. "%d-%m-%y" (optional).
+
+    Returns:
+        pd.Series: Float serial numbers (days since 1899-12-30).
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # Convert each distinct value once, then expand to the full column
+        serials = dates_to_excel_serials(pd.Series(series.cat.categories, name=series.name), date_input_format)
+        codes = series.cat.codes.to_numpy()
+        return pd.Series(np.where(codes >= 0, serials.to_numpy()[codes], np.nan), index=series.index, name=series.name)
+
+    if not pd.api.types.is_datetime64_any_dtype(series.dtype):
+        parsed = pd.to_datetime(series, format=date_input_format, dayfirst=True, errors="coerce")
+        unparsed = int((parsed.isna() & series.notna()).sum())
+        if unparsed:
+            logger.warning(f"⚠️ {unparsed} value(s) in column '{series.name}' could not be parsed as dates and will be left empty.")
+        series = parsed
+    if getattr(series.dt, "tz", None) is not None:
+        series = series.dt.tz_localize(None)
+
+    return (series - EXCEL_EPOCH) / pd.Timedelta(days=1)
+
+
+def column_to_excel_values(series: pd.Series, column_type=None, date_format=DEFAULT_DATE_FORMAT, date_input_format=None):
+    """
+    Converts a single DataFrame column into a list of Excel-ready values.
+
+    Parameters:
+        series (pd.Series): Column data.
+        column_type (str): Declared type from `column_types` (optional).
+        date_format (str): Number format applied to date columns.
+        date_input_format (str): strftime format of date strings (optional).
+
+    Returns:
+        tuple: (values, number_format)
+            - values (list): Native Python values, with `None` for missing values.
+            - number_format (str | None): Number format to apply, or None to keep the template's.
+    """
+    number_format = None
+    if is_date_column(series, column_type):
+        series = dates_to_excel_serials(series, date_input_format)
+        number_format = date_format
+
+    # `astype(object)` turns numpy scalars into native Python types in one pass
+    values = series.astype(object).where(series.notna(), None).tolist()
+
+    return values, number_format
+
+
+def df_to_excel_values(aligned_df: pd.DataFrame, column_types=None, date_format=DEFAULT_DATE_FORMAT, date_input_format=None):
+    """
+    Converts an aligned DataFrame into column lists that can be written straight into cells.
+
+    - Date columns become Excel serial numbers with `date_format` applied.
+    - NaN / NaT / None become empty cells.
+    - numpy scalars become native Python types.
+
+    Parameters:
+        aligned_df (pd.DataFrame): DataFrame aligned to the Excel table or sheet headers.
+        column_types (dict): Declared types keyed by output column name (case-insensitive).
+        date_format (str): Number format applied to date columns.
+        date_input_format (str): strftime format of date strings (optional).
+
+    Returns:
+        tuple: (columns, number_formats)
+            - columns (list[list]): One list of values per column, in `aligned_df` order.
+            - number_formats (list[str | None]): Number format per column.
+    """
+    column_types_lower = {str(col).lower(): col_type for col, col_type in (column_types or {}).items()}
+
+    columns = []
+    number_formats = []
+    for col_name in aligned_df.columns:
+        values, number_format = column_to_excel_values(
+            aligned_df[col_name],
+            column_type=column_types_lower.get(str(col_name).lower()),
+            date_format=date_format,
+            date_input_format=date_input_format,
+        )
+        columns.append(values)
+        number_formats.append(number_format)
+
+        if number_format:
+            logger.debug(f"Column '{col_name}' converted to Excel dates with format '{number_format}'.")
+
+    return columns, number_formats
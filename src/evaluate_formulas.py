@@ -0,0 +1,329 @@
+import re
+import numpy as np
+import pandas as pd
+from logger_config import logger
+
+# Constants
+SUPPORTED_FUNCTIONS = {"SUM", "COUNT", "COUNTA", "AVERAGE", "MIN", "MAX", "SUMIFS", "COUNTIFS", "AVERAGEIFS"}
+FORMULA_PATTERN = re.compile(r"^=\s*([A-Za-z]+)\s*\((.*)\)\s*$", re.DOTALL)
+# Table[Column] or Table[[Column]]; in column names, Excel escapes [ ] # and ' with a leading '
+STRUCTURED_REF_PATTERN = re.compile(r"^([A-Za-z_\\][\w.\\]*)\[\[?((?:'.|[^\[\]'])+)\]?\]$")
+COLUMN_ESCAPE_PATTERN = re.compile(r"'(.)")
+CRITERIA_OPERATORS = ("<=", ">=", "<>", "<", ">", "=")
+
+
+class UnsupportedFormula(Exception):
+    """Raised when a formula is outside the subset that can be evaluated."""
+
+
+def split_formula_args(args_text: str) -> list:
+    """
+    Splits the argument list of a function call on top-level commas.
+    Commas inside quotes or brackets (e.g. `tbl[[Col, A]]`) are ignored, as are brackets escaped
+    with `'` inside a column name (e.g. `tbl[Col'[1']]`).
+
+    Parameters:
+        args_text (str): Text between the outer parentheses, e.g. `tbl[Sales],tbl[Region],"AU"`.
+
+    Returns:
+        list: Argument strings, stripped of surrounding whitespace.
+    """
+    args, current, depth, in_quotes, escaped = [], [], 0, False, False
+    for char in args_text:
+        if escaped:
+            escaped = False
+        elif not in_quotes and depth > 0 and char == "'":
+            escaped = True
+        elif char == '"':
+            in_quotes = not in_quotes
+        elif not in_quotes and char in "[(":
+            depth += 1
+        elif not in_quotes and char in "])":
+            depth -= 1
+        elif not in_quotes and depth == 0 and char == ",":
+            args.append("".join(current).strip())
+            current = []
+            continue
+        current.append(char)
+    args.append("".join(current).strip())
+    return args
+
+
+def excel_numbers(series: pd.Series) -> pd.Series:
+    """
+    Returns only the numeric cells of a column, as Excel's aggregate functions see them.
+    Text, booleans and empty cells are ignored.
+    """
+    if pd.api.types.is_bool_dtype(series.dtype):
+        return series.iloc[0:0].astype(float)
+    if pd.api.types.is_numeric_dtype(series.dtype):
+        return series.dropna()
+
+    is_number = series.map(lambda value: isinstance(value, (int, float, np.number)) and not isinstance(value, bool))
+    return series[is_number].astype(float).dropna()
+
+
+def is_blank(series: pd.Series) -> pd.Series:
+    """Returns a boolean mask of cells that Excel treats as empty."""
+    if pd.api.types.is_numeric_dtype(series.dtype):
+        return series.isna()
+    return series.isna() | (series.astype(str) == "")
+
+
+def parse_criterion(criterion):
+    """
+    Splits a SUMIFS/COUNTIFS criterion into an operator and a value.
+
+    Parameters:
+        criterion: Literal criterion, e.g. 5, "AU", ">=100" or "<>".
+
+    Returns:
+        tuple: (operator, value) where value is a float when numeric, otherwise a string.
+    """
+    if not isinstance(criterion, str):
+        return "=", float(criterion)
+
+    operator = "="
+    for op in CRITERIA_OPERATORS:
+        if criterion.startswith(op):
+            operator, criterion = op, criterion[len(op):]
+            break
+
+    try:
+        return operator, float(criterion)
+    except ValueError:
+        return operator, criterion
+
+
+def criterion_mask(series: pd.Series, criterion) -> pd.Series:
+    """
+    Evaluates a SUMIFS/COUNTIFS criterion against a column, vectorized.
+
+    - Numeric criteria compare against numeric cells only.
+    - Text criteria compare case-insensitively and support the `*` and `?` wildcards.
+    - An empty criterion ("" or "=") matches empty cells; "<>" matches non-empty cells.
+
+    Parameters:
+        series (pd.Series): Column the criterion applies to.
+        criterion: Literal criterion from the formula.
+
+    Returns:
+        pd.Series: Boolean mask of matching rows.
+    """
+    operator, value = parse_criterion(criterion)
+
+    if value == "":
+        blank = is_blank(series)
+        if operator == "=":
+            return blank
+        if operator == "<>":
+            return ~blank
+        raise UnsupportedFormula(f"Unsupported criterion: {criterion!r}")
+
+    if isinstance(value, float):
+        numbers = excel_numbers(series).reindex(series.index)
+        comparisons = {
+            "=": numbers == value,
+            "<>": ~(numbers == value),
+            "<": numbers < value,
+            "<=": numbers <= value,
+            ">": numbers > value,
+            ">=": numbers >= value,
+        }
+        return comparisons[operator].fillna(operator == "<>").astype(bool)
+
+    if pd.api.types.is_numeric_dtype(series.dtype):
+        is_text = pd.Series(False, index=series.index)
+    else:
+        is_text = series.map(lambda v: isinstance(v, str))
+    text = series.where(is_text, "").astype(str).str.lower()
+    value = value.lower()
+
+    if operator in ("=", "<>"):
+        if "*" in value or "?" in value:
+            pattern = "^" + re.escape(value).replace(r"\*", ".*").replace(r"\?", ".") + "$"
+            matches = is_text & text.str.match(pattern)
+        else:
+            matches = is_text & (text == value)
+        return matches if operator == "=" else ~matches
+
+    comparisons = {
+        "<": text < value,
+        "<=": text <= value,
+        ">": text > value,
+        ">=": text >= value,
+    }
+    return is_text & comparisons[operator]
+
+
+class TableFormulaEvaluator:
+    """
+    Evaluates a defined subset of aggregate formulas over structured references
+    (e.g. `=SUM(Sales[Amount])`, `=COUNTIFS(Sales[Region],"AU")`) to tables written in the run.
+
+    Supported functions: SUM, COUNT, COUNTA, AVERAGE, MIN, MAX, SUMIFS, COUNTIFS, AVERAGEIFS.
+    Arguments must be structured references `Table[Column]` or literal numbers/strings.
+    Anything else raises `UnsupportedFormula` and is left for Excel to calculate.
+    """
+
+    def __init__(self):
+        self.tables = {}
+
+    def add_table(self, table_name, aligned_df, columns, number_formats):
+        """
+        Registers a table written in this run.
+
+        Parameters:
+            table_name (str): Name of the Excel table.
+            aligned_df (pd.DataFrame): Data aligned to the table headers.
+            columns (list[list]): Excel-ready values per column (see `df_to_excel_values`).
+            number_formats (list[str | None]): Number format per column; date columns use the
+                Excel-ready serial values so results match what Excel would calculate.
+        """
+        self.tables[table_name.lower()] = (aligned_df, columns, number_formats)
+
+    def get_column(self, table_name, column_name) -> pd.Series:
+        if table_name.lower() not in self.tables:
+            raise UnsupportedFormula(f"Table '{table_name}' was not written in this run.")
+
+        aligned_df, columns, number_formats = self.tables[table_name.lower()]
+        column_names_lower = [str(col).lower() for col in aligned_df.columns]
+        if column_name.lower() not in column_names_lower:
+            raise UnsupportedFormula(f"Column '{column_name}' not found in table '{table_name}'.")
+
+        col_idx = column_names_lower.index(column_name.lower())
+        if number_formats[col_idx]:
+            return pd.Series(columns[col_idx], dtype=float)
+
+        series = aligned_df.iloc[:, col_idx].reset_index(drop=True)
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            return series.astype(object)
+        if pd.api.types.is_float_dtype(series.dtype) and series.dtype.itemsize < 8:
+            return series.astype(np.float64)  # Calculate in full precision, as Excel does
+        return series
+
+    def parse_arg(self, arg):
+        """Resolves a formula argument to a column (pd.Series) or a literal value."""
+        ref_match = STRUCTURED_REF_PATTERN.match(arg)
+        if ref_match:
+            table_name, column_name = ref_match.groups()
+            if column_name.startswith("#"):
+                raise UnsupportedFormula(f"Special item references are not supported: {arg}")
+            return self.get_column(table_name, COLUMN_ESCAPE_PATTERN.sub(r"\1", column_name))
+
+        if len(arg) >= 2 and arg.startswith('"') and arg.endswith('"'):
+            return arg[1:-1].replace('""', '"')
+
+        try:
+            return float(arg)
+        except ValueError:
+            raise UnsupportedFormula(f"Unsupported argument: {arg}")
+
+    def evaluate(self, formula: str):
+        """
+        Evaluates a formula.
+
+        Parameters:
+            formula (str): Formula text including the leading "=".
+
+        Returns:
+            int | float: The formula result.
+
+        Raises:
+            UnsupportedFormula: If the formula is outside the supported subset.
+        """
+        match = FORMULA_PATTERN.match(formula)
+        if not match:
+            raise UnsupportedFormula(f"Not a single function call: {formula}")
+
+        function_name = match.group(1).upper()
+        if function_name not in SUPPORTED_FUNCTIONS:
+            raise UnsupportedFormula(f"Unsupported function: {function_name}")
+
+        args = [self.parse_arg(arg) for arg in split_formula_args(match.group(2))]
+
+        if function_name in ("SUM", "COUNT", "COUNTA", "AVERAGE", "MIN", "MAX"):
+            if len(args) != 1 or not isinstance(args[0], pd.Series):
+                raise UnsupportedFormula(f"{function_name} expects a single structured reference.")
+            return self.aggregate(function_name, args[0])
+
+        # *IFS functions
+        if function_name == "COUNTIFS":
+            values, pairs = None, args
+        else:
+            values, pairs = args[0], args[1:]
+
+        if len(pairs) == 0 or len(pairs) % 2 != 0:
+            raise UnsupportedFormula(f"{function_name} expects range/criteria pairs.")
+
+        ranges = pairs[0::2] + ([values] if values is not None else [])
+        if not all(isinstance(r, pd.Series) for r in ranges) or len({len(r) for r in ranges}) != 1:
+            raise UnsupportedFormula(f"{function_name} ranges must be structured references of equal size.")
+
+        mask = pd.Series(True, index=ranges[0].index)
+        for criteria_range, criterion in zip(pairs[0::2], pairs[1::2]):
+            if isinstance(criterion, pd.Series):
+                raise UnsupportedFormula("Criteria must be literal values.")
+            mask &= criterion_mask(criteria_range, criterion)
+
+        if function_name == "COUNTIFS":
+            return int(mask.sum())
+        if function_name == "SUMIFS":
+            return self.aggregate("SUM", values[mask])
+        return self.aggregate("AVERAGE", values[mask])
+
+    def aggregate(self, function_name, series: pd.Series):
+        if function_name == "COUNTA":
+            return int((~is_blank(series)).sum())
+
+        numbers = excel_numbers(series)
+        if function_name == "COUNT":
+            return int(len(numbers))
+        if function_name == "SUM":
+            return float(numbers.sum())
+        if function_name == "MIN":
+            return float(numbers.min()) if len(numbers) else 0
+        if function_name == "MAX":
+            return float(numbers.max()) if len(numbers) else 0
+
+        # AVERAGE
+        if not len(numbers):
+            raise UnsupportedFormula("AVERAGE of no numbers is #DIV/0!")
+        return float(numbers.mean())
+
+
+def evaluate_workbook_formulas(wb, evaluator: TableFormulaEvaluator):
+    """
+    Evaluates every supported formula in a workbook.
+
+    Parameters:
+        wb (openpyxl.Workbook): Workbook with the new data written.
+        evaluator (TableFormulaEvaluator): Evaluator holding the tables written in the run.
+
+    Returns:
+        tuple: (cached_values, all_evaluated)
+            - cached_values (dict): {sheet_title: {cell_coordinate: value}}
+            - all_evaluated (bool): True if every formula in the workbook was evaluated.
+    """
+    cached_values = {}
+    all_evaluated = True
+
+    for ws in wb.worksheets:
+        sheet_values = {}
+        for cell in ws._cells.values():
+            if cell.data_type != "f" or not isinstance(cell.value, str):
+                if cell.data_type == "f":
+                    all_evaluated = False  # Array / data table formulas
+                continue
+
+            try:
+                sheet_values[cell.coordinate] = evaluator.evaluate(cell.value)
+            except UnsupportedFormula as e:
+                all_evaluated = False
+                logger.debug(f"Not caching {ws.title}!{cell.coordinate} ({cell.value}): {e}")
+
+        if sheet_values:
+            cached_values[ws.title] = sheet_values
+            logger.info(f"Evaluated {len(sheet_values)} formulas in sheet '{ws.title}'.")
+
+    return cached_values, all_evaluated
@@ -1,12 +1,67 @@
 import os
+import time
+import sqlite3
+import threading
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from openpyxl import load_workbook
 from pathlib import Path
 from logger_config import logger
+from utils import CSV_EXTENSIONS, COLUMNAR_EXTENSIONS, FLAT_FILE_EXTENSIONS, SQLITE_EXTENSIONS, get_sqlite_source_key, get_file_extension, is_glob_source
+from compressed_files import CsvStream
+from partitioned_sources import expand_source_files, get_partition_value, get_source_size
+from append_tables import reads_by_byte_offset
+from transform_data import (
+    get_source_transforms,
+    get_transforms_key,
+    get_transform_columns,
+    get_transform_output_columns,
+    apply_filters,
+    apply_aggregation_and_sort,
+    apply_transforms,
+    build_sql_clauses,
+    split_sql_transforms,
+)
 
 # Constants
 XL_TABLE = "xl_table"
 XL_SHEET = "xl_sheet"
+SQLITE = "sqlite"
+SQLITE_FETCH_BATCH_SIZE = 50_000  # Rows fetched per `fetchmany` call
+CSV_CHUNK_SIZE = 100_000  # Rows per chunk when filters are applied while reading a CSV
+DEFAULT_LOAD_WORKERS = 4  # Input files loaded at the same time
+DEFAULT_MAX_INFLIGHT_BYTES = 2 * 1024 ** 3  # Total on-disk size of the input files loading at the same time
+DEFAULT_PARTITION_WORKERS = 4  # Files of one glob source read at the same time
+
+# Declared `column_types` and the pandas dtypes used for rows fetched from SQLite
+SQLITE_DTYPES = {
+    "int": "Int64",
+    "int64": "Int64",
+    "int32": "Int64",
+    "float": "float64",
+    "float64": "float64",
+    "float32": "float64",
+    "bool": "boolean",
+    "boolean": "boolean",
+}
+
+# Declared `column_types` and the Arrow type checks they must satisfy in columnar files
+ARROW_TYPE_CHECKS = {
+    "string": "is_string",
+    "str": "is_string",
+    "object": "is_string",
+    "int": "is_integer",
+    "int64": "is_integer",
+    "int32": "is_integer",
+    "float": "is_numeric",
+    "float64": "is_numeric",
+    "float32": "is_numeric",
+    "bool": "is_boolean",
+    "boolean": "is_boolean",
+    "date": "is_temporal",
+    "datetime": "is_temporal",
+    "datetime64": "is_temporal",
+}
 
 def validate_single_key(py_dict):
     """
@@ -26,6 +81,40 @@ def validate_single_key(py_dict):
     return True
 
 
+def add_columns_to_load_info(source_settings, load_info, file_name):
+    """
+    Adds the columns and declared types of a source to its `files_to_load` entry.
+
+    Parameters:
+        source_settings (dict): Source settings containing `column_mapping` and `column_types`.
+        load_info (dict): The `files_to_load` entry, holding "cols" (set) and "types" (dict).
+        file_name (str): Name of the input file (used in error messages).
+
+    Raises:
+        ValueError: If a column is declared with different types by different outputs.
+    """
+    # Extract column names from mappings and types
+    column_mapping_keys = set(source_settings.get("column_mapping", {}).keys())
+    column_types_keys = set(source_settings.get("column_types", {}).keys())
+
+    # Update the set with unique column names
+    load_info["cols"].update(column_mapping_keys)
+    load_info["cols"].update(column_types_keys)
+
+    # Columns only used by filters, grouping or sorting must be loaded too
+    transforms = get_source_transforms(source_settings)
+    if transforms is not None:
+        load_info["cols"].update(get_transform_columns(transforms))
+
+    # Keep the declared types, which must agree across all outputs using the source
+    for col, col_type in source_settings.get("column_types", {}).items():
+        declared_type = load_info["types"].setdefault(col, col_type)
+        if str(declared_type).lower() != str(col_type).lower():
+            err_msg = f"❌ Error: Column '{col}' in '{file_name}' is declared as both '{declared_type}' and '{col_type}'."
+            logger.error(err_msg)
+            raise ValueError(err_msg)
+
+
 def add_file_to_load_info(file_info, files_to_load):
     """
     Updates the `files_to_load` dictionary with required files and columns.
@@ -47,20 +136,30 @@ def add_file_to_load_info(file_info, files_to_load):
     validate_single_key(file_info)
 
     for file_name, data_info in file_info.items():
-        file_extension = os.path.splitext(file_name)[1].lower()  # Normalize file extension
+        file_extension = get_file_extension(file_name)  # Normalize file extension (`.csv.gz` -> `.csv`)
 
-        if file_extension == ".csv":
-            logger.debug(f"Loading CSV: {file_name}")
+        if file_extension in FLAT_FILE_EXTENSIONS:
+            logger.debug(f"Loading {file_extension} file: {file_name}")
             # Initialize entry if not exists
-            files_to_load.setdefault(file_name, {"cols": set()})
-
-            # Extract column names from mappings and types
-            column_mapping_keys = set(data_info.get("column_mapping", {}).keys())
-            column_types_keys = set(data_info.get("column_types", {}).keys())
-
-            # Update the set with unique column names
-            files_to_load[file_name]["cols"].update(column_mapping_keys)
-            files_to_load[file_name]["cols"].update(column_types_keys)
+            files_to_load.setdefault(file_name, {"cols": set(), "types": {}})
+            add_columns_to_load_info(data_info, files_to_load[file_name], file_name)
+
+            # A glob source can add the matched path component of each file as a column
+            partition_column = data_info.get("partition_column")
+            if partition_column:
+                if not is_glob_source(file_name):
+                    raise ValueError(f"❌ Error: `partition_column` on '{file_name}' needs a glob source (e.g. `sales/*.csv`).")
+                declared_column = files_to_load[file_name].setdefault("partition_column", partition_column)
+                if declared_column != partition_column:
+                    raise ValueError(f"❌ Error: '{file_name}' is given both '{declared_column}' and '{partition_column}' as `partition_column`.")
+
+            # Track which filtered/aggregated views of the file are needed, and whether the full data is
+            transforms = get_source_transforms(data_info)
+            if transforms is None:
+                files_to_load[file_name]["full"] = True
+            else:
+                files_to_load[file_name].setdefault("queries", {})
+                files_to_load[file_name]["queries"][get_transforms_key(transforms)] = {"transforms": transforms}
 
         elif file_extension == ".xlsx":
             # Initialize entry if not exists
@@ -77,15 +176,27 @@ def add_file_to_load_info(file_info, files_to_load):
                 if not xl_name:
                     raise ValueError(f"❌ Error: Missing name for {xl_type}")
 
-                files_to_load[file_name][category_key].setdefault(xl_name, {"cols": set()})
+                files_to_load[file_name][category_key].setdefault(xl_name, {"cols": set(), "types": {}})
+                add_columns_to_load_info(xl_settings, files_to_load[file_name][category_key][xl_name], file_name)
 
-                # Extract column names from mappings and types
-                column_mapping_keys = set(xl_settings.get("column_mapping", {}).keys())
-                column_types_keys = set(xl_settings.get("column_types", {}).keys())
+        elif file_extension in SQLITE_EXTENSIONS:
+            # Initialize entry if not exists
+            files_to_load.setdefault(file_name, {})
 
-                # Update the set with unique column names
-                files_to_load[file_name][category_key][xl_name]["cols"].update(column_mapping_keys)
-                files_to_load[file_name][category_key][xl_name]["cols"].update(column_types_keys)
+            for source_kind, sqlite_settings in data_info.items():
+                if source_kind != SQLITE:
+                    raise ValueError(f"❌ Error: Unsupported source kind for '{file_name}': {source_kind}")
+
+                source_key = get_sqlite_source_key(sqlite_settings)
+                files_to_load[file_name].setdefault(SQLITE, {})
+                files_to_load[file_name][SQLITE].setdefault(source_key, {
+                    "cols": set(),
+                    "types": {},
+                    "table": sqlite_settings.get("table"),
+                    "query": sqlite_settings.get("query"),
+                    "transforms": get_source_transforms(sqlite_settings),
+                })
+                add_columns_to_load_info(sqlite_settings, files_to_load[file_name][SQLITE][source_key], file_name)
 
         else:
             err_msg = f"❌ Error: Unsupported file extension: {file_extension}"
@@ -95,7 +206,7 @@ def add_file_to_load_info(file_info, files_to_load):
     return files_to_load
 
 
-def load_excel_sheet(file_path, sheet_name, columns_to_load):
+def load_excel_sheet(file_path, sheet_name, columns_to_load, max_rows=None):
     """
     Loads a specific sheet from an Excel file with selected columns.
 
@@ -103,6 +214,7 @@ def load_excel_sheet(file_path, sheet_name, columns_to_load):
         file_path (str): Path to the Excel file.
         sheet_name (str): Name of the sheet to load.
         columns_to_load (list): List of column names to load.
+        max_rows (int): Read only the first rows (optional, see `--preview`).
 
     Returns:
         pd.DataFrame: DataFrame containing the specified columns from the sheet.
@@ -120,16 +232,258 @@ def load_excel_sheet(file_path, sheet_name, columns_to_load):
 
     # Load the sheet with only the required columns
     try:
-        df = pd.read_excel(file_path, sheet_name=sheet_name, usecols=columns_to_load, engine="openpyxl")
+        df = pd.read_excel(file_path, sheet_name=sheet_name, usecols=columns_to_load, nrows=max_rows, engine="openpyxl")
     except ValueError as e:
         raise ValueError(f"❌ Error: {e}")
 
     return df
 
+def check_arrow_schema(file_path, schema, columns_to_load, column_types):
+    """
+    Checks that the requested columns exist in a columnar file and that their
+    declared `column_types` agree with the file schema.
+
+    Parameters:
+        file_path (str): Path to the file (used in error messages).
+        schema (pyarrow.Schema): Schema of the file.
+        columns_to_load (list): Column names to load.
+        column_types (dict): Declared types keyed by column name.
+
+    Raises:
+        ValueError: If a column is missing or its type does not match the declared type.
+    """
+    import pyarrow.types as pa_types
+
+    missing_columns = [col for col in columns_to_load if col not in schema.names]
+    if missing_columns:
+        raise ValueError(f"❌ Error: Columns {missing_columns} not found in '{file_path}'. Available columns: {schema.names}")
+
+    mismatches = []
+    for col, col_type in column_types.items():
+        check_name = ARROW_TYPE_CHECKS.get(str(col_type).lower())
+        if check_name is None:
+            logger.warning(f"⚠️ Type '{col_type}' of column '{col}' cannot be checked against the schema of '{file_path}'.")
+            continue
+
+        arrow_type = schema.field(col).type
+        if pa_types.is_dictionary(arrow_type):
+            arrow_type = arrow_type.value_type
+
+        if check_name == "is_string":
+            matches = pa_types.is_string(arrow_type) or pa_types.is_large_string(arrow_type)
+        elif check_name == "is_numeric":
+            matches = pa_types.is_floating(arrow_type) or pa_types.is_integer(arrow_type) or pa_types.is_decimal(arrow_type)
+        elif check_name == "is_temporal":
+            matches = pa_types.is_timestamp(arrow_type) or pa_types.is_date(arrow_type)
+        else:
+            matches = getattr(pa_types, check_name)(arrow_type)
+
+        if not matches:
+            mismatches.append(f"'{col}' declared {col_type} but stored as {arrow_type}")
+
+    if mismatches:
+        raise ValueError(f"❌ Error: Column types in '{file_path}' do not match `column_types`: {'; '.join(mismatches)}")
+
+
+def load_columnar_file(file_path, columns_to_load, column_types, max_rows=None):
+    """
+    Loads only the required columns from a Parquet, Feather or Arrow IPC file.
+
+    - Only the requested columns are read (projection pushdown).
+    - Files are memory-mapped, so Arrow IPC/Feather columns are not copied before conversion.
+    - Declared `column_types` are checked against the file schema; no text parsing is involved.
+    - With `max_rows`, Parquet files stop after the first batch and Arrow files are sliced without copying.
+
+    Parameters:
+        file_path (Path): Path to the file.
+        columns_to_load (list): Column names to load.
+        column_types (dict): Declared types keyed by column name.
+        max_rows (int): Read only the first rows (optional, see `--preview`).
+
+    Returns:
+        pd.DataFrame: DataFrame with the requested columns.
+
+    Raises:
+        ImportError: If `pyarrow` is not installed.
+        ValueError: If columns are missing or types do not match.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.feather as feather
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError(f"❌ Error: Reading '{file_path.suffix}' files requires `pyarrow` (pip install pyarrow).")
+
+    if file_path.suffix.lower() == ".parquet":
+        schema = pq.read_schema(file_path)
+        check_arrow_schema(file_path, schema, columns_to_load, column_types)
+        if max_rows:
+            batches = pq.ParquetFile(file_path, memory_map=True).iter_batches(batch_size=max_rows, columns=columns_to_load)
+            first_batch = next(batches, None)
+            table = pa.Table.from_batches([first_batch]) if first_batch is not None else schema.empty_table().select(columns_to_load)
+        else:
+            table = pq.read_table(file_path, columns=columns_to_load, memory_map=True)
+    else:
+        with pa.memory_map(str(file_path)) as source:
+            schema = pa.ipc.open_file(source).schema
+        check_arrow_schema(file_path, schema, columns_to_load, column_types)
+        table = feather.read_table(file_path, columns=columns_to_load, memory_map=True)
+        if max_rows:
+            table = table.slice(0, max_rows)
+
+    logger.info(f"Read {table.num_rows} rows x {table.num_columns} columns ({table.nbytes / 1e6:.1f} MB) from {file_path}")
+
+    # Dates become datetime64 columns; the Arrow buffers are released as they are converted
+    return table.to_pandas(date_as_object=False, split_blocks=True, self_destruct=True)
+
+
+def quote_sql_identifier(name):
+    """Quotes a table or column name for use in SQLite SQL."""
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def build_sqlite_select(columns_to_load, table=None, query=None, transforms=None):
+    """
+    Builds the SELECT statement for a SQLite source, selecting only the required columns.
+    Filters, grouping/aggregation and sorting are pushed down into the statement.
+
+    Parameters:
+        columns_to_load (list): Column names to select.
+        table (str): Table (or view) name to read from.
+        query (str): Query to read from; wrapped as a subquery so only the required columns are returned.
+        transforms (dict): Normalised filter/aggregate/sort transforms (optional).
+
+    Returns:
+        tuple: (sql, params, output_columns)
+    """
+    select_items = [quote_sql_identifier(col) for col in columns_to_load]
+    where_clause, group_by_clause, order_by_clause, params = "", "", "", []
+    output_columns = list(columns_to_load)
+
+    if transforms is not None:
+        aggregate_items, where_clause, group_by_clause, order_by_clause, params = build_sql_clauses(
+            transforms, quote_sql_identifier
+        )
+        if aggregate_items is not None:
+            select_items = aggregate_items
+            output_columns = get_transform_output_columns(transforms, columns_to_load)
+
+    source = quote_sql_identifier(table) if table else f"({query.strip().rstrip(';')}) AS source"
+    sql = f"SELECT {', '.join(select_items)} FROM {source}{where_clause}{group_by_clause}{order_by_clause}"
+
+    return sql, params, output_columns
+
+
+def load_sqlite_source(connection, columns_to_load, column_types, table=None, query=None, transforms=None, batch_size=SQLITE_FETCH_BATCH_SIZE, max_rows=None):
+    """
+    Loads the required columns of a SQLite table or query.
+
+    - Only the required columns are selected in SQL.
+    - Filters, grouping/aggregation and sorting run inside the database, except filters on date
+      columns, which run in pandas with the grouping and sorting after them (see `split_sql_transforms`).
+    - Rows are fetched in batches with `fetchmany` and converted to typed DataFrames per batch.
+
+    Parameters:
+        connection (sqlite3.Connection): Open connection to the database file.
+        columns_to_load (list): Column names to select.
+        column_types (dict): Declared types keyed by column name.
+        table (str): Table (or view) name to read from.
+        query (str): Query to read from.
+        transforms (dict): Normalised filter/aggregate/sort transforms (optional).
+        batch_size (int): Rows fetched per `fetchmany` call.
+        max_rows (int): Return only the first rows, limited in SQL (optional, see `--preview`).
+
+    Returns:
+        pd.DataFrame: DataFrame with the requested columns.
+
+    Raises:
+        ValueError: If the SQL fails (e.g. a column or table does not exist).
+    """
+    pandas_transforms = None
+    if transforms is not None:
+        transforms, pandas_transforms = split_sql_transforms(transforms)
+    sql, params, output_columns = build_sqlite_select(columns_to_load, table=table, query=query, transforms=transforms)
+    if max_rows:
+        sql, params = f"{sql} LIMIT ?", [*params, max_rows]
+    logger.debug(f"SQL: {sql} {params}")
+
+    # Aggregated columns keep the type SQLite returns (e.g. AVG of integers is a float)
+    aggregated_columns = set(transforms["aggregate"]) - set(transforms["group_by"]) if transforms else set()
+    dtypes = {
+        col: SQLITE_DTYPES[str(col_type).lower()]
+        for col, col_type in column_types.items()
+        if str(col_type).lower() in SQLITE_DTYPES and col in output_columns and col not in aggregated_columns
+    }
+
+    cursor = connection.cursor()
+    try:
+        cursor.execute(sql, params)
+    except sqlite3.Error as e:
+        raise ValueError(f"❌ Error: SQLite query failed ({e}): {sql}")
+
+    batches = []
+    try:
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            batches.append(pd.DataFrame.from_records(rows, columns=output_columns).astype(dtypes))
+    finally:
+        cursor.close()
+
+    if not batches:
+        df = pd.DataFrame({col: pd.Series(dtype=dtypes.get(col, "object")) for col in output_columns})
+    else:
+        df = pd.concat(batches, ignore_index=True)
+
+    return apply_transforms(df, pandas_transforms)
+
+
+def load_csv_with_transforms(file_path, columns_to_load, queries, keep_full, chunk_size=CSV_CHUNK_SIZE, max_rows=None):
+    """
+    Reads a CSV in chunks, applying each output's filters while reading so that
+    only matching rows are kept in memory. Grouping/aggregation and sorting run on the filtered rows.
+
+    Parameters:
+        file_path (Path): Path to the CSV file.
+        columns_to_load (list): Column names to load.
+        queries (dict): {transforms_key: {"transforms": transforms}} for each filtered view of the file.
+        keep_full (bool): Whether the unfiltered data is also needed by an output.
+        chunk_size (int): Rows per chunk.
+        max_rows (int): Read only the first rows (optional, see `--preview`).
+
+    Returns:
+        tuple: (full_df, query_dfs)
+            - full_df (pd.DataFrame | None): Unfiltered data, if `keep_full`.
+            - query_dfs (dict): {transforms_key: pd.DataFrame} for each filtered view.
+    """
+    full_chunks = []
+    query_chunks = {key: [] for key in queries}
+    n_rows = 0
+
+    with CsvStream(file_path) as csv_stream:
+        for chunk in pd.read_csv(csv_stream.file, usecols=columns_to_load, chunksize=chunk_size, nrows=max_rows):
+            n_rows += len(chunk)
+            if keep_full:
+                full_chunks.append(chunk)
+            for key, query in queries.items():
+                query_chunks[key].append(apply_filters(chunk, query["transforms"]))
+
+    full_df = pd.concat(full_chunks, ignore_index=True) if keep_full and full_chunks else None
+
+    query_dfs = {}
+    for key, query in queries.items():
+        filtered = pd.concat(query_chunks[key], ignore_index=True) if query_chunks[key] else pd.DataFrame(columns=columns_to_load)
+        query_dfs[key] = apply_aggregation_and_sort(filtered, query["transforms"])
+        logger.info(f"Filtered {file_path.name} while reading: {n_rows} rows -> {len(query_dfs[key])} rows.")
+
+    return full_df, query_dfs
+
+
 from update_xlsx_data import xl_range_details
 
-def extract_table_from_sheet(sheet, table_range):
-    """Extracts a table from an Excel sheet into a DataFrame."""
+def extract_table_from_sheet(sheet, table_range, max_rows=None):
+    """Extracts a table from an Excel sheet into a DataFrame, optionally only its first `max_rows` data rows."""
     (
         _,
         _,
@@ -140,6 +494,8 @@ def extract_table_from_sheet(sheet, table_range):
         end_row_number,
         end_col_number,
     ) = xl_range_details(table_range)
+    if max_rows:
+        end_row_number = min(int(end_row_number), int(start_row_number) + max_rows)
 
     data = [
         [cell.value for cell in row]
@@ -151,90 +507,284 @@ def extract_table_from_sheet(sheet, table_range):
     return df
 
 
-def load_input_data(input_files_folder: str, input_data_dict: dict) -> dict:
+def load_glob_source(input_files_folder, pattern, data_config, input_data_dict, max_workers=DEFAULT_PARTITION_WORKERS, max_rows=None):
     """
-    Loads input data from CSV and Excel files based on a given configuration.
+    Loads every file matching a glob source in parallel and concatenates them into `input_data_dict`.
+
+    - Every file is read with the same column projection (and, for columnar files, the same type checks).
+    - With a `partition_column`, each file's rows get the path component matched by the pattern's first wildcard.
+    - For CSV sources, each file's rows are filtered as soon as it is read; grouping/aggregation and
+      sorting run once on the concatenated rows.
+    - With `max_rows`, each file is read up to that many rows and the concatenated source is cut to it.
+
+    Raises:
+        FileNotFoundError: If no file matches the pattern.
+        ValueError: If the files are not CSV/columnar files, or a file already has the partition column.
+    """
+    file_extension = get_file_extension(pattern)
+    if file_extension not in FLAT_FILE_EXTENSIONS:
+        raise ValueError(f"❌ Error: Glob sources must match CSV or columnar files, not '{file_extension}': {pattern}")
+
+    files = expand_source_files(input_files_folder, pattern)
+    partition_column = data_config.get("partition_column")
+    columns_to_load = sorted(col for col in data_config["cols"] if col != partition_column)
+    queries = data_config.get("queries", {}) if file_extension in CSV_EXTENSIONS else {}
+    keep_full = data_config.get("full", False) or file_extension not in CSV_EXTENSIONS
+    logger.info(f"Reading {len(files)} files matching '{pattern}'.")
+
+    def read_partition(relative_path):
+        file_path = Path(input_files_folder) / relative_path
+        if file_extension in CSV_EXTENSIONS:
+            with CsvStream(file_path) as csv_stream:
+                df = pd.read_csv(csv_stream.file, usecols=columns_to_load, nrows=max_rows)
+        else:
+            df = load_columnar_file(file_path, columns_to_load, data_config.get("types", {}), max_rows=max_rows)
+
+        if partition_column:
+            if partition_column in df.columns:
+                raise ValueError(f"❌ Error: `partition_column` '{partition_column}' already exists in '{relative_path}'.")
+            df[partition_column] = get_partition_value(pattern, relative_path)
+
+        filtered = {key: apply_filters(df, query["transforms"]) for key, query in queries.items()}
+        return (df if keep_full else None), filtered
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(files)), thread_name_prefix="partition") as executor:
+        results = list(executor.map(read_partition, files))
+
+    # One concatenation per output, straight from the per-file frames
+    if keep_full:
+        full_df = pd.concat([full_df for full_df, _ in results], ignore_index=True)
+        input_data_dict[pattern]["data"] = full_df.head(max_rows) if max_rows else full_df
+    for key, query in queries.items():
+        filtered = pd.concat([query_dfs[key] for _, query_dfs in results], ignore_index=True)
+        input_data_dict[pattern]["queries"][key]["data"] = apply_aggregation_and_sort(filtered, query["transforms"])
+        logger.info(f"Filtered '{pattern}' while reading: {len(filtered)} rows -> {len(input_data_dict[pattern]['queries'][key]['data'])} rows.")
+
+
+def load_input_file(input_files_folder: str, file_name: str, data_config: dict, input_data_dict: dict, max_rows=None, csv_chunk_rows=CSV_CHUNK_SIZE):
+    """
+    Loads the data required from one input file into `input_data_dict` (see `load_input_data`).
+    With `max_rows`, every source of the file is read only up to that many rows (see `--preview`).
+    CSVs filtered while reading are read `csv_chunk_rows` rows at a time.
+
+    Raises:
+        FileNotFoundError: If the file does not exist.
+        ValueError: If the file type is not supported.
+    """
+    if is_glob_source(file_name):
+        load_glob_source(input_files_folder, file_name, data_config, input_data_dict, max_rows=max_rows)
+        return
+
+    file_path = Path(input_files_folder) / file_name
+    file_extension = get_file_extension(file_name)  # Normalize file extension (`.csv.gz` -> `.csv`)
+
+    if not file_path.exists():
+        logger.error(f"File not found: {file_path}")
+        raise FileNotFoundError(f"File not found: {file_path}")
+
+    logger.info(f"Processing file: {file_path}")
+
+    if file_extension in CSV_EXTENSIONS and data_config.get('queries'):
+        logger.debug("Loading CSV data in chunks, applying filters while reading.")
+        full_df, query_dfs = load_csv_with_transforms(
+            file_path=file_path,
+            columns_to_load=list(data_config['cols']),
+            queries=data_config['queries'],
+            keep_full=data_config.get('full', False),
+            chunk_size=csv_chunk_rows,
+            max_rows=max_rows,
+        )
+        if full_df is not None:
+            input_data_dict[file_name]["data"] = full_df
+        for key, df in query_dfs.items():
+            input_data_dict[file_name]["queries"][key]["data"] = df
+
+    elif file_extension in CSV_EXTENSIONS:
+        logger.debug("Loading CSV data.")
+        column_names = data_config['cols']
+        with CsvStream(file_path) as csv_stream:
+            df = pd.read_csv(csv_stream.file, usecols=column_names, nrows=max_rows)
+        input_data_dict[file_name]["data"] = df
+
+    elif file_extension in COLUMNAR_EXTENSIONS:
+        logger.debug(f"Loading columnar data ({file_extension}).")
+        df = load_columnar_file(
+            file_path=file_path,
+            columns_to_load=sorted(data_config['cols']),
+            column_types=data_config.get('types', {}),
+            max_rows=max_rows,
+        )
+        input_data_dict[file_name]["data"] = df
+
+    elif file_extension == '.xlsx':
+        wb = load_workbook(file_path, data_only=False)
+        logger.info(f"Opened Excel file: {file_path}")
+
+        for xl_type, xl_config in data_config.items():
+            if xl_type == "xl_sheets":
+                for sheet_name, cols_dict in xl_config.items():
+                    logger.info(f"Loading sheet: {sheet_name}")
+                    try:
+                        data_pd = load_excel_sheet(
+                            file_path=file_path,
+                            sheet_name=sheet_name,
+                            columns_to_load=list(cols_dict.get('cols', [])),
+                            max_rows=max_rows,
+                        )
+                        input_data_dict[file_name][xl_type][sheet_name]["data"] = data_pd
+                        logger.info(f"Loaded sheet '{sheet_name}' successfully.")
+
+                    except Exception as e:
+                        logger.error(f"Error loading sheet '{sheet_name}': {e}")
+                        raise
+
+            elif xl_type == "xl_tables":
+                logger.debug("Processing Excel tables...")
+                for table_name, cols_dict in xl_config.items():
+                    logger.debug(f"Searching for table: {table_name}")
+                    
+                    for sheet in wb.worksheets:
+                        if table_name in sheet.tables: # to confirm here # to confirm here # to confirm here # to confirm here
+                            table = sheet.tables[table_name]
+                            table_range = table.ref  # e.g., "A1:C10"
+
+                            if table_range:
+                                logger.info(f"Extracting table: {table_name} from range {table_range}")
+                                df = extract_table_from_sheet(sheet, table_range, max_rows=max_rows)
+
+                                input_data_dict[file_name][xl_type][table_name]["data"] = df
+                                logger.info(f"Table '{table_name}' loaded successfully.")
+
+    elif file_extension in SQLITE_EXTENSIONS:
+        # One read-only connection per database file, shared by every source that uses it
+        connection = sqlite3.connect(f"{file_path.resolve().as_uri()}?mode=ro", uri=True)
+        logger.info(f"Opened SQLite database: {file_path}")
+
+        try:
+            for source_key, source_config in data_config.get(SQLITE, {}).items():
+                source_name = source_config.get('table') or source_config.get('query')
+                logger.info(f"Loading SQLite source: {source_name}")
+                df = load_sqlite_source(
+                    connection=connection,
+                    columns_to_load=sorted(source_config['cols']),
+                    column_types=source_config.get('types', {}),
+                    table=source_config.get('table'),
+                    query=source_config.get('query'),
+                    transforms=source_config.get('transforms'),
+                    max_rows=max_rows,
+                )
+                input_data_dict[file_name][SQLITE][source_key]["data"] = df
+                logger.info(f"Loaded {len(df)} rows from SQLite source '{source_name}'.")
+        finally:
+            connection.close()
+
+    else:
+        logger.error(f"Unsupported file format: {file_extension}")
+        raise ValueError(f"Unsupported file format: {file_extension}")
+
+
+class ByteBudget:
+    """
+    Limits the total size of the input files being loaded at the same time.
+
+    A file larger than the whole budget is still loaded, but only once nothing else is in flight.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.in_flight = 0
+        self.condition = threading.Condition()
+
+    def acquire(self, n_bytes):
+        with self.condition:
+            self.condition.wait_for(lambda: self.in_flight == 0 or self.in_flight + n_bytes <= self.max_bytes)
+            self.in_flight += n_bytes
+
+    def release(self, n_bytes):
+        with self.condition:
+            self.in_flight -= n_bytes
+            self.condition.notify_all()
+
+
+def load_input_data(
+        input_files_folder: str,
+        input_data_dict: dict,
+        max_workers=DEFAULT_LOAD_WORKERS,
+        max_inflight_bytes=DEFAULT_MAX_INFLIGHT_BYTES,
+        max_rows=None,
+        csv_chunk_rows=CSV_CHUNK_SIZE,
+        load_order=None,
+) -> dict:
+    """
+    Loads input data from CSV, Parquet/Feather/Arrow, Excel and SQLite files based on a given configuration.
+
+    Files are loaded concurrently on a thread pool (parsing and decompression mostly release the GIL).
+    Besides the worker count, the total on-disk size of the files loading at once is capped.
 
     Args:
         input_files_folder (str): The folder containing input files.
         input_data_dict (dict): Dictionary defining the structure and content to be loaded.
+        max_workers (int): Number of files loaded at the same time.
+        max_inflight_bytes (int): Maximum total size of the files loading at the same time.
+        max_rows (int): Read only the first rows of every source (optional, see `--preview`).
+        csv_chunk_rows (int): Rows per chunk when filtering CSVs while reading.
+        load_order (list): File names in the order to start loading them, e.g. longest first (optional;
+            files not listed start last, in configuration order).
 
     Returns:
-        dict: Updated input_data_dict with loaded data.
-    
-    Raises:
-        FileNotFoundError: If the specified file does not exist.
-        ValueError: If an unsupported file type is encountered.
-        Exception: For any other errors during processing.
+        dict: Updated input_data_dict with loaded data and the "load_seconds" of each file.
+            A file that fails to load (missing, unsupported or unreadable) gets an "error"
+            entry instead, so only the templates reading it fail.
     """
 
     logger.info("-" * 50)
-    logger.info("Starting input data loading process...")
-
-    for file_name, data_config in input_data_dict.items():
-        file_path = Path(input_files_folder) / file_name
-        file_extension = file_path.suffix.lower()  # Normalize file extension
-
-        if not file_path.exists():
-            logger.error(f"File not found: {file_path}")
-            raise FileNotFoundError(f"File not found: {file_path}")
-
-        logger.info(f"Processing file: {file_path}")
-
-        if file_extension == '.csv':
-            logger.debug("Loading CSV data.")
-            column_names = data_config['cols']
-            df = pd.read_csv(file_path, usecols=column_names)
-            input_data_dict[file_name]["data"] = df
-
-
-        elif file_extension == '.xlsx':
-            wb = load_workbook(file_path, data_only=False)
-            logger.info(f"Opened Excel file: {file_path}")
-
-            for xl_type, xl_config in data_config.items():
-                if xl_type == "xl_sheets":
-                    for sheet_name, cols_dict in xl_config.items():
-                        logger.info(f"Loading sheet: {sheet_name}")
-                        try:
-                            data_pd = load_excel_sheet(
-                                file_path=file_path,
-                                sheet_name=sheet_name,
-                                columns_to_load=list(cols_dict.get('cols', []))
-                            )
-                            input_data_dict[file_name][xl_type][sheet_name]["data"] = data_pd
-                            logger.info(f"Loaded sheet '{sheet_name}' successfully.")
-
-                        except Exception as e:
-                            logger.error(f"Error loading sheet '{sheet_name}': {e}")
-                            raise
-
-                elif xl_type == "xl_tables":
-                    logger.debug("Processing Excel tables...")
-                    for table_name, cols_dict in xl_config.items():
-                        logger.debug(f"Searching for table: {table_name}")
-                        
-                        for sheet in wb.worksheets:
-                            if table_name in sheet.tables: # to confirm here # to confirm here # to confirm here # to confirm here
-                                table = sheet.tables[table_name]
-                                table_range = table.ref  # e.g., "A1:C10"
-
-                                if table_range:
-                                    logger.info(f"Extracting table: {table_name} from range {table_range}")
-                                    df = extract_table_from_sheet(sheet, table_range)
-
-                                    input_data_dict[file_name][xl_type][table_name]["data"] = df
-                                    logger.info(f"Table '{table_name}' loaded successfully.")
-
-        else:
-            logger.error(f"Unsupported file format: {file_extension}")
-            raise ValueError(f"Unsupported file format: {file_extension}")
-
-    logger.info("Input data loading process completed.")
+    logger.info(f"Starting input data loading process ({max_workers} workers, up to {max_inflight_bytes / 1024 ** 2:.0f} MB in flight)...")
+    if max_rows:
+        logger.info(f"👀 Preview: reading at most {max_rows:,} rows per source.")
+    load_start = time.perf_counter()
+
+    def load_timed(file_name, data_config):
+        start = time.perf_counter()
+        try:
+            load_input_file(input_files_folder, file_name, data_config, input_data_dict, max_rows=max_rows, csv_chunk_rows=csv_chunk_rows)
+            logger.info(f"✅ Loaded '{file_name}' in {time.perf_counter() - start:.2f} s.")
+        except Exception as e:
+            # Only the templates reading this file fail; the others are still rendered
+            logger.error(f"❌ Failed to load input '{file_name}' after {time.perf_counter() - start:.2f} s: {e}", exc_info=True)
+            input_data_dict[file_name]["error"] = str(e)
+        input_data_dict[file_name]["load_seconds"] = round(time.perf_counter() - start, 6)
+
+    # Each file writes only its own entry of `input_data_dict`, so files can load concurrently
+    budget = ByteBudget(max_inflight_bytes)
+    file_names = list(input_data_dict)
+    if load_order:
+        positions = {file_name: position for position, file_name in enumerate(load_order)}
+        file_names.sort(key=lambda file_name: positions.get(file_name, len(positions)))
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="load") as executor:
+        futures = []
+        for file_name in file_names:
+            data_config = input_data_dict[file_name]
+            n_bytes = get_source_size(input_files_folder, file_name)
+            budget.acquire(n_bytes)
+            future = executor.submit(load_timed, file_name, data_config)
+            future.add_done_callback(lambda _, n_bytes=n_bytes: budget.release(n_bytes))
+            futures.append(future)
+        for future in futures:
+            future.result()
+
+    logger.info(f"Input data loading process completed in {time.perf_counter() - load_start:.2f} s.")
     return input_data_dict
 
 
-def input_data_loader(input_files_folder, config):
+def input_data_loader(
+        input_files_folder,
+        config,
+        max_workers=DEFAULT_LOAD_WORKERS,
+        max_inflight_bytes=DEFAULT_MAX_INFLIGHT_BYTES,
+        max_rows=None,
+        csv_chunk_rows=CSV_CHUNK_SIZE,
+        load_order=None,
+):
     """
     Loads input data based on the configuration file.
 
@@ -244,6 +794,11 @@ def input_data_loader(input_files_folder, config):
     Parameters:
         input_files_folder (str): Path to the folder containing input files.
         config (dict): Configuration dictionary specifying data sources.
+        max_workers (int): Number of files loaded at the same time.
+        max_inflight_bytes (int): Maximum total size of the files loading at the same time.
+        max_rows (int): Read only the first rows of every source (optional, see `--preview`).
+        csv_chunk_rows (int): Rows per chunk when filtering CSVs while reading.
+        load_order (list): File names in the order to start loading them (optional, see `load_input_data`).
 
     Returns:
         dict: Dictionary containing input data.
@@ -262,17 +817,28 @@ def input_data_loader(input_files_folder, config):
         # Process tables
         logger.info("Identifying tables to source from input data")
         for _, file_info in outputs.get("tables", {}).items():
+            file_name, data_info = next(iter(file_info.items()))
+            if reads_by_byte_offset(file_name) and data_info.get("append", False):
+                logger.debug(f"Append source, new rows are read when the table is written: {file_name}")
+                continue
             files_to_load = add_file_to_load_info(file_info, files_to_load)
 
         # Process sheets
         logger.info("Identifying sheets to source from input data")
-        for _, file_info in outputs.get("sheets", {}).items():
+        for sheet_name, file_info in outputs.get("sheets", {}).items():
+            if any(isinstance(data_info, dict) and data_info.get("append") for data_info in file_info.values()):
+                raise ValueError(f"❌ Error: `append` is only supported for table targets, not sheet '{sheet_name}'.")
             files_to_load = add_file_to_load_info(file_info, files_to_load)
 
     # Load file data
     input_data_dict = load_input_data(
         input_files_folder=input_files_folder,
-        input_data_dict=files_to_load
+        input_data_dict=files_to_load,
+        max_workers=max_workers,
+        max_inflight_bytes=max_inflight_bytes,
+        max_rows=max_rows,
+        csv_chunk_rows=csv_chunk_rows,
+        load_order=load_order,
     )
 
     logger.info("")
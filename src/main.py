@@ -1,5 +1,8 @@
 import argparse
+import copy
+import json
 import os
+import sys
 import yaml
 import pandas as pd
 from datetime import datetime
@@ -10,8 +13,23 @@ from update_xlsx_data import replace_table_data, get_excel_table_details
 from load_config import config_loader
 from utils import validate_folder, validate_file, is_valid_date
 from logger_config import logger
-from load_input_data import input_data_loader
-from update_xlsx_data import add_data_to_files
+from load_input_data import input_data_loader, DEFAULT_LOAD_WORKERS, DEFAULT_MAX_INFLIGHT_BYTES, CSV_CHUNK_SIZE
+from update_xlsx_data import add_data_to_files, get_source_settings
+from shard_templates import parse_shard, select_shard_templates, write_shard_manifest, merge_manifests
+from run_plan import check_excel_row_limits
+from optimize_dtypes import optimize_input_data
+from run_metrics import RunMetrics, DEFAULT_METRICS_NAME
+from check_config import check_config
+from checkpoint import CHECKPOINT_NAME, RunCheckpoint, get_template_hashes
+from optimize_templates import optimize_templates, OPTIMIZED_TEMPLATES_FOLDER
+from cache_templates import ParsedTemplateCache, DEFAULT_TEMPLATE_CACHE_BYTES
+from tune_run import RunHistory, RUN_HISTORY_NAME, tune_run
+from render_sheets import DEFAULT_SHEET_WORKERS
+from partitioned_sources import set_metadata_cache_folder
+
+# Targets fed by the same source share its columns; copy-on-write keeps those views safe from writes
+# (the rendering functions leave the process-wide pandas options to their caller)
+pd.set_option("mode.copy_on_write", True)
 
 # 🔹 Parse Command-Line Arguments
 def parse_args():
@@ -51,10 +69,133 @@ def parse_args():
         default="inputs/settings.yaml",
         help="Path to the `settings.yaml` configuration file (default: inputs/settings.yaml)"
     )
+    parser.add_argument(
+        "-f", "--cache_formulas",
+        action="store_true",
+        help="Evaluate table-aggregate formulas (e.g. SUM(Table[Col])) and store their cached values"
+    )
+    parser.add_argument(
+        "--load_workers",
+        type=int,
+        default=None,
+        help=f"Number of input files loaded at the same time (default: tuned from run history, else {DEFAULT_LOAD_WORKERS})"
+    )
+    parser.add_argument(
+        "--max_inflight_mb",
+        type=int,
+        default=None,
+        help=f"Maximum total size in MB of the input files loading at the same time (default: tuned from run history, else {DEFAULT_MAX_INFLIGHT_BYTES // 1024 ** 2})"
+    )
+    parser.add_argument(
+        "--csv_chunk_rows",
+        type=int,
+        default=None,
+        help=f"Rows per chunk when filtering CSVs while reading (default: tuned from run history, else {CSV_CHUNK_SIZE:,})"
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Validate the configuration against input and template headers and print a cost plan, without rendering"
+    )
+    parser.add_argument(
+        "--optimize_dtypes",
+        action="store_true",
+        help="Store loaded inputs in smaller dtypes (categoricals for repeated text, downcast numbers) to save memory"
+    )
+    parser.add_argument(
+        "--metrics_path",
+        default=None,
+        help="Path (without extension) of the run metrics files written as .prom (OpenMetrics) and .json (default: <outputs_folder>/run_metrics)"
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Render only the outputs that failed or were not reached in the last run for this report date, or whose inputs changed"
+    )
+    parser.add_argument(
+        "--optimize_templates",
+        action="store_true",
+        help="Trim phantom rows/columns and unused cell formats from each template copy before rendering"
+    )
+    parser.add_argument(
+        "--template_cache_dir",
+        default=None,
+        help="Folder in which to cache parsed templates for faster warm runs; it must only be writable by you (default: no cache)"
+    )
+    parser.add_argument(
+        "--source_metadata_dir",
+        default=None,
+        help="Folder in which to keep glob-source headers and row counts across runs (default: read again every run)"
+    )
+    parser.add_argument(
+        "--template_cache_mb",
+        type=int,
+        default=DEFAULT_TEMPLATE_CACHE_BYTES // 1024 ** 2,
+        help=f"Maximum size in MB of the parsed-template cache (default: {DEFAULT_TEMPLATE_CACHE_BYTES // 1024 ** 2})"
+    )
+    parser.add_argument(
+        "--sheet_workers",
+        type=int,
+        default=None,
+        help=f"Worker processes rendering the worksheets of one template in parallel (default: tuned from run history, else {DEFAULT_SHEET_WORKERS})"
+    )
+    parser.add_argument(
+        "--preview",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Render every output from only the first N rows of each source, into <outputs_folder>/preview"
+    )
+    parser.add_argument(
+        "--shard",
+        default=None,
+        help="Render only shard i of N (e.g. 2/4), with templates balanced by estimated cost"
+    )
+
+    # Subcommands (running without a subcommand renders the reports)
+    subparsers = parser.add_subparsers(dest="command")
+    merge_parser = subparsers.add_parser(
+        "merge-manifests",
+        help="Check that every template was rendered exactly once across shard manifests"
+    )
+    merge_parser.add_argument(
+        "manifests",
+        nargs="+",
+        help="Shard manifest files, or folders containing them"
+    )
+    merge_parser.add_argument(
+        "--merged_path",
+        default=None,
+        help="Path to write the merged manifest to (optional)"
+    )
+
+    optimize_parser = subparsers.add_parser(
+        "template-optimize",
+        help="Trim phantom rows/columns and unused cell formats from templates, reporting the size and load-time reduction"
+    )
+    optimize_parser.add_argument(
+        "templates",
+        nargs="*",
+        help="Template files, or folders containing them (default: the `xlsx_templates` folder)"
+    )
+    optimize_output = optimize_parser.add_mutually_exclusive_group()
+    optimize_output.add_argument(
+        "--output_folder",
+        default=None,
+        help=f"Folder to write the optimized templates to (default: <outputs_folder>/{OPTIMIZED_TEMPLATES_FOLDER})"
+    )
+    optimize_output.add_argument(
+        "--in_place",
+        action="store_true",
+        help="Overwrite the templates themselves; anything openpyxl does not keep (e.g. images, charts) is lost"
+    )
 
     logger.debug(f"Arguments loaded")
     args = parser.parse_args()
 
+    if args.command in ("merge-manifests", "template-optimize"):
+        return args
+
     # Assign to separate variables
     input_files_folder = args.input_files_folder
     xlsx_templates_folder = args.xlsx_templates_folder
@@ -73,6 +214,20 @@ def parse_args():
         raise FileNotFoundError(f"Missing file: {config_path}")
     logger.debug(f"Checking report_date: {report_date}")
     is_valid_date(report_date)
+    if args.shard:
+        parse_shard(args.shard)
+    if any(value is not None and value < 1 for value in (args.load_workers, args.max_inflight_mb, args.csv_chunk_rows)):
+        raise ValueError("❌ Error: --load_workers, --max_inflight_mb and --csv_chunk_rows must be at least 1.")
+    if args.sheet_workers is not None and args.sheet_workers < 1:
+        raise ValueError("❌ Error: --sheet_workers must be at least 1.")
+    if args.template_cache_mb < 1:
+        raise ValueError("❌ Error: --template_cache_mb must be at least 1.")
+    if args.preview is not None:
+        if args.preview < 1:
+            raise ValueError("❌ Error: --preview must be at least 1.")
+        # Keep previews apart from the real reports (and their checkpoint and append state)
+        outputs_folder = os.path.join(outputs_folder, "preview")
+        args.outputs_folder = outputs_folder
 
     # Create Outputs folder if it doesn't exist
     if not os.path.exists(outputs_folder):
@@ -82,14 +237,40 @@ def parse_args():
     else:
         logger.info(f"✅ Folder `{outputs_folder}` already exists.")
 
+    return args
 
-    return (
-        input_files_folder,
-        xlsx_templates_folder,
-        outputs_folder,
-        report_date,
-        config_path,
-    )
+
+def disable_append(output_from_input_dict):
+    """Returns a copy of the template configuration with `append` turned off, so previews rewrite every table."""
+    output_from_input_dict = copy.deepcopy(output_from_input_dict)
+    for type_config in output_from_input_dict.values():
+        for data_source in type_config.get("tables", {}).values():
+            get_source_settings(data_source).pop("append", None)
+    return output_from_input_dict
+
+
+def run_merge_manifests(manifests, merged_path=None):
+    """
+    Merges shard manifests and exits with a non-zero status if any template
+    was not rendered exactly once.
+
+    Parameters:
+        manifests (list): Manifest files, or folders containing them.
+        merged_path (str): Path to write the merged manifest to (optional).
+    """
+    merged, problems = merge_manifests(manifests)
+
+    if merged_path:
+        with open(merged_path, "w", encoding="utf-8") as file:
+            json.dump(merged, file, indent=2)
+        logger.info(f"✅ Merged manifest written to: {merged_path}")
+
+    if problems:
+        for problem in problems:
+            logger.error(f"❌ {problem}")
+        sys.exit(1)
+
+    logger.info(f"✅ All {len(merged['all_templates'])} templates were rendered exactly once across {merged['shard_count']} shards.")
 
 
 def main():
@@ -101,19 +282,163 @@ def main():
     
     try:
         # Extract and validate arguments
-        input_files_folder, xlsx_templates_folder, outputs_folder, report_date, config_path = parse_args()
+        args = parse_args()
+
+        if args.command == "merge-manifests":
+            run_merge_manifests(args.manifests, args.merged_path)
+            return
+
+        if args.command == "template-optimize":
+            output_folder = None if args.in_place else (
+                args.output_folder or os.path.join(args.outputs_folder, OPTIMIZED_TEMPLATES_FOLDER)
+            )
+            reports = optimize_templates(args.templates or [args.xlsx_templates_folder], output_folder, args.in_place)
+            total_before = sum(report["size_before"] for report in reports)
+            total_after = sum(report["size_after"] for report in reports)
+            logger.info(f"✅ Optimized {len(reports)} templates: {total_before / 1024:,.1f} KB -> {total_after / 1024:,.1f} KB.")
+            return
+
+        if args.source_metadata_dir:
+            set_metadata_cache_folder(args.source_metadata_dir)
 
         # Load Configuration
-        config = config_loader(config_path)
+        config = config_loader(args.config_path)
+        output_from_input_dict = config['output_from_input_dict']
+
+        # Validate the configuration and estimate costs from headers only
+        if args.check:
+            problems, _ = check_config(output_from_input_dict, args.input_files_folder, args.xlsx_templates_folder)
+            if problems:
+                sys.exit(1)
+            return
+
+        # Keep only this shard's templates, so only their inputs are loaded
+        if args.shard:
+            shard_index, shard_count = parse_shard(args.shard)
+            output_from_input_dict, template_costs = select_shard_templates(
+                output_from_input_dict, args.input_files_folder, shard_index, shard_count
+            )
+            config = {**config, 'output_from_input_dict': output_from_input_dict}
+
+        if args.preview:
+            logger.info(f"👀 Preview mode: {args.preview:,} rows per source, outputs in {args.outputs_folder}")
+            output_from_input_dict = disable_append(output_from_input_dict)
+            config = {**config, 'output_from_input_dict': output_from_input_dict}
+
+        # Fingerprint each output's inputs, and with --resume skip the outputs already rendered from them
+        checkpoint_name = CHECKPOINT_NAME
+        if args.shard:
+            checkpoint_name = CHECKPOINT_NAME.replace(".json", f"_shard_{shard_index}_of_{shard_count}.json")
+        checkpoint_path = os.path.join(args.outputs_folder, checkpoint_name)
+        hash_cache = {}
+        template_hashes = {
+            template_name: get_template_hashes(
+                template_name, type_config, args.input_files_folder, args.xlsx_templates_folder, hash_cache
+            )
+            for template_name, type_config in output_from_input_dict.items()
+        }
+        if args.resume:
+            checkpoint = RunCheckpoint.load(checkpoint_path, args.report_date)
+            render_config = checkpoint.select_pending(output_from_input_dict, template_hashes)
+        else:
+            checkpoint = RunCheckpoint(checkpoint_path, args.report_date)
+            render_config = output_from_input_dict
+        for template_name in render_config:
+            checkpoint.mark(template_name, "pending", hashes=template_hashes[template_name])
+
+        # Outputs completed in an earlier attempt still count as rendered by this run
+        render_results = {
+            template_name: checkpoint.templates[template_name]["output_path"]
+            for template_name in output_from_input_dict
+            if template_name not in render_config
+        }
+        failures = {}
+        status = "failed"
+        metrics = RunMetrics(args.report_date)
+        history = RunHistory(os.path.join(args.outputs_folder, RUN_HISTORY_NAME))
+        try:
+            # Fail templates whose targets cannot fit in Excel before loading any data, and render the rest
+            row_limit_failures = {} if args.preview else check_excel_row_limits(render_config, args.input_files_folder)
+            for template_name, error in row_limit_failures.items():
+                checkpoint.mark(template_name, "failed", hashes=template_hashes.get(template_name), error=error)
+            render_config = {
+                template_name: type_config for template_name, type_config in render_config.items()
+                if template_name not in row_limit_failures
+            }
+
+            # Pick workers, chunk sizes and the longest-first order from earlier runs, unless set explicitly
+            input_names = list(dict.fromkeys(
+                next(iter(data_source))
+                for type_config in render_config.values()
+                for targets in type_config.values()
+                for data_source in targets.values()
+            ))
+            tuning = tune_run(
+                history,
+                args.input_files_folder,
+                input_names,
+                list(render_config),
+                load_workers=args.load_workers,
+                max_inflight_bytes=args.max_inflight_mb * 1024 ** 2 if args.max_inflight_mb else None,
+                csv_chunk_rows=args.csv_chunk_rows,
+                sheet_workers=args.sheet_workers,
+            )
+
+            # Load input data
+            input_data_dict = input_data_loader(
+                args.input_files_folder,
+                {**config, 'output_from_input_dict': render_config},
+                max_workers=tuning["load_workers"],
+                max_inflight_bytes=tuning["max_inflight_bytes"],
+                max_rows=args.preview,
+                csv_chunk_rows=tuning["csv_chunk_rows"],
+                load_order=tuning["input_order"],
+            )
+            if args.optimize_dtypes:
+                input_data_dict = optimize_input_data(input_data_dict)
+            metrics.record_inputs(args.input_files_folder, input_data_dict)
+
+            # Add data to output excel files
+            template_cache = None
+            if args.template_cache_dir:
+                template_cache = ParsedTemplateCache(args.template_cache_dir, args.template_cache_mb * 1024 ** 2)
+            new_results, failures = add_data_to_files(
+                render_config,
+                input_data_dict,
+                args.xlsx_templates_folder,
+                args.outputs_folder,
+                args.report_date,
+                args.cache_formulas,
+                metrics,
+                checkpoint,
+                template_hashes,
+                args.input_files_folder,
+                args.optimize_templates,
+                template_cache,
+                tuning["sheet_workers"],
+            )
+            render_results.update(new_results)
+            failures = {**row_limit_failures, **failures}
+            status = "failed" if failures else "success"
 
-        # Load input data
-        input_data_dict = input_data_loader(input_files_folder, config)
+        finally:
+            metrics.finish(status)
+            metrics.write(args.metrics_path or os.path.join(args.outputs_folder, DEFAULT_METRICS_NAME))
+            history.record(metrics)
+            history.save()
+            if args.shard:
+                write_shard_manifest(
+                    args.outputs_folder, shard_index, shard_count, template_costs,
+                    output_from_input_dict, render_results, status, args.report_date,
+                )
 
-        # Add data to output excel files
-        add_data_to_files(config['output_from_input_dict'], input_data_dict, xlsx_templates_folder, outputs_folder, report_date)
+        if failures:
+            logger.error(f"❌ Run finished with failed outputs; rerun with --resume to render only those: {list(failures)}")
+            sys.exit(1)
 
     except Exception as e:
         logger.error(f"❌ An error occurred: {e}", exc_info=True)
+        sys.exit(1)  # Same status as the run metrics, so schedulers see the failure
 
 # 🔹 Run the script
 if __name__ == "__main__":
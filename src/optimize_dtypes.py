@@ -0,0 +1,117 @@
+import numpy as np
+import pandas as pd
+from logger_config import logger
+
+# Constants
+CATEGORY_MAX_UNIQUE_RATIO = 0.5  # Text columns with at most this share of distinct values become categoricals
+
+
+def optimize_column_dtype(series: pd.Series, max_unique_ratio=CATEGORY_MAX_UNIQUE_RATIO) -> pd.Series:
+    """
+    Returns a column in a smaller dtype that holds exactly the same values.
+
+    - Text columns with few distinct values become categoricals.
+    - Integer columns are downcast to the smallest integer type that fits.
+    - Float columns become float32 only if every value survives the round trip unchanged.
+
+    Parameters:
+        series (pd.Series): Column to optimize.
+        max_unique_ratio (float): Maximum share of distinct values for a text column to become categorical.
+
+    Returns:
+        pd.Series: The optimized column, or the original column if no smaller dtype is lossless.
+    """
+    if series.dtype == object:
+        if len(series) == 0 or pd.api.types.infer_dtype(series, skipna=True) != "string":
+            return series
+        if series.nunique(dropna=True) > max_unique_ratio * len(series):
+            return series
+        return series.astype("category")
+
+    if pd.api.types.is_bool_dtype(series.dtype) or not isinstance(series.dtype, np.dtype):
+        return series  # Booleans and nullable extension types are left as they are
+
+    if pd.api.types.is_integer_dtype(series.dtype):
+        return pd.to_numeric(series, downcast="integer")
+
+    if series.dtype == np.float64:
+        downcast = series.astype(np.float32)
+        if np.array_equal(downcast.to_numpy(dtype=np.float64), series.to_numpy(), equal_nan=True):
+            return downcast
+
+    return series
+
+
+def optimize_frame_dtypes(df: pd.DataFrame, max_unique_ratio=CATEGORY_MAX_UNIQUE_RATIO) -> pd.DataFrame:
+    """
+    Optimizes the dtype of every column of a DataFrame (see `optimize_column_dtype`).
+
+    Parameters:
+        df (pd.DataFrame): Loaded input data.
+        max_unique_ratio (float): Maximum share of distinct values for a text column to become categorical.
+
+    Returns:
+        pd.DataFrame: DataFrame with the same values in smaller dtypes.
+    """
+    return pd.DataFrame(
+        {col: optimize_column_dtype(df[col], max_unique_ratio) for col in df.columns},
+        index=df.index,
+    )
+
+
+def iter_loaded_frames(input_data_dict):
+    """
+    Yields every loaded DataFrame in `input_data_dict`, with a label and the dictionary holding it.
+
+    Returns:
+        generator: (label, holder) pairs, where `holder["data"]` is the DataFrame.
+    """
+    for file_name, data_config in input_data_dict.items():
+        if isinstance(data_config.get("data"), pd.DataFrame):
+            yield file_name, data_config
+
+        for group_name, group in data_config.items():
+            if group_name in ("data", "cols", "types", "full") or not isinstance(group, dict):
+                continue
+            for source_name, source_config in group.items():
+                if isinstance(source_config, dict) and isinstance(source_config.get("data"), pd.DataFrame):
+                    label = source_config.get("table") or source_config.get("query") or source_name
+                    if group_name == "queries":
+                        label = "filtered query"
+                    yield f"{file_name} [{label}]", source_config
+
+
+def optimize_input_data(input_data_dict, max_unique_ratio=CATEGORY_MAX_UNIQUE_RATIO):
+    """
+    Replaces every loaded DataFrame with a memory-optimized copy and logs the memory saved per source.
+
+    Parameters:
+        input_data_dict (dict): Loaded input data (see `input_data_loader`).
+        max_unique_ratio (float): Maximum share of distinct values for a text column to become categorical.
+
+    Returns:
+        dict: The same `input_data_dict`, with optimized DataFrames.
+    """
+    for _ in range(2): logger.info("")
+    logger.info("-" * 50)
+    logger.info("🗜️ OPTIMIZING INPUT DATA TYPES")
+    logger.info("-" * 50)
+
+    total_before, total_after = 0, 0
+    for label, holder in iter_loaded_frames(input_data_dict):
+        df = holder["data"]
+        bytes_before = int(df.memory_usage(index=True, deep=True).sum())
+
+        holder["data"] = optimize_frame_dtypes(df, max_unique_ratio)
+        bytes_after = int(holder["data"].memory_usage(index=True, deep=True).sum())
+
+        changed = [f"{col}: {df[col].dtype} -> {holder['data'][col].dtype}" for col in df.columns if df[col].dtype != holder["data"][col].dtype]
+        logger.info(f"{label}: {bytes_before / 1024 ** 2:.2f} MB -> {bytes_after / 1024 ** 2:.2f} MB ({changed or 'unchanged'})")
+
+        total_before += bytes_before
+        total_after += bytes_after
+
+    logger.info(f"✅ Input data memory: {total_before / 1024 ** 2:.2f} MB -> {total_after / 1024 ** 2:.2f} MB "
+                f"(saved {(total_before - total_after) / 1024 ** 2:.2f} MB)")
+
+    return input_data_dict
@@ -0,0 +1,210 @@
+import os
+import time
+from openpyxl import load_workbook
+from openpyxl.utils import range_boundaries, column_index_from_string
+from openpyxl.utils.indexed_list import IndexedList
+from logger_config import logger
+
+# Constants
+OPTIMIZED_TEMPLATES_FOLDER = "optimized_templates"  # Default output folder of `template-optimize`, in the outputs folder
+
+
+def get_used_extent(ws):
+    """
+    Returns the last row and column a worksheet really uses: cells with values, tables and merged cells.
+    Cells that only carry formatting (e.g. a format applied to whole rows or columns) do not count.
+
+    Returns:
+        tuple: (max_row, max_col), (0, 0) for an empty sheet.
+    """
+    max_row, max_col = 0, 0
+    for (row, col), cell in ws._cells.items():
+        if cell.value is not None:
+            max_row, max_col = max(max_row, row), max(max_col, col)
+
+    ranges = [table.ref for table in ws.tables.values()] + [str(merged) for merged in ws.merged_cells.ranges]
+    for cell_range in ranges:
+        _, _, range_max_col, range_max_row = range_boundaries(cell_range)
+        max_row, max_col = max(max_row, range_max_row), max(max_col, range_max_col)
+
+    return max_row, max_col
+
+
+def has_layout(dimension) -> bool:
+    """Returns whether a row or column dimension sets a height or width, hides or groups, rather than only a format."""
+    return bool(
+        getattr(dimension, "customHeight", False) or getattr(dimension, "customWidth", False)
+        or dimension.hidden or dimension.outlineLevel
+    )
+
+
+def trim_phantom_cells(ws):
+    """
+    Removes formatted-but-empty cells, and row and column formats, beyond the used extent, so
+    `max_row`/`max_column` (and the saved dimension record) reflect the real content.
+
+    Rows and columns with a custom height or width, hidden or grouped are layout and are kept.
+
+    Returns:
+        dict: max_row/max_column before and after trimming.
+    """
+    before = {"max_row": ws.max_row, "max_column": ws.max_column}
+    max_row, max_col = get_used_extent(ws)
+
+    for key in [key for key in ws._cells if key[0] > max_row or key[1] > max_col]:
+        del ws._cells[key]
+
+    for row_idx in [row_idx for row_idx in ws.row_dimensions if row_idx > max_row]:
+        if not has_layout(ws.row_dimensions[row_idx]):
+            del ws.row_dimensions[row_idx]
+
+    for letter in list(ws.column_dimensions):
+        dimension = ws.column_dimensions[letter]
+        if has_layout(dimension):
+            continue
+        if column_index_from_string(letter) > max_col:
+            del ws.column_dimensions[letter]
+        elif dimension.max and dimension.max > max_col:
+            dimension.max = max(max_col, dimension.min or 1)  # Formats spanning to the last column
+
+    return {**before, "trimmed_max_row": ws.max_row, "trimmed_max_column": ws.max_column}
+
+
+def trim_unused_styles(wb):
+    """
+    Drops cell formats (`cellXfs`) that no cell, row or column uses any more.
+
+    Returns:
+        tuple: (formats_before, formats_after)
+    """
+    formats_before = len(wb._cell_styles)
+
+    used = IndexedList()
+    used.add(wb._cell_styles[0])  # The default format must stay first
+    for ws in wb.worksheets:
+        for cell in ws._cells.values():
+            used.add(cell._style)
+        for dimension in list(ws.row_dimensions.values()) + list(ws.column_dimensions.values()):
+            if dimension.has_style:
+                used.add(dimension._style)
+
+    wb._cell_styles = used
+    return formats_before, len(used)
+
+
+def optimize_workbook(wb):
+    """
+    Trims phantom rows and columns on every worksheet and drops unused cell formats.
+    The dimension record is recalculated from the remaining cells when the workbook is saved.
+
+    Parameters:
+        wb (openpyxl.Workbook): Loaded workbook, changed in place.
+
+    Returns:
+        dict: {"sheets": {title: extents before/after}, "formats_before": int, "formats_after": int}
+    """
+    sheets = {ws.title: trim_phantom_cells(ws) for ws in wb.worksheets}
+    formats_before, formats_after = trim_unused_styles(wb)
+
+    for title, extent in sheets.items():
+        if (extent["max_row"], extent["max_column"]) != (extent["trimmed_max_row"], extent["trimmed_max_column"]):
+            logger.info(
+                f"Trimmed sheet '{title}' from {extent['max_row']:,} x {extent['max_column']:,} "
+                f"to {extent['trimmed_max_row']:,} x {extent['trimmed_max_column']:,} (rows x columns)."
+            )
+    if formats_after != formats_before:
+        logger.info(f"Dropped {formats_before - formats_after:,} unused cell formats ({formats_before:,} -> {formats_after:,}).")
+
+    return {"sheets": sheets, "formats_before": formats_before, "formats_after": formats_after}
+
+
+def time_workbook_load(file_path):
+    """Returns the seconds needed to load a workbook, as the renderer does."""
+    start = time.perf_counter()
+    wb = load_workbook(file_path)
+    seconds = time.perf_counter() - start
+    wb.close()
+    return seconds
+
+
+def optimize_template_file(template_path, output_path):
+    """
+    Optimizes a template file and reports the size and load-time reduction.
+
+    Parameters:
+        template_path (str): Path to the template.
+        output_path (str): Where to save the optimized template. Pass `template_path` to overwrite the
+            template: anything openpyxl does not keep (e.g. images, charts, slicers) is then lost from it.
+
+    Returns:
+        dict: Size and load time before and after, plus the details from `optimize_workbook`.
+    """
+    size_before = os.path.getsize(template_path)
+    load_before = time_workbook_load(template_path)
+
+    wb = load_workbook(template_path)
+    details = optimize_workbook(wb)
+    tmp_path = f"{output_path}.tmp"
+    wb.save(tmp_path)
+    os.replace(tmp_path, output_path)
+
+    report = {
+        "template": os.path.basename(template_path),
+        "output_path": output_path,
+        "size_before": size_before,
+        "size_after": os.path.getsize(output_path),
+        "load_seconds_before": round(load_before, 3),
+        "load_seconds_after": round(time_workbook_load(output_path), 3),
+        **details,
+    }
+    logger.info(
+        f"✅ {report['template']}: {report['size_before'] / 1024:,.1f} KB -> {report['size_after'] / 1024:,.1f} KB, "
+        f"load {report['load_seconds_before']:.3f} s -> {report['load_seconds_after']:.3f} s"
+    )
+    return report
+
+
+def optimize_templates(template_paths, output_folder=None, in_place=False):
+    """
+    Optimizes several templates (files or folders of `.xlsx` files).
+
+    Parameters:
+        template_paths (list): Template files, or folders containing them.
+        output_folder (str): Folder to write the optimized templates to.
+        in_place (bool): Overwrite the templates instead (see `optimize_template_file`).
+
+    Returns:
+        list[dict]: One report per template (see `optimize_template_file`).
+
+    Raises:
+        ValueError: Unless exactly one of `output_folder` and `in_place` is given.
+    """
+    if bool(output_folder) == bool(in_place):
+        raise ValueError("❌ Error: Give either an output folder for the optimized templates or in_place=True.")
+
+    for _ in range(2): logger.info("")
+    logger.info("-" * 50)
+    logger.info("🧹 OPTIMIZING TEMPLATES")
+    logger.info("-" * 50)
+
+    files = []
+    for path in template_paths:
+        if os.path.isdir(path):
+            files.extend(sorted(
+                os.path.join(path, name) for name in os.listdir(path)
+                if name.lower().endswith(".xlsx") and not name.startswith("~$")
+            ))
+        else:
+            files.append(path)
+
+    if output_folder:
+        os.makedirs(output_folder, exist_ok=True)
+
+    reports = []
+    for file_path in files:
+        output_path = file_path if in_place else os.path.join(output_folder, os.path.basename(file_path))
+        if not in_place and os.path.abspath(output_path) == os.path.abspath(file_path):
+            raise ValueError(f"❌ Error: {file_path} would be overwritten; use --in_place to overwrite templates.")
+        reports.append(optimize_template_file(file_path, output_path))
+
+    return reports
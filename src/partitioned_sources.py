@@ -0,0 +1,155 @@
+import os
+import glob
+import json
+import hashlib
+import threading
+from pathlib import Path, PurePosixPath
+from logger_config import logger
+from utils import get_file_extension, is_glob_source
+
+# Constants
+METADATA_CACHE_PREFIX = "source_metadata"
+
+
+def expand_source_files(input_files_folder, pattern) -> list:
+    """
+    Lists the files a glob source matches, relative to the input folder and in sorted order.
+    `**` matches any number of directories, e.g. `sales/**/*.csv` reads a whole directory tree.
+
+    Raises:
+        FileNotFoundError: If no file matches.
+    """
+    matches = glob.glob(os.path.join(input_files_folder, pattern), recursive=True)
+    files = sorted(
+        Path(path).relative_to(input_files_folder).as_posix()
+        for path in matches
+        if os.path.isfile(path) and get_file_extension(path) == get_file_extension(pattern)
+    )
+    if not files:
+        raise FileNotFoundError(f"No input files match '{pattern}' in {input_files_folder}")
+    return files
+
+
+def get_partition_value(pattern, relative_path) -> str:
+    """
+    Returns the path component of a matched file that the first wildcard of the pattern stands for.
+
+    - `sales/2026-*/part-*.csv` and `sales/2026-01-31/part-0.csv` give `2026-01-31`.
+    - `branches/*.csv.gz` and `branches/north.csv.gz` give `north` (the file name without its extensions).
+    """
+    pattern_parts = PurePosixPath(pattern).parts
+    path_parts = PurePosixPath(relative_path).parts
+    index = next(i for i, part in enumerate(pattern_parts) if is_glob_source(part))
+
+    if pattern_parts[index] == "**" or index >= len(path_parts) - 1:
+        # A wildcard in the file name, or a recursive match: use the file name without extensions
+        name = path_parts[-1]
+        return name[:len(name) - len("".join(PurePosixPath(name).suffixes))] or name
+    return path_parts[index]
+
+
+def get_source_size(input_files_folder, file_name) -> int:
+    """Returns the total size in bytes of a source's files (0 if none exist)."""
+    if is_glob_source(file_name):
+        try:
+            files = expand_source_files(input_files_folder, file_name)
+        except FileNotFoundError:
+            return 0
+        return sum(os.path.getsize(os.path.join(input_files_folder, path)) for path in files)
+
+    file_path = os.path.join(input_files_folder, file_name)
+    return os.path.getsize(file_path) if os.path.exists(file_path) else 0
+
+
+class SourceMetadataCache:
+    """
+    Caches metadata read from input files (header columns, row counts), so files of a glob source are
+    read once per run by `--check`, the row-limit check and sharding.
+
+    With a `cache_folder`, the cache is also kept across runs in a JSON file in that folder, named after
+    the input folder, so files that did not change since the last run are not read again. Nothing is
+    written into the input folder.
+
+    An entry is reused only while the file's size and modification time are unchanged.
+    """
+
+    def __init__(self, input_files_folder, cache_folder=None):
+        self.cache_path = None
+        if cache_folder is not None:
+            folder_hash = hashlib.sha256(os.path.abspath(input_files_folder).encode("utf-8")).hexdigest()[:16]
+            self.cache_path = os.path.join(cache_folder, f"{METADATA_CACHE_PREFIX}-{folder_hash}.json")
+        self.input_files_folder = input_files_folder
+        self.entries = {}
+        self.changed = False
+        self._lock = threading.Lock()
+
+        if self.cache_path is not None and os.path.exists(self.cache_path):
+            try:
+                with open(self.cache_path, "r", encoding="utf-8") as file:
+                    self.entries = json.load(file)
+            except (OSError, ValueError) as e:
+                logger.warning(f"⚠️ Ignoring unreadable metadata cache {self.cache_path}: {e}")
+
+    def get(self, relative_path, key, compute):
+        """
+        Returns a cached metadata value of a file, or computes and caches it.
+
+        Parameters:
+            relative_path (str): Path of the file relative to the input folder.
+            key (str): Name of the metadata value, e.g. "columns" or "rows".
+            compute (callable): Called with the file's full path when the value is not cached.
+        """
+        file_path = os.path.join(self.input_files_folder, relative_path)
+        stat = os.stat(file_path)
+        signature = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+        with self._lock:
+            entry = self.entries.get(relative_path)
+            if entry is not None and entry["signature"] == signature and key in entry["values"]:
+                return entry["values"][key]
+
+        value = compute(Path(file_path))
+        with self._lock:
+            entry = self.entries.get(relative_path)
+            if entry is None or entry["signature"] != signature:
+                entry = self.entries[relative_path] = {"signature": signature, "values": {}}
+            entry["values"][key] = value
+            self.changed = True
+        return value
+
+    def save(self):
+        """Writes the cache if it is kept across runs and changed; a read-only cache folder only costs the cache."""
+        with self._lock:
+            if self.cache_path is None or not self.changed:
+                return
+            try:
+                os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+                tmp_path = f"{self.cache_path}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as file:
+                    json.dump(self.entries, file, indent=2)
+                os.replace(tmp_path, self.cache_path)
+                self.changed = False
+            except OSError as e:
+                logger.warning(f"⚠️ Could not write metadata cache {self.cache_path}: {e}")
+
+
+_metadata_caches = {}
+_metadata_caches_lock = threading.Lock()
+_metadata_cache_folder = None
+
+
+def set_metadata_cache_folder(cache_folder):
+    """Keeps source metadata across runs in `cache_folder` (None: only for the current run)."""
+    global _metadata_cache_folder
+    with _metadata_caches_lock:
+        _metadata_cache_folder = cache_folder
+        _metadata_caches.clear()
+
+
+def get_metadata_cache(input_files_folder) -> SourceMetadataCache:
+    """Returns the metadata cache of an input folder, shared by the whole run."""
+    key = os.path.abspath(input_files_folder)
+    with _metadata_caches_lock:
+        if key not in _metadata_caches:
+            _metadata_caches[key] = SourceMetadataCache(input_files_folder, _metadata_cache_folder)
+        return _metadata_caches[key]
@@ -0,0 +1,172 @@
+import io
+import re
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from openpyxl.styles.cell_style import StyleArray
+from openpyxl.styles.numbers import BUILTIN_FORMATS_MAX_SIZE
+from logger_config import logger
+from cache_templates import dump_workbook_state, load_workbook_state
+from xlsx_package import get_sheet_part_names, get_related_part_names, rewrite_package_parts
+
+# Constants
+DEFAULT_SHEET_WORKERS = 1
+
+# Style collections a worker may only read: cells written by the renderer reuse existing fonts, fills...
+# and only add cell formats and number formats, which are merged back into the parent workbook
+SHARED_STYLE_COLLECTIONS = ("_fonts", "_fills", "_borders", "_alignments", "_protections", "_named_styles")
+
+# Style ids as written by openpyxl, e.g. <c r="A2" s="3">, <row r="2" s="3" customFormat="1"> and <col style="3">
+STYLE_ID_PATTERN = re.compile(rb'(<(?:c|row)\s[^>]*?\bs="|<col\s[^>]*?\bstyle=")(\d+)"')
+
+
+def get_style_collection_sizes(wb) -> dict:
+    """Returns the number of entries in each style collection that sheet workers must not extend."""
+    sizes = {name: len(getattr(wb, name)) for name in SHARED_STYLE_COLLECTIONS}
+    sizes["_differential_styles"] = len(wb._differential_styles.dxf)  # Conditional formats
+    return sizes
+
+
+def _render_sheet(workbook_state, sheet_name, targets):
+    """
+    Worker: writes the targets of one worksheet into a restored copy of the template and returns the
+    XML parts of that worksheet (the sheet, its relationships and its tables) with the cell formats they use.
+    """
+    # Imported here, as update_xlsx_data imports this module
+    from update_xlsx_data import write_target_data
+
+    wb, table_details = load_workbook_state(workbook_state)
+
+    target_results = []
+    for output_type, target_name, input_data, source_settings in targets:
+        target_start = time.perf_counter()
+        wb, table_details = write_target_data(wb, table_details, output_type, target_name, input_data, source_settings)
+        if output_type == "tables":
+            table_row = table_details.loc[table_details["table_name"] == target_name].iloc[0]
+            n_cols = table_row["end_col_number"] - table_row["start_col_number"] + 1
+            target_results.append(("table", target_name, time.perf_counter() - target_start, len(input_data), n_cols))
+        else:
+            target_results.append(("sheet", target_name, time.perf_counter() - target_start, len(input_data), len(input_data.columns)))
+
+    # Every worker saves the same package structure, so part names, table numbers and relationship ids
+    # match the parent's; only this sheet's parts are kept
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    with zipfile.ZipFile(buffer) as zf:
+        sheet_part_name = get_sheet_part_names(zf)[sheet_name]
+        rels_part_name, related_part_names = get_related_part_names(zf, sheet_part_name)
+        parts = {part_name: zf.read(part_name) for part_name in [sheet_part_name, *related_part_names]}
+        rels = zf.read(rels_part_name) if rels_part_name else None
+
+    return {
+        "sheet_part_name": sheet_part_name,
+        "parts": parts,
+        "rels_part_name": rels_part_name,
+        "rels": rels,
+        "cell_styles": [style.tolist() for style in wb._cell_styles],
+        "number_formats": list(wb._number_formats),
+        "style_collection_sizes": get_style_collection_sizes(wb),
+        "targets": target_results,
+    }
+
+
+def merge_cell_styles(wb, cell_styles, number_formats) -> dict:
+    """
+    Adds the cell formats used by a worker's copy of the workbook to `wb`.
+
+    Parameters:
+        wb (Workbook): Parent workbook, from which the worker's copy was restored.
+        cell_styles (list): The worker's cell formats, as lists of StyleArray values, in style id order.
+        number_formats (list): The worker's custom number formats, in order (ids from 164).
+
+    Returns:
+        dict: {worker style id: style id in wb}
+    """
+    style_ids = {}
+    for worker_style_id, values in enumerate(cell_styles):
+        style = StyleArray(values)
+        if style.numFmtId >= BUILTIN_FORMATS_MAX_SIZE:
+            number_format = number_formats[style.numFmtId - BUILTIN_FORMATS_MAX_SIZE]
+            style.numFmtId = wb._number_formats.add(number_format) + BUILTIN_FORMATS_MAX_SIZE
+        style_ids[worker_style_id] = wb._cell_styles.add(style)
+    return style_ids
+
+
+def remap_style_ids(sheet_xml: bytes, style_ids: dict) -> bytes:
+    """Renumbers the style ids of the cells, rows and columns of a worksheet part; ids not in `style_ids` are kept."""
+    if all(worker_style_id == style_id for worker_style_id, style_id in style_ids.items()):
+        return sheet_xml
+
+    def remap(match):
+        style_id = style_ids.get(int(match.group(2)), int(match.group(2)))
+        return match.group(1) + str(style_id).encode("ascii") + b'"'
+
+    return STYLE_ID_PATTERN.sub(remap, sheet_xml)
+
+
+def render_sheets_in_parallel(wb, table_details, targets_by_sheet, output_path, sheet_workers=DEFAULT_SHEET_WORKERS) -> list:
+    """
+    Renders the worksheets of one template in worker processes and combines them into one package.
+
+    Each worker restores its own copy of the template, writes the targets of one worksheet into it and
+    returns that worksheet's XML parts. The parent merges the cell formats the workers used into `wb`, so
+    every part shares one styles part, saves `wb` once and swaps in the workers' parts. openpyxl writes
+    strings inline, so there is no shared-strings table to merge.
+
+    Parameters:
+        wb (Workbook): Template workbook; it is saved to `output_path` with the rendered sheets.
+        table_details (pd.DataFrame): Table layout of `wb`.
+        targets_by_sheet (dict): {sheet_name: [(output_type, target_name, input_data, source_settings)]}
+        output_path (str): Path of the output file.
+        sheet_workers (int): Maximum number of worker processes.
+
+    Returns:
+        list: (target_type, target_name, duration_seconds, rows, columns) for every target written.
+
+    Raises:
+        ValueError: If a worker changed style collections or relationships that cannot be merged.
+    """
+    n_workers = min(sheet_workers, len(targets_by_sheet))
+    logger.info(f"Rendering {len(targets_by_sheet)} sheets with {n_workers} worker processes: {list(targets_by_sheet)}")
+
+    workbook_state = dump_workbook_state((wb, table_details))
+    style_collection_sizes = get_style_collection_sizes(wb)
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        futures = {
+            sheet_name: executor.submit(_render_sheet, workbook_state, sheet_name, targets)
+            for sheet_name, targets in targets_by_sheet.items()
+        }
+        results = {sheet_name: future.result() for sheet_name, future in futures.items()}
+
+    part_rewriters = {}
+    target_results = []
+    for sheet_name, result in results.items():
+        if result["style_collection_sizes"] != style_collection_sizes:
+            raise ValueError(f"❌ Error: Rendering sheet '{sheet_name}' added fonts, fills or borders that cannot be merged.")
+
+        style_ids = merge_cell_styles(wb, result["cell_styles"], result["number_formats"])
+        for part_name, data in result["parts"].items():
+            if part_name in part_rewriters:
+                raise ValueError(f"❌ Error: Package part {part_name} is shared by more than one rendered sheet.")
+            if part_name == result["sheet_part_name"]:
+                data = remap_style_ids(data, style_ids)
+            part_rewriters[part_name] = lambda _, data=data: data
+
+        if result["rels_part_name"] is not None:
+            part_rewriters[result["rels_part_name"]] = _make_rels_check(sheet_name, result["rels"])
+        target_results.extend(result["targets"])
+
+    wb.save(output_path)
+    rewrite_package_parts(output_path, part_rewriters)
+    logger.info(f"✅ Combined {len(results)} rendered sheets into {output_path}")
+
+    return target_results
+
+
+def _make_rels_check(sheet_name, worker_rels):
+    def check(data):
+        if data != worker_rels:
+            raise ValueError(f"❌ Error: The relationships of sheet '{sheet_name}' differ between its worker and the combined workbook.")
+        return data
+
+    return check
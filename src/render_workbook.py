@@ -0,0 +1,129 @@
+import io
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from openpyxl import load_workbook
+from logger_config import logger
+from evaluate_formulas import TableFormulaEvaluator, evaluate_workbook_formulas
+from xlsx_package import set_cached_formula_values
+from update_xlsx_data import get_workbook_table_details, write_target_data
+from optimize_templates import optimize_workbook
+from cache_templates import dump_workbook_state, load_workbook_state
+
+# Constants
+MAX_CACHED_TEMPLATES = 16
+
+
+class TemplateCache:
+    """
+    Thread-safe, size-bounded cache of templates keyed by the SHA-256 of their content.
+
+    Each entry holds the parsed workbook, serialised, and its validated table layout, so repeated renders
+    skip parsing the template and validating the tables. Every render restores its own copy of the
+    workbook (see `cache_templates.dump_workbook_state`), as workbooks are mutated while rendering.
+    """
+
+    def __init__(self, max_templates=MAX_CACHED_TEMPLATES):
+        self.max_templates = max_templates
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, template):
+        """
+        Returns the cached (workbook_state, table_details) for a template path or bytes, loading it if needed.
+        """
+        if isinstance(template, (str, os.PathLike)):
+            with open(template, "rb") as file:
+                template = file.read()
+        elif not isinstance(template, (bytes, bytearray)):
+            raise ValueError("❌ Error: `template` must be a path or the bytes of an xlsx file.")
+
+        key = hashlib.sha256(template).hexdigest()
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+        # Parse outside the lock; two threads racing on a new template both parse it, with the same result
+        wb = load_workbook(io.BytesIO(template), data_only=False)
+        entry = (dump_workbook_state(wb), get_workbook_table_details(wb))
+
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_templates:
+                self._entries.popitem(last=False)
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_template_cache = TemplateCache()
+
+
+def render_workbook(template, targets, stream=None, cache_formulas=False, optimize_template=False, template_cache=None):
+    """
+    Renders a template in memory from DataFrames, without writing to the filesystem.
+
+    Safe to call from several threads at once: every call renders its own copy of the template.
+    The DataFrames are read without being copied and are never modified. The pandas options are left
+    as they are: callers that modify the DataFrames while the workbook renders, in another thread,
+    should enable copy-on-write themselves (`pd.set_option("mode.copy_on_write", True)`).
+
+    Parameters:
+        template (str | bytes): Path to the template, or its bytes.
+        targets (dict): {"tables": {table_name: target}, "sheets": {sheet_name: target}}, where a target is
+            either a DataFrame whose column names are the output column names, or a dictionary with the
+            DataFrame under "data" and any of `column_types`, `date_format`, `date_input_format` and `spill`
+            (see `inputs/settings_yaml.md`).
+        stream (BinaryIO): Writable binary stream to write the workbook to (optional).
+        cache_formulas (bool): Store cached values for table-aggregate formulas (see `--cache_formulas`).
+        optimize_template (bool): Trim phantom rows/columns and unused formats first (see `optimize_workbook`).
+        template_cache (TemplateCache): Cache to use (default: a cache shared by the process).
+
+    Returns:
+        bytes | None: The rendered workbook, or None when it was written to `stream`.
+
+    Raises:
+        ValueError: If a target does not exist or its data does not fit the template.
+    """
+    template_cache = _template_cache if template_cache is None else template_cache
+    workbook_state, table_details = template_cache.get(template)
+
+    wb = load_workbook_state(workbook_state)
+    table_details = table_details.copy()
+    if optimize_template:
+        optimize_workbook(wb)
+    formula_evaluator = TableFormulaEvaluator() if cache_formulas else None
+
+    for output_type, output_targets in targets.items():
+        for target_name, target in output_targets.items():
+            if isinstance(target, dict):
+                input_data = target["data"]
+                source_settings = {key: value for key, value in target.items() if key != "data"}
+            else:
+                input_data, source_settings = target, {}
+
+            wb, table_details = write_target_data(
+                wb, table_details, output_type, target_name, input_data, source_settings,
+                formula_evaluator=formula_evaluator,
+            )
+
+    cached_values = {}
+    if formula_evaluator is not None:
+        cached_values, all_evaluated = evaluate_workbook_formulas(wb, formula_evaluator)
+        if all_evaluated:
+            wb.calculation.fullCalcOnLoad = False
+
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    set_cached_formula_values(buffer, cached_values)
+    logger.info(f"✅ Rendered workbook in memory ({len(buffer.getvalue()):,} bytes).")
+
+    if stream is None:
+        return buffer.getvalue()
+    stream.write(buffer.getvalue())
+    return None
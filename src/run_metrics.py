@@ -0,0 +1,192 @@
+import os
+import sys
+import json
+import time
+from datetime import datetime
+from logger_config import logger
+from utils import is_glob_source
+from partitioned_sources import get_source_size
+from optimize_dtypes import iter_loaded_frames
+
+# Constants
+METRICS_PREFIX = "xlsx_report"
+DEFAULT_METRICS_NAME = "run_metrics"
+
+
+def get_peak_rss_bytes():
+    """Returns the peak resident set size of this process in bytes, or None where it is not available (Windows)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024  # Linux reports kilobytes
+
+
+def _escape_label_value(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_sample(name, labels, value) -> str:
+    label_text = ",".join(f'{key}="{_escape_label_value(val)}"' for key, val in labels.items())
+    return f"{name}{{{label_text}}} {value}"
+
+
+class RunMetrics:
+    """
+    Collects operational metrics for one run and writes them as OpenMetrics text and JSON.
+
+    - Run: wall time, exit status and peak RSS.
+    - Inputs: bytes read, load time, rows and in-memory size per input file.
+    - Templates: wall time, rows and cells written, output size and the peak RSS reached by its end.
+    - Targets (tables and sheets): wall time, rows and cells written.
+
+    Every sample is labelled with the report date, plus the template and table where relevant.
+    """
+
+    def __init__(self, report_date):
+        self.report_date = report_date
+        self.started_at = datetime.now()
+        self.start_time = time.perf_counter()
+        self.status = "running"
+        self.duration_seconds = None
+        self.peak_rss_bytes = None
+        self.inputs = {}
+        self.templates = {}
+        self.targets = []
+
+    def record_inputs(self, input_files_folder, input_data_dict):
+        """Records the size, load time, rows and in-memory size of every input file that was loaded."""
+        for file_name, data_config in input_data_dict.items():
+            file_path = os.path.join(input_files_folder, file_name)
+            exists = is_glob_source(file_name) or os.path.exists(file_path)
+            frames = [holder["data"] for _, holder in iter_loaded_frames({file_name: data_config})]
+            self.inputs[file_name] = {
+                "bytes_read": get_source_size(input_files_folder, file_name) if exists else None,
+                "load_seconds": data_config.get("load_seconds"),
+                "rows_loaded": sum(len(df) for df in frames) if frames else None,
+                "memory_bytes": sum(int(df.memory_usage(index=True, deep=True).sum()) for df in frames) if frames else None,
+                "error": data_config.get("error"),
+            }
+
+    def record_target(self, template_name, target_type, target_name, duration_seconds, rows, columns):
+        """Records a table or sheet written into a template."""
+        self.targets.append({
+            "template": template_name,
+            "target_type": target_type,
+            "table": target_name,
+            "duration_seconds": round(duration_seconds, 6),
+            "rows_written": int(rows),
+            "cells_written": int(rows) * int(columns),
+        })
+
+    def record_template(self, template_name, duration_seconds, output_path):
+        """Records a rendered template, totalling the rows and cells of its targets."""
+        targets = [target for target in self.targets if target["template"] == template_name]
+        self.templates[template_name] = {
+            "duration_seconds": round(duration_seconds, 6),
+            "rows_written": sum(target["rows_written"] for target in targets),
+            "cells_written": sum(target["cells_written"] for target in targets),
+            "output_path": output_path,
+            "output_size_bytes": os.path.getsize(output_path) if os.path.exists(output_path) else None,
+            "peak_rss_bytes": get_peak_rss_bytes(),
+        }
+
+    def finish(self, status):
+        """Stops the run clock and records the final status ("success" or "failed")."""
+        self.status = status
+        self.duration_seconds = round(time.perf_counter() - self.start_time, 6)
+        self.peak_rss_bytes = get_peak_rss_bytes()
+
+    def to_dict(self) -> dict:
+        return {
+            "report_date": self.report_date,
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "status": self.status,
+            "exit_status": 0 if self.status == "success" else 1,
+            "duration_seconds": self.duration_seconds,
+            "peak_rss_bytes": self.peak_rss_bytes,
+            "inputs": self.inputs,
+            "templates": self.templates,
+            "targets": self.targets,
+        }
+
+    def to_openmetrics(self) -> str:
+        """Renders the metrics in the OpenMetrics text format (also readable by Prometheus' textfile collector)."""
+        run_labels = {"report_date": self.report_date}
+        families = [
+            ("run_duration_seconds", "Wall time of the run.", [(run_labels, self.duration_seconds)]),
+            ("run_exit_status", "Exit status of the run (0 = success).", [(run_labels, 0 if self.status == "success" else 1)]),
+            ("run_peak_rss_bytes", "Peak resident set size of the run.", [(run_labels, self.peak_rss_bytes)]),
+            ("input_read_bytes", "Bytes of each input file read.", [
+                ({**run_labels, "input": name}, value["bytes_read"]) for name, value in self.inputs.items()
+            ]),
+            ("input_load_seconds", "Wall time to load each input file.", [
+                ({**run_labels, "input": name}, value["load_seconds"]) for name, value in self.inputs.items()
+            ]),
+            ("input_rows_loaded", "Rows loaded from each input file.", [
+                ({**run_labels, "input": name}, value["rows_loaded"]) for name, value in self.inputs.items()
+            ]),
+            ("input_memory_bytes", "In-memory size of the data loaded from each input file.", [
+                ({**run_labels, "input": name}, value["memory_bytes"]) for name, value in self.inputs.items()
+            ]),
+        ]
+
+        for field, help_text in (
+            ("duration_seconds", "Wall time to render a template."),
+            ("rows_written", "Rows written into a template."),
+            ("cells_written", "Cells written into a template."),
+            ("output_size_bytes", "Size of the rendered output file."),
+            ("peak_rss_bytes", "Peak resident set size of the run when the template finished."),
+        ):
+            families.append((f"template_{field}", help_text, [
+                ({**run_labels, "template": name}, template[field]) for name, template in self.templates.items()
+            ]))
+
+        for field, help_text in (
+            ("duration_seconds", "Wall time to write a table or sheet."),
+            ("rows_written", "Rows written into a table or sheet."),
+            ("cells_written", "Cells written into a table or sheet."),
+        ):
+            families.append((f"table_{field}", help_text, [
+                ({**run_labels, "template": target["template"], "table": target["table"], "target_type": target["target_type"]}, target[field])
+                for target in self.targets
+            ]))
+
+        lines = []
+        for name, help_text, samples in families:
+            samples = [(labels, value) for labels, value in samples if value is not None]
+            if not samples:
+                continue
+            metric_name = f"{METRICS_PREFIX}_{name}"
+            lines.append(f"# TYPE {metric_name} gauge")
+            lines.append(f"# HELP {metric_name} {help_text}")
+            lines.extend(_format_sample(metric_name, labels, value) for labels, value in samples)
+        lines.append("# EOF")
+
+        return "\n".join(lines) + "\n"
+
+    def write(self, metrics_path):
+        """
+        Writes the metrics to `<metrics_path>.prom` (OpenMetrics text) and `<metrics_path>.json`.
+        Each file is written to a temporary file first, so collectors never read a partial file.
+
+        Parameters:
+            metrics_path (str): Output path without extension.
+
+        Returns:
+            tuple: (openmetrics_path, json_path)
+        """
+        metrics_path = os.path.splitext(metrics_path)[0] if metrics_path.endswith((".prom", ".json")) else metrics_path
+        paths = (f"{metrics_path}.prom", f"{metrics_path}.json")
+        contents = (self.to_openmetrics(), json.dumps(self.to_dict(), indent=2))
+
+        for path, content in zip(paths, contents):
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as file:
+                file.write(content)
+            os.replace(tmp_path, path)
+
+        logger.info(f"✅ Run metrics written to: {paths[0]} and {paths[1]}")
+        return paths
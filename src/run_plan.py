@@ -0,0 +1,284 @@
+import os
+import sqlite3
+import zipfile
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from openpyxl import load_workbook
+from openpyxl.utils import range_boundaries
+from logger_config import logger
+from utils import CSV_EXTENSIONS, SQLITE_EXTENSIONS, EXCEL_MAX_ROWS, get_sqlite_source_key, get_file_extension, is_glob_source
+from transform_data import get_source_transforms
+from load_input_data import build_sqlite_select
+from update_xlsx_data import get_source_settings
+from compressed_files import CsvStream
+from partitioned_sources import expand_source_files, get_metadata_cache
+
+# Constants
+CSV_SAMPLE_BYTES = 1024 * 1024  # Bytes read to estimate the average CSV line length
+CSV_COUNT_BLOCK_BYTES = 8 * 1024 * 1024  # Block size when counting CSV lines exactly
+EXACT_COUNT_THRESHOLD = EXCEL_MAX_ROWS // 2  # Estimates above this are confirmed with an exact count
+
+
+def count_csv_rows(file_path, exact=False):
+    """
+    Counts (or estimates) the data rows of a CSV file without parsing it.
+
+    - Estimate: file size divided by the average line length of the first 1 MB.
+      For compressed files, the uncompressed size is estimated from the compression ratio so far.
+    - Exact: counts newlines in large binary blocks (quoted newlines are counted as rows,
+      so the result is an upper bound for files with multi-line values).
+
+    Parameters:
+        file_path (Path): Path to the CSV file.
+        exact (bool): Count every line instead of estimating from a sample.
+
+    Returns:
+        int: Number of data rows (excluding the header).
+    """
+    file_size = os.path.getsize(file_path)
+    if file_size == 0:
+        return 0
+
+    with CsvStream(file_path, log_throughput=False) as csv_stream:
+        file = csv_stream.file
+        if not exact:
+            sample = file.read(CSV_SAMPLE_BYTES)
+            n_lines = sample.count(b"\n") + (0 if sample.endswith(b"\n") else 1)
+            if len(sample) < CSV_SAMPLE_BYTES or len(file.peek(1)) == 0:
+                return max(n_lines - 1, 0)
+            if csv_stream.compression is not None:
+                ratio = csv_stream.uncompressed_bytes_read / max(csv_stream.compressed_bytes_read, 1)
+                return max(int(file_size * ratio / (len(sample) / max(n_lines, 1))) - 1, 0)
+            return max(int(file_size / (len(sample) / max(n_lines, 1))) - 1, 0)
+
+        n_lines = 0
+        last_block = b""
+        while True:
+            block = file.read(CSV_COUNT_BLOCK_BYTES)
+            if not block:
+                break
+            n_lines += block.count(b"\n")
+            last_block = block
+        if last_block and not last_block.endswith(b"\n"):
+            n_lines += 1
+
+    return max(n_lines - 1, 0)
+
+
+def count_columnar_rows(file_path):
+    """Reads the row count of a Parquet/Feather/Arrow file from its metadata."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if file_path.suffix.lower() == ".parquet":
+        return pq.read_metadata(file_path).num_rows
+
+    with pa.memory_map(str(file_path)) as source:
+        reader = pa.ipc.open_file(source)
+        return sum(reader.get_batch(i).num_rows for i in range(reader.num_record_batches))
+
+
+def count_xlsx_table_rows(file_path, table_name):
+    """Reads the number of data rows of an Excel table from its definition, without loading the workbook."""
+    with zipfile.ZipFile(file_path) as zf:
+        for part_name in zf.namelist():
+            if not part_name.startswith("xl/tables/"):
+                continue
+            table = ET.fromstring(zf.read(part_name))
+            if table.get("name") == table_name or table.get("displayName") == table_name:
+                _, min_row, _, max_row = range_boundaries(table.get("ref"))
+                header_rows = int(table.get("headerRowCount", "1"))
+                return max(max_row - min_row + 1 - header_rows, 0)
+
+    raise ValueError(f"❌ Error: Table '{table_name}' not found in '{file_path}'.")
+
+
+def count_xlsx_sheet_rows(file_path, sheet_name):
+    """Reads the number of data rows of a sheet from its recorded dimensions (read-only, no cell parsing)."""
+    wb = load_workbook(file_path, read_only=True)
+    try:
+        if sheet_name not in wb.sheetnames:
+            raise ValueError(f"❌ Error: Sheet '{sheet_name}' not found in '{file_path}'.")
+        max_row = wb[sheet_name].max_row or 0
+    finally:
+        wb.close()
+
+    return max(max_row - 1, 0)
+
+
+def count_sqlite_rows(file_path, sqlite_settings):
+    """Counts the rows a SQLite source returns, with its filters and grouping applied in SQL."""
+    columns = list(sqlite_settings.get("column_mapping", {}))
+    sql, params, _ = build_sqlite_select(
+        columns,
+        table=sqlite_settings.get("table"),
+        query=sqlite_settings.get("query"),
+        transforms=get_source_transforms(sqlite_settings),
+    )
+
+    connection = sqlite3.connect(f"{Path(file_path).resolve().as_uri()}?mode=ro", uri=True)
+    try:
+        return connection.execute(f"SELECT COUNT(*) FROM ({sql})", params).fetchone()[0]
+    finally:
+        connection.close()
+
+
+def count_glob_source_rows(input_files_folder, pattern, exact=False):
+    """
+    Counts (or estimates) the rows of every file matching a glob source.
+    Counts of files unchanged since an earlier run come from the metadata cache.
+    """
+    metadata_cache = get_metadata_cache(input_files_folder)
+    key = "rows_exact" if exact else "rows"
+    if get_file_extension(pattern) in CSV_EXTENSIONS:
+        count_rows = lambda file_path: count_csv_rows(file_path, exact=exact)
+    else:
+        count_rows = count_columnar_rows
+
+    n_rows = sum(
+        metadata_cache.get(relative_path, key, count_rows)
+        for relative_path in expand_source_files(input_files_folder, pattern)
+    )
+    metadata_cache.save()
+    return n_rows
+
+
+def estimate_source_rows(input_files_folder, data_source, row_cache=None, exact=False):
+    """
+    Estimates the number of rows a data source provides, without loading it.
+    Filters are not applied (except for SQLite sources), so the estimate is an upper bound.
+
+    Parameters:
+        input_files_folder (str): Folder containing the input files.
+        data_source (dict): Single-key dictionary from `settings.yaml`, e.g. {"customer_data.csv": {...}}.
+        row_cache (dict): Cache of previous estimates, shared across calls (optional).
+        exact (bool): Count CSV rows exactly instead of estimating from a sample.
+
+    Returns:
+        int: Estimated number of rows.
+    """
+    row_cache = {} if row_cache is None else row_cache
+
+    for file_name, data_config in data_source.items():
+        file_path = Path(input_files_folder) / file_name
+        file_extension = get_file_extension(file_name)
+
+        if file_extension in SQLITE_EXTENSIONS:
+            cache_key = (file_name, "sqlite", get_sqlite_source_key(data_config["sqlite"]))
+        elif file_extension == ".xlsx":
+            xl_type, xl_config = next(iter(data_config.items()))
+            cache_key = (file_name, xl_type, xl_config["name"])
+        else:
+            cache_key = (file_name, exact)
+
+        if cache_key in row_cache:
+            return row_cache[cache_key]
+
+        if is_glob_source(file_name):
+            n_rows = count_glob_source_rows(input_files_folder, file_name, exact=exact)
+        elif not file_path.exists():
+            raise FileNotFoundError(f"File not found: {file_path}")
+        elif file_extension in CSV_EXTENSIONS:
+            n_rows = count_csv_rows(file_path, exact=exact)
+        elif file_extension in SQLITE_EXTENSIONS:
+            n_rows = count_sqlite_rows(file_path, data_config["sqlite"])
+        elif file_extension == ".xlsx":
+            if cache_key[1] == "xl_table":
+                n_rows = count_xlsx_table_rows(file_path, cache_key[2])
+            else:
+                n_rows = count_xlsx_sheet_rows(file_path, cache_key[2])
+        else:
+            n_rows = count_columnar_rows(file_path)
+
+        row_cache[cache_key] = n_rows
+        logger.debug(f"Estimated {n_rows} rows for {cache_key}")
+        return n_rows
+
+    return 0
+
+
+def estimate_template_cost(input_files_folder, type_config, row_cache=None):
+    """
+    Estimates the cost of rendering a template as the sum of the input rows written to each target.
+
+    Parameters:
+        input_files_folder (str): Folder containing the input files.
+        type_config (dict): The template's entry in `output_from_input_dict` ({"tables": ..., "sheets": ...}).
+        row_cache (dict): Cache of row estimates, shared across templates (optional).
+
+    Returns:
+        int: Estimated cost (input rows x target tables/sheets), at least 1.
+    """
+    cost = 0
+    for _, targets in type_config.items():
+        for _, data_source in targets.items():
+            cost += estimate_source_rows(input_files_folder, data_source, row_cache)
+
+    return max(cost, 1)
+
+
+def check_excel_row_limits(output_from_input_dict, input_files_folder, row_cache=None):
+    """
+    Checks, before any input is loaded, that every target fits within Excel's row limit.
+
+    - Row counts come from `estimate_source_rows`; large estimates are confirmed with an exact count.
+    - `sheets` targets whose source sets `spill: true` may exceed the limit; the overflow is written
+      to continuation sheets.
+    - Sources with pandas-side filters or aggregation cannot be sized up front and are left to the
+      check in the writers.
+
+    Parameters:
+        output_from_input_dict (dict): Template configuration from `settings.yaml`.
+        input_files_folder (str): Folder containing the input files.
+        row_cache (dict): Cache of row estimates, shared with other planning steps (optional).
+
+    Returns:
+        dict: {template_name: error message} for each template with a target that would exceed the
+            limit without spilling. These templates cannot be rendered; the others can.
+    """
+    for _ in range(2): logger.info("")
+    logger.info("-" * 50)
+    logger.info("📏 CHECKING EXCEL ROW LIMITS")
+    logger.info("-" * 50)
+
+    rows_per_sheet = EXCEL_MAX_ROWS - 1  # Every target has at least a header row
+    problems = {}
+
+    for template_name, type_config in output_from_input_dict.items():
+        for xl_type, targets in type_config.items():
+            for target_name, data_source in targets.items():
+                file_name = next(iter(data_source))
+                source_settings = get_source_settings(data_source)
+
+                try:
+                    n_rows = estimate_source_rows(input_files_folder, data_source, row_cache)
+                except (FileNotFoundError, ValueError) as e:
+                    # Reported when the input is loaded, failing only the templates that read it
+                    logger.warning(f"⚠️ Cannot size {template_name} -> {xl_type[:-1]} '{target_name}': {e}")
+                    continue
+                if n_rows > EXACT_COUNT_THRESHOLD and get_file_extension(file_name) in CSV_EXTENSIONS:
+                    n_rows = estimate_source_rows(input_files_folder, data_source, row_cache, exact=True)
+                if n_rows <= rows_per_sheet:
+                    continue
+
+                target = f"{template_name} -> {xl_type[:-1]} '{target_name}' ({n_rows:,} rows from {file_name})"
+                if get_source_transforms(source_settings) and get_file_extension(file_name) not in SQLITE_EXTENSIONS:
+                    logger.warning(f"⚠️ {target} may exceed the row limit; it is checked again after filtering.")
+                elif xl_type == "sheets" and source_settings.get("spill", False):
+                    n_sheets = -(-n_rows // rows_per_sheet)
+                    logger.info(f"{target} will spill across {n_sheets} sheets.")
+                else:
+                    problems.setdefault(template_name, []).append(target)
+
+    failures = {}
+    for template_name, targets in problems.items():
+        failures[template_name] = (
+            f"❌ Error: {len(targets)} target(s) exceed Excel's {EXCEL_MAX_ROWS:,} row limit: {targets}. "
+            f"Only `sheets` targets can continue in additional sheets, by setting `spill: true` on the source."
+        )
+        logger.error(failures[template_name])
+
+    if not failures:
+        logger.info("✅ All targets fit within Excel's row limit.")
+
+    return failures
@@ -0,0 +1,204 @@
+import os
+import glob
+import json
+from datetime import datetime
+from logger_config import logger
+from run_plan import estimate_template_cost
+
+# Constants
+MANIFEST_SUFFIX = "_manifest.json"
+
+
+def parse_shard(shard):
+    """
+    Parses a `--shard` value of the form "i/N" (1-based).
+
+    Parameters:
+        shard (str): Shard specification, e.g. "2/4".
+
+    Returns:
+        tuple: (shard_index, shard_count)
+
+    Raises:
+        ValueError: If the value is malformed or out of range.
+    """
+    try:
+        shard_index, shard_count = (int(part) for part in shard.split("/"))
+    except ValueError:
+        raise ValueError(f"❌ Error: Invalid shard '{shard}'. Expected the form i/N, e.g. 2/4.")
+
+    if shard_count < 1 or not 1 <= shard_index <= shard_count:
+        raise ValueError(f"❌ Error: Invalid shard '{shard}'. The shard number must be between 1 and {shard_count}.")
+
+    return shard_index, shard_count
+
+
+def assign_templates_to_shards(template_costs, shard_count):
+    """
+    Deterministically assigns templates to shards, balancing the estimated cost.
+
+    Templates are taken from the most to the least expensive (ties by name) and each is
+    given to the shard with the lowest total cost so far (ties by shard number). Every node
+    computing this from the same inputs gets the same assignment, so no coordinator is needed.
+
+    Parameters:
+        template_costs (dict): {template_name: estimated_cost}
+        shard_count (int): Number of shards.
+
+    Returns:
+        list[list[str]]: Templates assigned to each shard (index 0 is shard 1).
+    """
+    shards = [[] for _ in range(shard_count)]
+    shard_costs = [0] * shard_count
+
+    for template_name in sorted(template_costs, key=lambda name: (-template_costs[name], name)):
+        target = min(range(shard_count), key=lambda idx: (shard_costs[idx], idx))
+        shards[target].append(template_name)
+        shard_costs[target] += template_costs[template_name]
+
+    for idx, (templates, cost) in enumerate(zip(shards, shard_costs), start=1):
+        logger.info(f"Shard {idx}/{shard_count}: {len(templates)} templates, estimated cost {cost}")
+
+    return shards
+
+
+def select_shard_templates(output_from_input_dict, input_files_folder, shard_index, shard_count):
+    """
+    Restricts `output_from_input_dict` to the templates assigned to one shard.
+
+    Parameters:
+        output_from_input_dict (dict): Template configuration from `settings.yaml`.
+        input_files_folder (str): Folder containing the input files (used to estimate costs).
+        shard_index (int): Shard number (1-based).
+        shard_count (int): Number of shards.
+
+    Returns:
+        tuple: (shard_config, template_costs)
+            - shard_config (dict): The templates of this shard, in configuration order.
+            - template_costs (dict): Estimated cost of every template.
+    """
+    for _ in range(2): logger.info("")
+    logger.info("-" * 50)
+    logger.info(f"🧩 SELECTING TEMPLATES FOR SHARD {shard_index}/{shard_count}")
+    logger.info("-" * 50)
+
+    row_cache = {}
+    template_costs = {
+        template_name: estimate_template_cost(input_files_folder, type_config, row_cache)
+        for template_name, type_config in output_from_input_dict.items()
+    }
+
+    assigned = set(assign_templates_to_shards(template_costs, shard_count)[shard_index - 1])
+    shard_config = {name: config for name, config in output_from_input_dict.items() if name in assigned}
+
+    logger.info(f"✅ Shard {shard_index}/{shard_count} renders: {list(shard_config)}")
+    return shard_config, template_costs
+
+
+def write_shard_manifest(outputs_folder, shard_index, shard_count, template_costs, shard_config, render_results, status, report_date):
+    """
+    Writes the result manifest of a shard to the outputs folder.
+
+    Parameters:
+        outputs_folder (str): Folder the outputs (and the manifest) are written to.
+        shard_index (int): Shard number (1-based).
+        shard_count (int): Number of shards.
+        template_costs (dict): Estimated cost of every template in the configuration.
+        shard_config (dict): The templates assigned to this shard.
+        render_results (dict): {template_name: output_path} for each rendered template.
+        status (str): "success" or "failed".
+        report_date (str): Report date of the run.
+
+    Returns:
+        str: Path to the manifest file.
+    """
+    rendered = {}
+    for template_name, output_path in render_results.items():
+        rendered[template_name] = {
+            "output_path": output_path,
+            "size_bytes": os.path.getsize(output_path) if os.path.exists(output_path) else None,
+        }
+
+    manifest = {
+        "shard_index": shard_index,
+        "shard_count": shard_count,
+        "status": status,
+        "report_date": report_date,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "all_templates": sorted(template_costs),
+        "assigned_templates": sorted(shard_config),
+        "estimated_costs": {name: template_costs[name] for name in sorted(shard_config)},
+        "rendered": rendered,
+    }
+
+    manifest_path = os.path.join(outputs_folder, f"shard_{shard_index}_of_{shard_count}{MANIFEST_SUFFIX}")
+    with open(manifest_path, "w", encoding="utf-8") as file:
+        json.dump(manifest, file, indent=2)
+
+    logger.info(f"✅ Shard manifest written to: {manifest_path}")
+    return manifest_path
+
+
+def merge_manifests(manifest_paths):
+    """
+    Merges shard manifests and checks that every template was rendered exactly once.
+
+    Parameters:
+        manifest_paths (list): Manifest files, or folders containing `*_manifest.json` files.
+
+    Returns:
+        tuple: (merged, problems)
+            - merged (dict): Combined manifest with the rendered output of every template.
+            - problems (list[str]): Problems found; empty if the run is complete.
+    """
+    files = []
+    for path in manifest_paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, f"*{MANIFEST_SUFFIX}"))))
+        else:
+            files.append(path)
+
+    if not files:
+        return {}, ["No manifest files found."]
+
+    manifests = []
+    for file_path in files:
+        with open(file_path, "r", encoding="utf-8") as file:
+            manifests.append((file_path, json.load(file)))
+
+    problems = []
+    shard_count = manifests[0][1]["shard_count"]
+    all_templates = manifests[0][1]["all_templates"]
+
+    for file_path, manifest in manifests:
+        if manifest["shard_count"] != shard_count or manifest["all_templates"] != all_templates:
+            problems.append(f"{file_path} belongs to a different run (shard count or template list differs).")
+        if manifest["status"] != "success":
+            problems.append(f"Shard {manifest['shard_index']}/{manifest['shard_count']} finished with status '{manifest['status']}'.")
+
+    shard_indexes = [manifest["shard_index"] for _, manifest in manifests]
+    for shard_index in range(1, shard_count + 1):
+        if shard_indexes.count(shard_index) == 0:
+            problems.append(f"Manifest for shard {shard_index}/{shard_count} is missing.")
+        elif shard_indexes.count(shard_index) > 1:
+            problems.append(f"Shard {shard_index}/{shard_count} has {shard_indexes.count(shard_index)} manifests.")
+
+    rendered = {}
+    for _, manifest in manifests:
+        for template_name, result in manifest["rendered"].items():
+            rendered.setdefault(template_name, []).append({"shard_index": manifest["shard_index"], **result})
+
+    for template_name in all_templates:
+        count = len(rendered.get(template_name, []))
+        if count != 1:
+            problems.append(f"Template '{template_name}' was rendered {count} times (expected exactly once).")
+
+    merged = {
+        "shard_count": shard_count,
+        "manifests": files,
+        "all_templates": all_templates,
+        "rendered": rendered,
+        "complete": not problems,
+    }
+
+    return merged, problems
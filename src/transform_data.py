@@ -0,0 +1,285 @@
+import json
+import operator
+import numpy as np
+import pandas as pd
+from logger_config import logger
+from convert_excel_values import DATE_TYPES
+
+# Constants
+TRANSFORM_KEYS = ("filter", "group_by", "aggregate", "sort")
+
+# Filter operators: pandas implementation and SQL equivalent
+FILTER_OPERATORS = {
+    "==": (operator.eq, "="),
+    "!=": (operator.ne, "<>"),
+    ">": (operator.gt, ">"),
+    ">=": (operator.ge, ">="),
+    "<": (operator.lt, "<"),
+    "<=": (operator.le, "<="),
+    "in": (lambda col, value: col.isin(value), "IN"),
+    "not in": (lambda col, value: ~col.isin(value), "NOT IN"),
+}
+
+# Aggregations: pandas name and SQL equivalent
+AGGREGATIONS = {
+    "sum": ("sum", "SUM"),
+    "mean": ("mean", "AVG"),
+    "min": ("min", "MIN"),
+    "max": ("max", "MAX"),
+    "count": ("count", "COUNT"),
+}
+
+SORT_ORDERS = {"ascending": True, "asc": True, "descending": False, "desc": False}
+
+
+def get_source_transforms(source_settings):
+    """
+    Extracts and validates the optional `filter`, `group_by`, `aggregate` and `sort` keys of a source.
+
+    Example (column names are input column names, before `column_mapping`):
+
+        filter:
+          - column: "Region"
+            op: "=="
+            value: "AU"
+        group_by: ["Region"]
+        aggregate:
+          "Sales": sum
+        sort:
+          "Sales": descending
+
+    Parameters:
+        source_settings (dict): Settings block of a source.
+
+    Returns:
+        dict | None: Normalised transforms, or None if the source has none. Declared types and
+            `date_input_format` are included so date filters can be evaluated by any reader.
+
+    Raises:
+        ValueError: If an operator, aggregation or sort order is not supported.
+    """
+    if not any(source_settings.get(key) for key in TRANSFORM_KEYS):
+        return None
+
+    filters = []
+    for condition in source_settings.get("filter") or []:
+        op = str(condition.get("op", "=="))
+        if op not in FILTER_OPERATORS:
+            raise ValueError(f"❌ Error: Unsupported filter operator '{op}'. Supported: {list(FILTER_OPERATORS)}")
+        if "column" not in condition or "value" not in condition:
+            raise ValueError(f"❌ Error: Each filter needs a `column` and a `value`: {condition}")
+        if op in ("in", "not in") and not isinstance(condition["value"], list):
+            raise ValueError(f"❌ Error: Filter operator '{op}' needs a list value: {condition}")
+        filters.append({"column": condition["column"], "op": op, "value": condition["value"]})
+
+    group_by = list(source_settings.get("group_by") or [])
+    aggregate = {}
+    for col, func in (source_settings.get("aggregate") or {}).items():
+        if str(func).lower() not in AGGREGATIONS:
+            raise ValueError(f"❌ Error: Unsupported aggregation '{func}' for column '{col}'. Supported: {list(AGGREGATIONS)}")
+        aggregate[col] = str(func).lower()
+    if group_by and not aggregate:
+        raise ValueError("❌ Error: `group_by` needs an `aggregate` mapping.")
+
+    sort = {}
+    for col, order in (source_settings.get("sort") or {}).items():
+        if str(order).lower() not in SORT_ORDERS:
+            raise ValueError(f"❌ Error: Unsupported sort order '{order}' for column '{col}'. Use ascending or descending.")
+        sort[col] = SORT_ORDERS[str(order).lower()]
+
+    return {
+        "filter": filters,
+        "group_by": group_by,
+        "aggregate": aggregate,
+        "sort": sort,
+        "column_types": dict(source_settings.get("column_types", {})),
+        "date_input_format": source_settings.get("date_input_format"),
+    }
+
+
+def get_transforms_key(transforms):
+    """Returns a stable string identifying a set of transforms, used to share results between outputs."""
+    return json.dumps(transforms, sort_keys=True, default=str)
+
+
+def get_transform_columns(transforms):
+    """Returns the input columns that the transforms read (filters, grouping, aggregation and sorting)."""
+    columns = {condition["column"] for condition in transforms["filter"]}
+    columns.update(transforms["group_by"])
+    columns.update(transforms["aggregate"])
+    columns.update(transforms["sort"])
+    return columns
+
+
+def get_transform_output_columns(transforms, columns):
+    """Returns the columns left after the transforms (grouping and aggregation drop all other columns)."""
+    if transforms["aggregate"]:
+        return transforms["group_by"] + [col for col in transforms["aggregate"] if col not in transforms["group_by"]]
+    return list(columns)
+
+
+def filter_mask(df: pd.DataFrame, transforms) -> pd.Series:
+    """
+    Evaluates the filters of a source against a DataFrame, vectorized.
+    Columns declared as dates are parsed before comparing, so date filters work on text inputs.
+
+    Parameters:
+        df (pd.DataFrame): Data with input column names.
+        transforms (dict): Normalised transforms (see `get_source_transforms`).
+
+    Returns:
+        pd.Series: Boolean mask of the rows to keep.
+    """
+    mask = pd.Series(True, index=df.index)
+    column_types = {col: str(col_type).lower() for col, col_type in transforms["column_types"].items()}
+
+    for condition in transforms["filter"]:
+        col = df[condition["column"]]
+        value = condition["value"]
+
+        if isinstance(col.dtype, pd.CategoricalDtype) and condition["op"] not in ("==", "!=", "in", "not in"):
+            col = col.astype(object)  # Unordered categoricals only support equality
+
+        if column_types.get(condition["column"]) in DATE_TYPES:
+            if not pd.api.types.is_datetime64_any_dtype(col.dtype):
+                col = pd.to_datetime(col, format=transforms["date_input_format"], dayfirst=True, errors="coerce")
+            value = [pd.Timestamp(v) for v in value] if isinstance(value, list) else pd.Timestamp(value)
+
+        compare, _ = FILTER_OPERATORS[condition["op"]]
+        mask &= compare(col, value)
+
+    return mask
+
+
+def apply_filters(df: pd.DataFrame, transforms) -> pd.DataFrame:
+    """Returns the rows of `df` matching the source filters."""
+    if not transforms["filter"]:
+        return df
+    return df[filter_mask(df, transforms)]
+
+
+def apply_aggregation_and_sort(df: pd.DataFrame, transforms) -> pd.DataFrame:
+    """
+    Applies the `group_by`/`aggregate` and `sort` transforms of a source, vectorized.
+
+    Parameters:
+        df (pd.DataFrame): Filtered data with input column names.
+        transforms (dict): Normalised transforms (see `get_source_transforms`).
+
+    Returns:
+        pd.DataFrame: Aggregated and/or sorted data.
+    """
+    if transforms["aggregate"]:
+        # Aggregate in 64-bit precision, so downcast inputs give the same results
+        df = df.astype({
+            col: np.float64 if pd.api.types.is_float_dtype(df[col].dtype) else np.int64
+            for col in transforms["aggregate"]
+            if isinstance(df[col].dtype, np.dtype) and df[col].dtype.kind in "iuf" and df[col].dtype.itemsize < 8
+        })
+        named_aggs = {col: (col, AGGREGATIONS[func][0]) for col, func in transforms["aggregate"].items()}
+        if transforms["group_by"]:
+            df = df.groupby(transforms["group_by"], as_index=False, sort=False, dropna=False, observed=True).agg(**named_aggs)
+        else:
+            df = pd.DataFrame({col: [getattr(df[src], func)()] for col, (src, func) in named_aggs.items()})
+
+    if transforms["sort"]:
+        df = df.sort_values(by=list(transforms["sort"]), ascending=list(transforms["sort"].values()), kind="stable")
+
+    return df.reset_index(drop=True)
+
+
+def apply_transforms(df: pd.DataFrame, transforms) -> pd.DataFrame:
+    """
+    Applies all transforms of a source in pandas (used when they could not be pushed down to the reader).
+
+    Parameters:
+        df (pd.DataFrame): Data with input column names.
+        transforms (dict): Normalised transforms, or None.
+
+    Returns:
+        pd.DataFrame: Transformed data.
+    """
+    if transforms is None:
+        return df
+
+    n_rows = len(df)
+    df = apply_aggregation_and_sort(apply_filters(df, transforms), transforms)
+    logger.info(f"Applied filter/aggregate/sort in pandas: {n_rows} rows -> {len(df)} rows.")
+    return df
+
+
+def split_sql_transforms(transforms):
+    """
+    Splits the transforms of a source into the part that can run in SQL and the part left to pandas.
+
+    Filters on columns declared as dates compare parsed dates in pandas (see `filter_mask`), which a
+    SQL comparison of the stored text cannot match (e.g. "31/01/2026" or "2026-01-31 00:00:00").
+    Those filters, and the grouping/aggregation and sorting that must follow them, run in pandas.
+
+    Parameters:
+        transforms (dict): Normalised transforms (see `get_source_transforms`).
+
+    Returns:
+        tuple: (sql_transforms, pandas_transforms); `pandas_transforms` is None when everything runs in SQL.
+    """
+    column_types = {col: str(col_type).lower() for col, col_type in transforms["column_types"].items()}
+    date_filters = [condition for condition in transforms["filter"] if column_types.get(condition["column"]) in DATE_TYPES]
+    if not date_filters:
+        return transforms, None
+
+    sql_transforms = {
+        **transforms,
+        "filter": [condition for condition in transforms["filter"] if condition not in date_filters],
+        "group_by": [],
+        "aggregate": {},
+        "sort": {},
+    }
+    pandas_transforms = {**transforms, "filter": date_filters}
+    return sql_transforms, pandas_transforms
+
+
+def build_sql_clauses(transforms, quote_identifier):
+    """
+    Translates the transforms of a source into SQL clauses, so they run inside the database.
+
+    Parameters:
+        transforms (dict): Normalised transforms (see `get_source_transforms`).
+        quote_identifier (callable): Function quoting column names for the SQL dialect.
+
+    Returns:
+        tuple: (select_items, where_clause, group_by_clause, order_by_clause, params)
+            - select_items (list[str] | None): Select expressions when aggregating, otherwise None.
+            - where_clause, group_by_clause, order_by_clause (str): Clauses including their keyword, or "".
+            - params (list): Parameters for the `?` placeholders in the WHERE clause.
+    """
+    conditions, params = [], []
+    for condition in transforms["filter"]:
+        _, sql_op = FILTER_OPERATORS[condition["op"]]
+        value = condition["value"]
+        if isinstance(value, list):
+            conditions.append(f"{quote_identifier(condition['column'])} {sql_op} ({', '.join('?' for _ in value)})")
+            params.extend(str(v) if hasattr(v, "isoformat") else v for v in value)
+        else:
+            conditions.append(f"{quote_identifier(condition['column'])} {sql_op} ?")
+            params.append(str(value) if hasattr(value, "isoformat") else value)
+    where_clause = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    select_items = None
+    group_by_clause = ""
+    if transforms["aggregate"]:
+        select_items = [quote_identifier(col) for col in transforms["group_by"]]
+        select_items += [
+            f"{AGGREGATIONS[func][1]}({quote_identifier(col)}) AS {quote_identifier(col)}"
+            for col, func in transforms["aggregate"].items()
+            if col not in transforms["group_by"]
+        ]
+        if transforms["group_by"]:
+            group_by_clause = f" GROUP BY {', '.join(quote_identifier(col) for col in transforms['group_by'])}"
+
+    order_by_clause = ""
+    if transforms["sort"]:
+        order_by_clause = " ORDER BY " + ", ".join(
+            f"{quote_identifier(col)} {'ASC' if ascending else 'DESC'}" for col, ascending in transforms["sort"].items()
+        )
+
+    return select_items, where_clause, group_by_clause, order_by_clause, params
@@ -0,0 +1,250 @@
+import os
+import json
+import math
+import statistics
+from logger_config import logger
+from partitioned_sources import get_source_size
+from load_input_data import DEFAULT_LOAD_WORKERS, DEFAULT_MAX_INFLIGHT_BYTES, CSV_CHUNK_SIZE
+from render_sheets import DEFAULT_SHEET_WORKERS
+
+# Constants
+RUN_HISTORY_NAME = "run_history.json"
+HISTORY_SAMPLES = 5  # Runs kept per input and template; tuning uses their median
+MEMORY_FRACTION = 0.5  # Share of the available memory that inputs loading at the same time may use
+TARGET_CHUNK_BYTES = 64 * 1024 ** 2  # In-memory size of one CSV chunk
+MIN_CHUNK_ROWS = 10_000
+MAX_CHUNK_ROWS = 1_000_000
+MIN_INFLIGHT_BYTES = 64 * 1024 ** 2
+
+
+def get_available_memory_bytes():
+    """Returns the memory available to new work in bytes, or None where it cannot be read."""
+    try:
+        with open("/proc/meminfo", "r", encoding="utf-8") as file:
+            for line in file:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def _format_gb(n_bytes) -> str:
+    return f"{n_bytes / 1024 ** 3:,.1f} GB"
+
+
+class RunHistory:
+    """
+    Cost history of previous runs, kept in `run_history.json` in the outputs folder.
+
+    For every input file: load time, bytes read, rows and in-memory size. For every template: render
+    time, rows and cells written and the peak RSS reached by its end. Only the last `HISTORY_SAMPLES`
+    successful observations are kept, and their median is used, so one unusual run does not skew tuning.
+    """
+
+    def __init__(self, history_path):
+        self.history_path = history_path
+        self.entries = {"inputs": {}, "templates": {}}
+
+        if os.path.exists(history_path):
+            try:
+                with open(history_path, "r", encoding="utf-8") as file:
+                    self.entries = {**self.entries, **json.load(file)}
+            except (OSError, ValueError) as e:
+                logger.warning(f"⚠️ Ignoring unreadable run history {history_path}: {e}")
+
+    def record(self, metrics):
+        """Adds the inputs that loaded and the templates that rendered in a run (a `RunMetrics`)."""
+        for file_name, value in metrics.inputs.items():
+            if value["error"] is None and value["load_seconds"] is not None:
+                self._add("inputs", file_name, {
+                    "seconds": value["load_seconds"],
+                    "bytes_read": value["bytes_read"],
+                    "rows": value["rows_loaded"],
+                    "memory_bytes": value["memory_bytes"],
+                })
+
+        for template_name, value in metrics.templates.items():
+            self._add("templates", template_name, {
+                "seconds": value["duration_seconds"],
+                "rows": value["rows_written"],
+                "cells": value["cells_written"],
+                "peak_rss_bytes": value["peak_rss_bytes"],
+            })
+
+    def _add(self, kind, name, sample):
+        samples = self.entries[kind].setdefault(name, [])
+        samples.append(sample)
+        del samples[:-HISTORY_SAMPLES]
+
+    def median(self, kind, name, field):
+        """Returns the median of a field over the recorded runs of an input or template, or None."""
+        values = [sample[field] for sample in self.entries[kind].get(name, []) if sample.get(field) is not None]
+        return statistics.median(values) if values else None
+
+    def ratio(self, kind, numerator, denominator):
+        """Returns the median ratio of two fields across all inputs or templates, e.g. memory per byte read."""
+        ratios = [
+            self.median(kind, name, numerator) / self.median(kind, name, denominator)
+            for name in self.entries[kind]
+            if self.median(kind, name, numerator) is not None and self.median(kind, name, denominator)
+        ]
+        return statistics.median(ratios) if ratios else None
+
+    def save(self):
+        """Writes the history; a read-only outputs folder only costs the tuning."""
+        try:
+            tmp_path = f"{self.history_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as file:
+                json.dump(self.entries, file, indent=2)
+            os.replace(tmp_path, self.history_path)
+        except OSError as e:
+            logger.warning(f"⚠️ Could not write run history {self.history_path}: {e}")
+
+
+def order_by_expected_seconds(history, kind, names) -> list:
+    """
+    Orders inputs or templates longest first by their recorded time. Names without history go first,
+    as they may be the longest; ties keep the configuration order.
+    """
+    def sort_key(name):
+        seconds = history.median(kind, name, "seconds")
+        return -math.inf if seconds is None else -seconds
+
+    return sorted(names, key=sort_key)
+
+
+def tune_run(
+        history,
+        input_files_folder,
+        input_names,
+        template_names,
+        load_workers=None,
+        max_inflight_bytes=None,
+        csv_chunk_rows=None,
+        sheet_workers=None,
+):
+    """
+    Picks the load and sheet worker counts, in-flight byte budget, CSV chunk size and input loading order
+    of a run from the cores and memory available and the run history, and logs the reason for each choice.
+
+    Explicit settings (not None) are kept as they are. Without history, the defaults are used.
+
+    Parameters:
+        history (RunHistory): Costs of previous runs.
+        input_files_folder (str): Path to the input files folder.
+        input_names (list): Input files (or glob sources) of the run.
+        template_names (list): Templates of the run.
+        load_workers (int): Number of input files loaded at the same time (optional).
+        max_inflight_bytes (int): Maximum total size of the input files loading at the same time (optional).
+        csv_chunk_rows (int): Rows per chunk when filtering CSVs while reading (optional).
+        sheet_workers (int): Worker processes rendering the worksheets of one template (optional).
+
+    Returns:
+        dict: {"load_workers", "max_inflight_bytes", "csv_chunk_rows", "sheet_workers", "input_order"}
+    """
+    logger.info("-" * 50)
+    logger.info("🎛️ Tuning the run")
+    logger.info("-" * 50)
+
+    cores = os.cpu_count() or 1
+    available_bytes = get_available_memory_bytes()
+    memory_budget = available_bytes * MEMORY_FRACTION if available_bytes else None
+    logger.info(
+        f"{cores} cores, {_format_gb(available_bytes) if available_bytes else 'unknown'} memory available, "
+        f"{sum(name in history.entries['inputs'] for name in input_names)} of {len(input_names)} inputs and "
+        f"{sum(name in history.entries['templates'] for name in template_names)} of {len(template_names)} templates with history."
+    )
+
+    # In-memory size per byte on disk, to estimate inputs without history from their size
+    memory_per_byte = history.ratio("inputs", "memory_bytes", "bytes_read")
+    input_memory = {}
+    for name in input_names:
+        memory = history.median("inputs", name, "memory_bytes")
+        if memory is None and memory_per_byte:
+            memory = get_source_size(input_files_folder, name) * memory_per_byte
+        if memory is not None:
+            input_memory[name] = memory
+
+    # Load workers: one per core, but no more than the largest inputs fit in memory at once
+    if load_workers is not None:
+        logger.info(f"Load workers: {load_workers} (set by --load_workers).")
+    elif not input_memory:
+        load_workers = DEFAULT_LOAD_WORKERS
+        logger.info(f"Load workers: {load_workers} (default, no load history yet).")
+    else:
+        load_workers = max(min(cores, len(input_names)), 1)
+        reason = f"{cores} cores, {len(input_names)} inputs"
+        largest = max(input_memory.values())
+        if memory_budget and largest > 0 and memory_budget // largest < load_workers:
+            load_workers = max(int(memory_budget // largest), 1)
+            reason += f", the largest input takes about {_format_gb(largest)} of a {_format_gb(memory_budget)} budget"
+        logger.info(f"Load workers: {load_workers} ({reason}).")
+
+    # In-flight bytes: the on-disk size whose loaded data fits the memory budget, and never more than the
+    # budget itself, as parsing takes more memory than the loaded data (e.g. Excel inputs)
+    if max_inflight_bytes is not None:
+        logger.info(f"In-flight input size: {max_inflight_bytes / 1024 ** 2:,.0f} MB (set by --max_inflight_mb).")
+    elif not (memory_per_byte and memory_budget):
+        max_inflight_bytes = DEFAULT_MAX_INFLIGHT_BYTES
+        logger.info(f"In-flight input size: {max_inflight_bytes / 1024 ** 2:,.0f} MB (default, no memory history yet).")
+    else:
+        max_inflight_bytes = max(int(memory_budget / max(memory_per_byte, 1)), MIN_INFLIGHT_BYTES)
+        logger.info(
+            f"In-flight input size: {max_inflight_bytes / 1024 ** 2:,.0f} MB (inputs take {memory_per_byte:.1f}x "
+            f"their size on disk in memory, {_format_gb(memory_budget)} budget)."
+        )
+
+    # CSV chunks: rows that take about TARGET_CHUNK_BYTES in memory
+    bytes_per_row = history.ratio("inputs", "memory_bytes", "rows")
+    if csv_chunk_rows is not None:
+        logger.info(f"CSV chunk size: {csv_chunk_rows:,} rows (set by --csv_chunk_rows).")
+    elif not bytes_per_row:
+        csv_chunk_rows = CSV_CHUNK_SIZE
+        logger.info(f"CSV chunk size: {csv_chunk_rows:,} rows (default, no row history yet).")
+    else:
+        csv_chunk_rows = min(max(int(TARGET_CHUNK_BYTES / bytes_per_row), MIN_CHUNK_ROWS), MAX_CHUNK_ROWS)
+        logger.info(f"CSV chunk size: {csv_chunk_rows:,} rows (about {bytes_per_row:,.0f} bytes per loaded row).")
+
+    # Sheet workers: one per core, but no more than the largest template's peak RSS fits in memory per
+    # worker. The peak RSS is the whole run's by the end of the template, so this errs on the low side
+    template_peaks = [
+        peak for peak in (history.median("templates", name, "peak_rss_bytes") for name in template_names)
+        if peak is not None
+    ]
+    if sheet_workers is not None:
+        logger.info(f"Sheet workers: {sheet_workers} (set by --sheet_workers).")
+    elif not (template_peaks and memory_budget):
+        sheet_workers = DEFAULT_SHEET_WORKERS
+        logger.info(f"Sheet workers: {sheet_workers} (default, no template memory history yet).")
+    else:
+        largest = max(template_peaks)
+        sheet_workers = max(min(cores, int(memory_budget // largest) if largest > 0 else cores), 1)
+        logger.info(
+            f"Sheet workers: {sheet_workers} ({cores} cores, templates peak at about {_format_gb(largest)} "
+            f"of a {_format_gb(memory_budget)} budget)."
+        )
+
+    # Inputs start loading longest first, so the longest input never starts last. Templates render one
+    # after another, so their order does not change the run time and is left as configured
+    input_order = order_by_expected_seconds(history, "inputs", input_names)
+    expected = [
+        f"{name} ({history.median('inputs', name, 'seconds'):.2f} s)" if history.median("inputs", name, "seconds") is not None else f"{name} (no history)"
+        for name in input_order
+    ]
+    if load_workers > 1:
+        logger.info(f"Order of inputs, longest first: {', '.join(expected)}")
+    else:
+        logger.info(f"Order of inputs: {', '.join(expected)} (loaded one at a time, so the order does not change the run time).")
+
+    return {
+        "load_workers": load_workers,
+        "max_inflight_bytes": max_inflight_bytes,
+        "csv_chunk_rows": csv_chunk_rows,
+        "sheet_workers": sheet_workers,
+        "input_order": input_order,
+    }
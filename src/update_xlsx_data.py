@@ -3,9 +3,21 @@ from openpyxl import load_workbook
 import pandas as pd
 import openpyxl
 from openpyxl.utils.cell import coordinate_from_string, column_index_from_string, get_column_letter
+from openpyxl.worksheet.formula import ArrayFormula
+from openpyxl.styles.cell_style import StyleArray
 import logging
 from logger_config import logger
 import shutil
+import time
+import zipfile
+from convert_excel_values import df_to_excel_values, DEFAULT_DATE_FORMAT
+from evaluate_formulas import TableFormulaEvaluator, evaluate_workbook_formulas
+from xlsx_package import get_sheet_part_names, set_cached_formula_values
+from utils import CSV_EXTENSIONS, FLAT_FILE_EXTENSIONS, SQLITE_EXTENSIONS, EXCEL_MAX_ROWS, EXCEL_MAX_SHEET_TITLE_LENGTH, get_sqlite_source_key, get_file_extension
+from transform_data import get_source_transforms, get_transforms_key, apply_transforms
+from append_tables import load_append_state, save_append_state, get_append_state_path, get_new_source_rows
+from optimize_templates import optimize_workbook
+from render_sheets import DEFAULT_SHEET_WORKERS, render_sheets_in_parallel
 
 
 def validate_sheet_table_details(table_details: pd.DataFrame) -> pd.DataFrame:
@@ -179,6 +191,76 @@ def xl_range_details(
     )
 
 
+def get_workbook_table_details(wb, file_path=None):
+    """
+    Extracts and validates the table layout of a loaded workbook.
+
+    Args:
+        wb (Workbook): Loaded openpyxl workbook object.
+        file_path (str): Path the workbook was loaded from, recorded in the details (optional).
+
+    Returns:
+        pd.DataFrame: DataFrame containing table details.
+
+    Raises:
+        ValueError: If tables in the workbook overlap.
+    """
+    table_info = []
+
+    for sheet_name in wb.sheetnames:
+        ws = wb[sheet_name]  # Access worksheet
+
+        # Extract table details
+        for table_name, table_range in ws.tables.items():
+            (
+                start_cell_ref,
+                end_cell_ref,
+                start_col_letter,
+                start_row_number,
+                start_col_number,
+                end_col_letter,
+                end_row_number,
+                end_col_number,
+            ) = xl_range_details(table_range)
+
+            # Store extracted information
+            table_info.append({
+                "file_path": file_path,
+                "sheet_name": sheet_name,
+                "table_name": table_name,
+                "start_row_number": int(start_row_number),
+                "end_row_number": int(end_row_number),
+                "start_col_number": int(start_col_number),
+                "end_col_number": int(end_col_number)
+            })
+
+    # Handle case where no tables are found
+    if not table_info:
+        logger.info(f"No tables found in the provided Excel file: {file_path}")
+        table_info.append({
+            "file_path": None,
+            "sheet_name": None,
+            "table_name": None,
+            "start_row_number": None,
+            "end_row_number": None,
+            "start_col_number": None,
+            "end_col_number": None,
+        })
+
+    # Convert list to DataFrame
+    table_details = pd.DataFrame(table_info)
+
+    # Validate and process table details
+    table_details = table_details_structure(table_details)
+    table_details = validate_table_details_in_file(table_details)
+
+    logger.info(f"table_details:\n{table_details}")
+    logger.info(f"Extracted table details from Excel file: {file_path}")
+    logger.debug(f"Table details DataFrame:\n{table_details}")
+
+    return table_details
+
+
 def get_excel_table_details(file_path: str):
     """
     Extracts table information from an Excel file.
@@ -198,58 +280,7 @@ def get_excel_table_details(file_path: str):
     try:
         # Load the workbook
         wb = load_workbook(file_path, data_only=False)
-        table_info = []
-
-        for sheet_name in wb.sheetnames:
-            ws = wb[sheet_name]  # Access worksheet
-
-            # Extract table details
-            for table_name, table_range in ws.tables.items():
-                (
-                    start_cell_ref,
-                    end_cell_ref,
-                    start_col_letter,
-                    start_row_number,
-                    start_col_number,
-                    end_col_letter,
-                    end_row_number,
-                    end_col_number,
-                ) = xl_range_details(table_range)
-
-                # Store extracted information
-                table_info.append({
-                    "file_path": file_path,
-                    "sheet_name": sheet_name,
-                    "table_name": table_name,
-                    "start_row_number": int(start_row_number),
-                    "end_row_number": int(end_row_number),
-                    "start_col_number": int(start_col_number),
-                    "end_col_number": int(end_col_number)
-                })
-
-        # Handle case where no tables are found
-        if not table_info:
-            logger.info(f"No tables found in the provided Excel file: {file_path}")
-            table_info.append({
-                "file_path": None,
-                "sheet_name": None,
-                "table_name": None,
-                "start_row_number": None,
-                "end_row_number": None,
-                "start_col_number": None,
-                "end_col_number": None,
-            })
-
-        # Convert list to DataFrame
-        table_details = pd.DataFrame(table_info)
-
-        # Validate and process table details
-        table_details = table_details_structure(table_details)
-        table_details = validate_table_details_in_file(table_details)
-
-        logger.info(f"table_details:\n{table_details}")
-        logger.info(f"Extracted table details from Excel file: {file_path}")
-        logger.debug(f"Table details DataFrame:\n{table_details}")
+        table_details = get_workbook_table_details(wb, file_path)
 
         return wb, table_details
 
@@ -277,6 +308,25 @@ def ws_table_to_df(ws, table_name):
     return df
 
 
+def select_columns(df: pd.DataFrame, columns: dict) -> pd.DataFrame:
+    """
+    Selects and renames columns without copying their data.
+
+    The result is built from the column Series of `df`, so it shares their memory: several targets
+    fed by the same source read one frame instead of each holding a copy. Writers only read from it.
+    Without pandas copy-on-write (`mode.copy_on_write`), a write to the result may reach `df`; callers
+    that modify the frames they pass in or get back should enable it themselves, as `main.py` does.
+
+    Parameters:
+        df (pd.DataFrame): Source frame.
+        columns (dict): {output column name: column name in `df`}, in output order.
+
+    Returns:
+        pd.DataFrame: Frame with the output columns, sharing data with `df`.
+    """
+    return pd.DataFrame({output_col: df[source_col] for output_col, source_col in columns.items()}, copy=False)
+
+
 def align_feed_data(table_df: pd.DataFrame, df_data: pd.DataFrame) -> pd.DataFrame:
     """
     Aligns df_data to match table_df's columns:
@@ -299,21 +349,17 @@ def align_feed_data(table_df: pd.DataFrame, df_data: pd.DataFrame) -> pd.DataFra
     # Get the required column names from table_df (original case)
     required_columns_original = table_df.columns.tolist()
 
-    # Convert both table_df and df_data column names to lowercase for comparison
-    required_columns_lower = [col.lower() for col in required_columns_original]
-    df_data_lower = df_data.rename(columns={col: col.lower() for col in df_data.columns})
+    # Compare table_df and df_data column names in lowercase
+    df_data_columns = {col.lower(): col for col in df_data.columns}
 
     # Check if df_data has all required columns
-    missing_columns = [col for col in required_columns_lower if col not in df_data_lower.columns]
+    missing_columns = [col.lower() for col in required_columns_original if col.lower() not in df_data_columns]
 
     if missing_columns:
         raise ValueError(f"Missing required columns in df_data: {missing_columns}")
 
-    # Reorder and select columns, keeping original Excel column names
-    aligned_df = df_data_lower[required_columns_lower]
-    aligned_df.columns = required_columns_original  # Restore original column names
-
-    return aligned_df
+    # Reorder and select columns, keeping original Excel column names (without copying the data)
+    return select_columns(df_data, {col: df_data_columns[col.lower()] for col in required_columns_original})
 
 def extract_table_details(sheet_table_details, table_name):
     """
@@ -348,6 +394,39 @@ def extract_table_details(sheet_table_details, table_name):
     )
 
 
+def update_table_refs(sheet_table_details, table_name, table_start_row, ws, row_delta):
+    """
+    Updates the table details and the Excel table references after rows were inserted (positive
+    `row_delta`) or deleted (negative) inside a table: the table grows or shrinks and every table
+    below it moves.
+
+    Returns:
+        pd.DataFrame: The updated table details for the sheet.
+    """
+    sheet_table_details.loc[sheet_table_details["table_name"] == table_name, "end_row_number"] += row_delta
+    sheet_table_details.loc[sheet_table_details["start_row_number"] > table_start_row, "start_row_number"] += row_delta
+    sheet_table_details.loc[sheet_table_details["start_row_number"] > table_start_row, "end_row_number"] += row_delta
+
+    # Refresh underlying table references in Excel
+    sheet_table_details_modified = sheet_table_details.loc[sheet_table_details["start_row_number"] >= table_start_row]
+    for _, table in sheet_table_details_modified.iterrows():
+        tbl_name = table["table_name"]
+        row_start = table["start_row_number"]
+        row_end = table["end_row_number"]
+        col_start = table["start_col_number"]
+        col_end = table["end_col_number"]
+
+        tbl_ref = f"{get_column_letter(col_start)}{row_start}:{get_column_letter(col_end)}{row_end}"
+
+        if tbl_name in ws.tables:
+            ws.tables[tbl_name].ref = tbl_ref
+            logger.info(f"Updated table '{tbl_name}' reference to {tbl_ref}.")
+        else:
+            logger.warning(f"⚠ Table '{tbl_name}' not found in worksheet '{ws}', skipping reference update.")
+
+    return sheet_table_details
+
+
 def remove_data_from_xl_table(
         sheet_table_details,
         table_name,
@@ -364,32 +443,14 @@ def remove_data_from_xl_table(
     ) = extract_table_details(sheet_table_details, table_name)
 
     # DELETE ALL DATA ROWS (LEAVE HEADER)
+    # The first data row is the one left, so the template's first-row formatting is kept for the new rows
     rows_removed = table_end_row - table_start_row - 1 # Leaving one row in the table
     if rows_removed != 0:
-        ws.delete_rows(table_start_row_data, rows_removed)
-        logger.info(f"Removed {rows_removed} rows from table '{table_name}', starting from row {table_start_row_data} in sheet '{ws.title}'.")
+        ws.delete_rows(table_start_row_data + 1, rows_removed)
+        logger.info(f"Removed {rows_removed} rows from table '{table_name}', starting from row {table_start_row_data + 1} in sheet '{ws.title}'.")
 
         # Update table references
-        sheet_table_details.loc[sheet_table_details["table_name"] == table_name, "end_row_number"] -= (rows_removed)
-        sheet_table_details.loc[sheet_table_details["start_row_number"] > table_start_row, "start_row_number"] -= rows_removed
-        sheet_table_details.loc[sheet_table_details["start_row_number"] > table_start_row, "end_row_number"] -= rows_removed
-
-        # Refresh underlying table references in Excel
-        sheet_table_details_modified = sheet_table_details.loc[sheet_table_details["start_row_number"] >= table_start_row]
-        for _, table in sheet_table_details_modified.iterrows():
-            tbl_name = table["table_name"]
-            row_start = table["start_row_number"]
-            row_end = table["end_row_number"]
-            col_start = table["start_col_number"]
-            col_end = table["end_col_number"]
-
-            tbl_ref = f"{get_column_letter(col_start)}{row_start}:{get_column_letter(col_end)}{row_end}"
-
-            if tbl_name in ws.tables:
-                ws.tables[tbl_name].ref = tbl_ref
-                logger.info(f"Updated table '{tbl_name}' reference to {tbl_ref}.")
-            else:
-                logger.warning(f"⚠ Table '{tbl_name}' not found in worksheet '{ws}', skipping reference update.")
+        sheet_table_details = update_table_refs(sheet_table_details, table_name, table_start_row, ws, -rows_removed)
 
     # Ensure first column has null values
     for col_idx in range(table_start_col, table_end_col+1, 1):
@@ -399,12 +460,176 @@ def remove_data_from_xl_table(
     return sheet_table_details, ws
 
 
+class SharedFormula(ArrayFormula):
+    """
+    Shared formula written as `<f t="shared">`: the anchor cell holds the formula text and the
+    range it covers, and every other cell only refers to it by index (`si`).
+
+    The range is taken from the anchor cell when the workbook is saved, so it follows the
+    anchor when rows are inserted or deleted above it.
+    """
+
+    t = "shared"
+
+    def __init__(self, si, text=None, anchor=None, n_rows=None):
+        self.si = si
+        self.text = text
+        self.anchor = anchor
+        self.n_rows = n_rows
+
+    @property
+    def ref(self):
+        if self.anchor is None:
+            return None
+        return f"{self.anchor.coordinate}:{self.anchor.column_letter}{self.anchor.row + self.n_rows - 1}"
+
+    def __iter__(self):
+        yield "t", self.t
+        if self.anchor is not None:
+            yield "ref", self.ref
+        yield "si", str(self.si)
+
+
+def get_calculated_columns(ws_table) -> dict:
+    """
+    Returns the calculated columns of an Excel table, e.g. `=[@Rate]*[@Hours]`.
+
+    Returns:
+        dict: {column position in the table (0-based): formula text, without the leading "="}
+    """
+    return {
+        position: table_column.calculatedColumnFormula.attr_text
+        for position, table_column in enumerate(ws_table.tableColumns)
+        if table_column.calculatedColumnFormula is not None and table_column.calculatedColumnFormula.attr_text
+    }
+
+
+def place_table_columns(n_table_cols, calculated_columns, columns, number_formats):
+    """
+    Spreads the Excel-ready input columns over the table's column positions, leaving None at
+    the positions of calculated columns (see `fill_calculated_columns`).
+    """
+    input_columns = iter(zip(columns, number_formats))
+    placed = [(None, None) if position in calculated_columns else next(input_columns) for position in range(n_table_cols)]
+    return [col for col, _ in placed], [number_format for _, number_format in placed]
+
+
+def fill_calculated_columns(ws, calculated_columns, first_row, first_col, n_rows, column_styles=None):
+    """
+    Fills the rows of a table's calculated columns with one shared formula per column.
+
+    Parameters:
+        ws (Worksheet): Worksheet containing the table.
+        calculated_columns (dict): {column position in the table: formula text} (see `get_calculated_columns`).
+        first_row (int): Worksheet row of the first row to fill.
+        first_col (int): Worksheet column of the table's first column.
+        n_rows (int): Number of rows to fill.
+        column_styles (list[StyleArray]): Style per table column, shared by the filled cells (optional).
+    """
+    if n_rows < 1:
+        return
+    for position, formula in calculated_columns.items():
+        col_idx = first_col + position
+        anchor = ws.cell(row=first_row, column=col_idx)
+        if column_styles is not None:
+            anchor._style = StyleArray(column_styles[position])
+        if n_rows == 1:
+            anchor.value = f"={formula}"
+            continue
+
+        # Shared formula indexes only need to be unique within a sheet
+        si = getattr(ws, "_shared_formula_count", 0)
+        ws._shared_formula_count = si + 1
+
+        anchor.value = SharedFormula(si, f"={formula}", anchor, n_rows)
+        dependent = SharedFormula(si)
+        for row_idx in range(first_row + 1, first_row + n_rows):
+            cell = ws.cell(row=row_idx, column=col_idx, value=dependent)
+            if column_styles is not None:
+                cell._style = anchor._style
+        logger.info(f"Filled calculated column {get_column_letter(col_idx)} with `={formula}` over {n_rows} rows.")
+
+
+def get_row_styles(ws, row, first_col, last_col) -> list:
+    """
+    Returns a copy of the style of each cell in a row, e.g. a table's first data row, so rows written
+    below it can share them (see `write_columns_to_ws`).
+
+    Returns:
+        list[StyleArray]: Style per column, from `first_col` to `last_col`.
+    """
+    cells = [ws.cell(row=row, column=col_idx) for col_idx in range(first_col, last_col + 1)]
+    # Cells the template does not store have no style yet
+    return [StyleArray() if cell._style is None else StyleArray(cell._style) for cell in cells]
+
+
+def write_columns_to_ws(ws, columns, number_formats, first_row, first_col, start=0, stop=None, column_styles=None):
+    """
+    Writes Excel-ready column values into a worksheet block.
+
+    Every written cell of a column gets the same style: the column's style from `column_styles` (or the
+    style of its first cell) with the column's number format. All cells of a column share one style
+    object, like cells sharing a style in the saved file, so styling costs nothing per cell. openpyxl's
+    style setters change a cell's style object in place, so the cells must not be restyled one by one afterwards.
+
+    Parameters:
+        ws (Worksheet): Worksheet to write to.
+        columns (list[list | None]): Excel-ready values per column (see `df_to_excel_values`);
+            None leaves the column untouched (e.g. a calculated table column).
+        number_formats (list[str | None]): Number format per column.
+        first_row (int): Worksheet row receiving the first written value.
+        first_col (int): Worksheet column receiving the first column.
+        start (int): Index of the first value to write from each column.
+        stop (int): Index after the last value to write (default: all remaining values).
+        column_styles (list[StyleArray | None]): Style per column (optional, see `get_row_styles`).
+    """
+    col_indexes = [col_idx for col_idx, col in enumerate(columns, start=first_col) if col is not None]
+    row_slices = [col[start:stop] for col in columns if col is not None]
+    if not row_slices or not len(row_slices[0]):
+        return
+
+    # Build each styled column's style once, on its first cell
+    column_styles = column_styles or [None] * len(columns)
+    styled_cols = []
+    for col_idx, col, number_format, style in zip(range(first_col, first_col + len(columns)), columns, number_formats, column_styles):
+        if col is None or (style is None and not number_format):
+            continue
+        cell = ws.cell(row=first_row, column=col_idx)
+        if style is not None:
+            cell._style = StyleArray(style)
+        if number_format:
+            cell.number_format = number_format
+        styled_cols.append((col_idx, cell._style))
+
+    for row_idx, row_values in enumerate(zip(*row_slices), start=first_row):
+        for col_idx, value in zip(col_indexes, row_values):
+            ws.cell(row=row_idx, column=col_idx, value=value)
+        for col_idx, style in styled_cols:
+            ws.cell(row=row_idx, column=col_idx)._style = style
+
+
 def add_data_to_xl_table(
         sheet_table_details,
         table_name,
         ws,
-        aligned_df,
+        columns,
+        number_formats,
+        calculated_columns=None,
 ):
+    """
+    Inserts the rows required by the new data and writes the Excel-ready values into the table.
+
+    Parameters:
+        sheet_table_details (pd.DataFrame): Table details for the sheet containing the table.
+        table_name (str): Name of the table to add data to.
+        ws (Worksheet): Worksheet containing the table.
+        columns (list[list | None]): Excel-ready values per table column (see `place_table_columns`).
+        number_formats (list[str | None]): Number format per column.
+        calculated_columns (dict): Calculated columns filled with their formula (see `get_calculated_columns`).
+
+    Returns:
+        tuple: (sheet_table_details, ws)
+    """
     (
         table_row_info,
         table_start_row,
@@ -415,32 +640,23 @@ def add_data_to_xl_table(
     ) = extract_table_details(sheet_table_details, table_name)
 
     # Add in the additional rows required
-    rows_added = len(aligned_df) - 1 # First row should have been left blank
+    n_rows = next((len(col) for col in columns if col is not None), 0)
+    rows_added = n_rows - 1 # First row should have been left blank
+    sheet_last_row = int(sheet_table_details["end_row_number"].max())
+    if sheet_last_row + rows_added > EXCEL_MAX_ROWS:
+        raise ValueError(
+            f"❌ Error: Adding {n_rows} rows to table '{table_name}' would extend sheet '{ws.title}' "
+            f"past Excel's {EXCEL_MAX_ROWS:,} row limit. Tables cannot spill; use a `sheets` target with `spill: true`."
+        )
     logger.info(f"Adding {rows_added} rows to table '{table_name}' from row {table_start_row_data + 1} onwards in sheet '{ws.title}'.")
+
+    # Inserted rows have no style: they get the styles of the template's first data row
+    column_styles = get_row_styles(ws, table_start_row_data, table_start_col, table_end_col)
     if rows_added != 0:
         ws.insert_rows(table_start_row_data + 1, amount=rows_added)
 
         # Update table references
-        sheet_table_details.loc[sheet_table_details["table_name"] == table_name, "end_row_number"] += rows_added
-        sheet_table_details.loc[sheet_table_details["start_row_number"] > table_start_row, "start_row_number"] += rows_added
-        sheet_table_details.loc[sheet_table_details["start_row_number"] > table_start_row, "end_row_number"] += rows_added
-
-        # Refresh underlying table references in Excel
-        sheet_table_details_modified = sheet_table_details.loc[sheet_table_details["start_row_number"] >= table_start_row]
-        for _, table in sheet_table_details_modified.iterrows():
-            tbl_name = table["table_name"]
-            row_start = table["start_row_number"]
-            row_end = table["end_row_number"]
-            col_start = table["start_col_number"]
-            col_end = table["end_col_number"]
-
-            tbl_ref = f"{get_column_letter(col_start)}{row_start}:{get_column_letter(col_end)}{row_end}"
-
-            if tbl_name in ws.tables:
-                ws.tables[tbl_name].ref = tbl_ref
-                logger.info(f"Updated table '{tbl_name}' reference to {tbl_ref}.")
-            else:
-                logger.warning(f"⚠ Table '{tbl_name}' not found in worksheet '{ws}', skipping reference update.")
+        sheet_table_details = update_table_refs(sheet_table_details, table_name, table_start_row, ws, rows_added)
 
     # Refresh table details extracted - updated values
     (
@@ -453,11 +669,76 @@ def add_data_to_xl_table(
     ) = extract_table_details(sheet_table_details, table_name)
 
     # Add in data into the table
-    for row_idx, df_row in enumerate(range(table_start_row_data, table_end_row + 1, 1), start=0):  # df row index starts at 0
-        for col_idx, df_col in enumerate(range(table_start_col, table_end_col + 1, 1), start=0):  # df col index starts at 0
-            # cell_ref = f"{get_column_letter(col_idx + table_start_col)}{row_idx + table_start_row_data}"
-            cell_ref = f"{get_column_letter(df_col)}{df_row}"
-            ws[cell_ref] = aligned_df.iloc[row_idx, col_idx]  # Correct indexing
+    write_columns_to_ws(
+        ws, columns, number_formats, first_row=table_start_row_data, first_col=table_start_col, column_styles=column_styles
+    )
+    if calculated_columns:
+        fill_calculated_columns(ws, calculated_columns, table_start_row_data, table_start_col, n_rows, column_styles)
+
+    return sheet_table_details, ws
+
+
+def append_data_to_xl_table(
+        sheet_table_details,
+        table_name,
+        ws,
+        columns,
+        number_formats,
+        calculated_columns=None,
+):
+    """
+    Writes Excel-ready values below the existing data of a table and extends the table reference.
+    A table holding only its single empty data row is filled from that row instead.
+
+    Parameters:
+        sheet_table_details (pd.DataFrame): Table details for the sheet containing the table.
+        table_name (str): Name of the table to append to.
+        ws (Worksheet): Worksheet containing the table.
+        columns (list[list | None]): Excel-ready values per table column (see `place_table_columns`).
+        number_formats (list[str | None]): Number format per column.
+        calculated_columns (dict): Calculated columns filled with their formula (see `get_calculated_columns`).
+
+    Returns:
+        tuple: (sheet_table_details, ws)
+    """
+    (
+        table_row_info,
+        table_start_row,
+        table_start_row_data,
+        table_end_row,
+        table_start_col,
+        table_end_col
+    ) = extract_table_details(sheet_table_details, table_name)
+
+    n_rows = next((len(col) for col in columns if col is not None), 0)
+    if n_rows == 0:
+        logger.info(f"No new rows for table '{table_name}'.")
+        return sheet_table_details, ws
+
+    first_row_empty = table_end_row == table_start_row_data and all(
+        ws.cell(row=table_start_row_data, column=col_idx).value is None
+        for col_idx in range(table_start_col, table_end_col + 1)
+    )
+    if first_row_empty:
+        return add_data_to_xl_table(sheet_table_details, table_name, ws, columns, number_formats, calculated_columns)
+
+    sheet_last_row = int(sheet_table_details["end_row_number"].max())
+    if sheet_last_row + n_rows > EXCEL_MAX_ROWS:
+        raise ValueError(
+            f"❌ Error: Appending {n_rows} rows to table '{table_name}' would extend sheet '{ws.title}' "
+            f"past Excel's {EXCEL_MAX_ROWS:,} row limit."
+        )
+
+    logger.info(f"Appending {n_rows} rows to table '{table_name}' from row {table_end_row + 1} onwards in sheet '{ws.title}'.")
+    column_styles = get_row_styles(ws, table_start_row_data, table_start_col, table_end_col)
+    ws.insert_rows(table_end_row + 1, amount=n_rows)
+    sheet_table_details = update_table_refs(sheet_table_details, table_name, table_start_row, ws, n_rows)
+
+    write_columns_to_ws(
+        ws, columns, number_formats, first_row=table_end_row + 1, first_col=table_start_col, column_styles=column_styles
+    )
+    if calculated_columns:
+        fill_calculated_columns(ws, calculated_columns, table_end_row + 1, table_start_col, n_rows, column_styles)
 
     return sheet_table_details, ws
 
@@ -492,47 +773,106 @@ def copy_template_to_output(xlsx_templates_folder, outputs_folder, template_name
         raise IOError(f"❌ Error copying file: {e}")
 
 
+def get_source_settings(data_source):
+    """
+    Returns the settings block (column_mapping, column_types, ...) of a data source,
+    regardless of whether it is a CSV or an Excel sheet/table source.
+
+    Parameters:
+        data_source (dict): Single-key dictionary from `settings.yaml`, e.g. {"customer_data.csv": {...}}.
+
+    Returns:
+        dict: The settings block containing `column_mapping` and `column_types`.
+    """
+    for file_name, data_config in data_source.items():
+        file_extension = get_file_extension(file_name)  # Normalize file extension (`.csv.gz` -> `.csv`)
+
+        if file_extension in FLAT_FILE_EXTENSIONS:
+            return data_config
+
+        elif file_extension == '.xlsx':
+            for xl_type, xl_config in data_config.items():
+                if xl_type in ("xl_sheet", "xl_table"):
+                    return xl_config
+
+                err_msg = f"❌ Error: Unsupported xl_type: {xl_type}"
+                logger.error(err_msg)
+                raise ValueError(err_msg)
+
+        elif file_extension in SQLITE_EXTENSIONS:
+            return data_config["sqlite"]
+
+        else:
+            raise ValueError(f"❌ Error: Unsupported file extension: {file_extension}")
+
+    return {}
+
+
+def get_output_column_types(source_settings):
+    """
+    Maps the declared `column_types` (keyed by input column name) onto the output column names.
+
+    Parameters:
+        source_settings (dict): Settings block of a data source (see `get_source_settings`).
+
+    Returns:
+        dict: Declared types keyed by output column name.
+    """
+    column_mapping = source_settings.get("column_mapping", {})
+    column_types = source_settings.get("column_types", {})
+
+    return {column_mapping.get(col, col): col_type for col, col_type in column_types.items()}
+
+
 def get_df_data(data_source, input_data_dict):
+    """
+    Returns the loaded data for a data source, with filters/aggregation/sorting applied
+    and columns renamed and selected according to `column_mapping`.
+
+    - CSV and SQLite sources have their transforms applied by the reader.
+    - Other sources have them applied here, vectorized in pandas.
+
+    Parameters:
+        data_source (dict): Single-key dictionary from `settings.yaml`, e.g. {"customer_data.csv": {...}}.
+        input_data_dict (dict): Loaded input data (see `input_data_loader`).
+
+    Returns:
+        pd.DataFrame: Data with the output column names.
+    """
     logger.debug("Running: get_df_data")
     logger.debug(f"data_source:{data_source}")
-    logger.debug(f"input_data_dict:{input_data_dict}")
+
+    source_settings = get_source_settings(data_source)
+    transforms = get_source_transforms(source_settings)
 
     for file_name, data_config in data_source.items():
-        file_extension = os.path.splitext(file_name)[1].lower()  # Normalize file extension
-        # logger.debug(f"file_name:{file_name}")
-        # logger.debug(f"data_config:{data_config}")
+        file_extension = get_file_extension(file_name)  # Normalize file extension (`.csv.gz` -> `.csv`)
+
+        if "error" in input_data_dict[file_name]:
+            raise ValueError(f"❌ Error: Input '{file_name}' failed to load: {input_data_dict[file_name]['error']}")
+
+        if file_extension in CSV_EXTENSIONS and transforms is not None:
+            # Filtered while reading
+            input_data = input_data_dict[file_name]["queries"][get_transforms_key(transforms)]["data"]
 
-        if file_extension == '.csv':
-            input_data = input_data_dict[file_name]["data"]
-            input_data = input_data.rename(columns=data_config['column_mapping'])
-            final_columns = list(data_config['column_mapping'].values())
-            input_data = input_data[final_columns]
-            return input_data
+        elif file_extension in FLAT_FILE_EXTENSIONS:
+            input_data = apply_transforms(input_data_dict[file_name]["data"], transforms)
 
         elif file_extension == '.xlsx':
-            for xl_type, xl_config in data_config.items():
-                if xl_type == "xl_sheet":
-                    input_data = input_data_dict[file_name]["xl_sheets"][xl_config['name']]['data']
-                    input_data = input_data.rename(columns=xl_config['column_mapping'])
-                    final_columns = list(xl_config['column_mapping'].values())
-                    input_data = input_data[final_columns]
-                    return input_data
-
-                elif xl_type == "xl_table":
-                    input_data = input_data_dict[file_name]["xl_tables"][xl_config['name']]['data']
-                    input_data = input_data.rename(columns=xl_config['column_mapping'])
-                    final_columns = list(xl_config['column_mapping'].values())
-                    input_data = input_data[final_columns]
-                    return input_data
+            xl_category = "xl_sheets" if "xl_sheet" in data_config else "xl_tables"
+            input_data = input_data_dict[file_name][xl_category][source_settings['name']]['data']
+            input_data = apply_transforms(input_data, transforms)
 
-                else:
-                    err_msg = f"❌ Error: Unsupported xl_type: {xl_type}"
-                    logger.error(err_msg)
-                    raise ValueError(err_msg)
+        elif file_extension in SQLITE_EXTENSIONS:
+            # Filtered/aggregated in SQL
+            input_data = input_data_dict[file_name]["sqlite"][get_sqlite_source_key(source_settings)]['data']
 
         else:
             raise ValueError(f"❌ Error: Unsupported file extension: {file_extension}")
 
+        # Targets sharing a source get views of the same columns rather than copies
+        return select_columns(input_data, {output_col: input_col for input_col, output_col in source_settings['column_mapping'].items()})
+
     data_df = None
     return data_df
 
@@ -542,6 +882,10 @@ def replace_table_data(
         table_details,
         table_name,
         input_data,
+        column_types=None,
+        date_format=DEFAULT_DATE_FORMAT,
+        date_input_format=None,
+        formula_evaluator=None,
 ):
     logger.info("-" * 50)
     logger.info(f"Replacing data in table: '{table_name}'")
@@ -561,14 +905,26 @@ def replace_table_data(
         # Get the data for the table in the Excel sheet
         table_df = ws_table_to_df(ws, table_name)
 
+        # Calculated columns are filled with their formula, not from the input
+        calculated_columns = get_calculated_columns(ws.tables[table_name])
+        input_headers = table_df.columns[[position not in calculated_columns for position in range(len(table_df.columns))]]
+
         # Ensure the data provided fits into the Excel table data
-        aligned_df = align_feed_data(table_df, input_data)
+        aligned_df = align_feed_data(table_df[input_headers], input_data)
+
+        # Convert the data into Excel-ready values
+        columns, number_formats = df_to_excel_values(aligned_df, column_types, date_format, date_input_format)
+
+        # Keep the written data for evaluating formulas that reference this table
+        if formula_evaluator is not None:
+            formula_evaluator.add_table(table_name, aligned_df, columns, number_formats)
+        columns, number_formats = place_table_columns(len(table_df.columns), calculated_columns, columns, number_formats)
 
         # Remove the data from the table
         sheet_table_details, ws = remove_data_from_xl_table(sheet_table_details, table_name, ws)
 
         # Now add in data where needed
-        sheet_table_details, ws = add_data_to_xl_table(sheet_table_details, table_name, ws, aligned_df)
+        sheet_table_details, ws = add_data_to_xl_table(sheet_table_details, table_name, ws, columns, number_formats, calculated_columns)
 
         # Confirm ws has been updated
         logger.info(f"✅ Successfully updated table '{table_name}'.")
@@ -583,15 +939,99 @@ def replace_table_data(
         raise
 
 
-def replace_sheet_data(wb, sheet_name, df):
+def append_table_data(
+        wb,
+        table_details,
+        table_name,
+        input_data,
+        column_types=None,
+        date_format=DEFAULT_DATE_FORMAT,
+        date_input_format=None,
+):
+    """
+    Appends new rows below the existing data of a table (see `append_data_to_xl_table`).
+
+    Returns:
+        tuple: (wb, table_details)
+    """
+    logger.info("-" * 50)
+    logger.info(f"Appending data to table: '{table_name}'")
+
+    if table_name not in table_details["table_name"].values:
+        raise ValueError(f"❌ Table '{table_name}' not found in file. Available tables: {table_details['table_name'].unique()}")
+
+    sheet_name = table_details.loc[table_details["table_name"] == table_name, "sheet_name"].iloc[0]
+    sheet_table_details = table_details[table_details["sheet_name"] == sheet_name]
+    ws = wb[sheet_name]
+
+    # Only the header row is needed to align the new rows
+    min_col, min_row, max_col, _ = openpyxl.utils.range_boundaries(ws.tables[table_name].ref)
+    calculated_columns = get_calculated_columns(ws.tables[table_name])
+    headers = [
+        ws.cell(row=min_row, column=col_idx).value for col_idx in range(min_col, max_col + 1)
+        if col_idx - min_col not in calculated_columns
+    ]
+    aligned_df = align_feed_data(pd.DataFrame(columns=headers), input_data)
+
+    columns, number_formats = df_to_excel_values(aligned_df, column_types, date_format, date_input_format)
+    columns, number_formats = place_table_columns(max_col - min_col + 1, calculated_columns, columns, number_formats)
+    sheet_table_details, ws = append_data_to_xl_table(
+        sheet_table_details, table_name, ws, columns, number_formats, calculated_columns
+    )
+
+    logger.info(f"✅ Successfully appended to table '{table_name}'.")
+    table_details[table_details["sheet_name"] == sheet_name] = sheet_table_details
+
+    return wb, table_details
+
+
+def get_continuation_sheet_title(sheet_name, sheet_number):
+    """Returns the title of a continuation sheet, e.g. "Data (2)", truncated to Excel's 31 character limit."""
+    suffix = f" ({sheet_number})"
+    return sheet_name[:EXCEL_MAX_SHEET_TITLE_LENGTH - len(suffix)] + suffix
+
+
+def remove_continuation_sheets(wb, sheet_name, keep_titles=()):
+    """
+    Removes the continuation sheets ("Sheet (2)", "Sheet (3)", ...) a previous render added after `sheet_name`,
+    so that a reused output can spill again and keeps no stale rows when the data shrinks.
+
+    Parameters:
+        wb (openpyxl.Workbook): The loaded workbook.
+        sheet_name (str): The sheet whose continuation sheets are removed.
+        keep_titles (iterable): Titles of sheets that belong to the template and are never removed.
+
+    Returns:
+        int: The number of sheets removed.
+    """
+    keep_titles = set(keep_titles)
+    sheet_number = 2
+    title = get_continuation_sheet_title(sheet_name, sheet_number)
+    while title in wb.sheetnames and title not in keep_titles:
+        wb.remove(wb[title])
+        logger.info(f"Removed continuation sheet '{title}' written by the previous run.")
+        sheet_number += 1
+        title = get_continuation_sheet_title(sheet_name, sheet_number)
+    return sheet_number - 2
+
+
+def replace_sheet_data(wb, sheet_name, df, column_types=None, date_format=DEFAULT_DATE_FORMAT, date_input_format=None, spill=False):
     """
     Replaces all data in the specified worksheet of an openpyxl workbook with new DataFrame data.
     Ensures that the new DataFrame has exactly the same column names as the original sheet.
 
+    If the data does not fit below the header within Excel's row limit and `spill` is enabled,
+    the overflow is written into continuation sheets ("Sheet (2)", "Sheet (3)", ...) placed after
+    the sheet, each a copy of the emptied sheet with the same header and formats.
+
     Parameters:
         wb (openpyxl.Workbook): The loaded workbook.
         sheet_name (str): The name of the sheet to replace.
         df (pd.DataFrame): The DataFrame with the new data.
+        column_types (dict): Declared types keyed by output column name.
+        date_format (str): Number format applied to date columns.
+        date_input_format (str): strftime format of date strings in the input (optional).
+        spill (bool): Allow overflow into continuation sheets.
 
     Returns:
         openpyxl.Workbook: The modified workbook.
@@ -608,84 +1048,366 @@ def replace_sheet_data(wb, sheet_name, df):
         raise ValueError(f"❌ Error: Sheet '{sheet_name}' contains empty column headers.")
 
     # 🔹 Step 2: Ensure `df` matches the column names & order
-    df = df.copy()  # Avoid modifying the original DataFrame
-
-    # Handle missing columns (Fill with NaN)
     for col in original_columns:
         if col not in df.columns:
             raise ValueError(f"❌ Error: A column is missing in the replacement data {col}.")
 
-    # Remove extra columns not in the original sheet
-    df = df[original_columns]
+    # Remove extra columns not in the original sheet (a view; the original DataFrame is never modified)
+    df = select_columns(df, {col: col for col in original_columns})
+
+    # Check the data fits before doing any work
+    rows_per_sheet = EXCEL_MAX_ROWS - 1  # Row 1 holds the headers
+    n_sheets = max(-(-len(df) // rows_per_sheet), 1)
+    if n_sheets > 1 and not spill:
+        raise ValueError(
+            f"❌ Error: {len(df):,} rows do not fit in sheet '{sheet_name}' (limit {rows_per_sheet:,}). "
+            f"Set `spill: true` on the source to continue the data in additional sheets."
+        )
+
+    # 🔹 Step 3: Convert the data into Excel-ready values
+    columns, number_formats = df_to_excel_values(df, column_types, date_format, date_input_format)
 
-    # 🔹 Step 3: Clear all existing data (keep formatting & formulas intact)
+    # 🔹 Step 4: Clear all existing data (keep formatting & formulas intact)
     ws.delete_rows(2, ws.max_row)  # Removes data while keeping headers
 
-    # 🔹 Step 4: Write new data (starting from row 2 to keep headers)
-    for r_idx, row in enumerate(df.itertuples(index=False), start=2):
-        for c_idx, value in enumerate(row, start=1):
-            ws.cell(row=r_idx, column=c_idx, value=value)
+    # 🔹 Step 5: Create continuation sheets from the emptied sheet, so they share its header and formats
+    target_sheets = [ws]
+    for sheet_number in range(2, n_sheets + 1):
+        title = get_continuation_sheet_title(sheet_name, sheet_number)
+        if title in wb.sheetnames:
+            raise ValueError(f"❌ Error: Cannot create continuation sheet '{title}': a sheet with that name already exists.")
+        continuation_ws = wb.copy_worksheet(ws)
+        continuation_ws.title = title
+        wb.move_sheet(continuation_ws, offset=wb.index(target_sheets[-1]) + 1 - wb.index(continuation_ws))
+        target_sheets.append(continuation_ws)
+        logger.info(f"Created continuation sheet '{title}' for sheet '{sheet_name}'.")
+
+    # 🔹 Step 6: Write new data (starting from row 2 to keep headers)
+    for sheet_idx, target_ws in enumerate(target_sheets):
+        start = sheet_idx * rows_per_sheet
+        write_columns_to_ws(target_ws, columns, number_formats, first_row=2, first_col=1, start=start, stop=start + rows_per_sheet)
 
     return wb  # Return the updated workbook
 
 
-def add_data_to_files(
-        output_from_input_dict,
+def write_target_data(wb, table_details, output_type, target_name, input_data, source_settings, formula_evaluator=None):
+    """
+    Writes a DataFrame into a table or sheet of a loaded workbook, with the source's output settings
+    (`column_types`, `date_format`, `date_input_format` and, for sheets, `spill`).
+
+    Returns:
+        tuple: (wb, table_details)
+
+    Raises:
+        ValueError: If the output type is not "tables" or "sheets".
+    """
+    if output_type == 'tables':
+        return replace_table_data(
+            wb=wb,
+            table_details=table_details,
+            table_name=target_name,
+            input_data=input_data,
+            column_types=get_output_column_types(source_settings),
+            date_format=source_settings.get("date_format", DEFAULT_DATE_FORMAT),
+            date_input_format=source_settings.get("date_input_format"),
+            formula_evaluator=formula_evaluator,
+        )
+
+    if output_type == 'sheets':
+        wb = replace_sheet_data(
+            wb=wb,
+            sheet_name=target_name,
+            df=input_data,
+            column_types=get_output_column_types(source_settings),
+            date_format=source_settings.get("date_format", DEFAULT_DATE_FORMAT),
+            date_input_format=source_settings.get("date_input_format"),
+            spill=source_settings.get("spill", False),
+        )
+        return wb, table_details
+
+    error_message = f"❌ Output type '{output_type}' not on of hte accepted values."
+    logger.error(error_message)
+    raise ValueError(error_message)
+
+
+def get_sheet_targets(wb, table_details, type_config, input_data_dict):
+    """
+    Groups the targets of a template by the worksheet they write to, for `render_sheets_in_parallel`.
+    Targets on the same worksheet stay together, in configuration order.
+
+    Returns:
+        tuple: (targets_by_sheet, reason)
+            - targets_by_sheet (dict): {sheet_name: [(output_type, target_name, input_data, source_settings)]},
+              or None when the template has to be rendered in one process.
+            - reason (str): Why the template is rendered in one process, else None.
+    """
+    table_sheets = dict(zip(table_details["table_name"], table_details["sheet_name"]))
+
+    sheet_names = {}
+    for output_type, input_config in type_config.items():
+        for target_name, data_source in input_config.items():
+            if output_type == "tables":
+                sheet_name = table_sheets.get(target_name)
+            elif output_type == "sheets":
+                sheet_name = target_name if target_name in wb.sheetnames else None
+                if get_source_settings(data_source).get("spill", False):
+                    return None, f"sheet '{target_name}' may spill into new continuation sheets"
+            else:
+                sheet_name = None
+            if sheet_name is None:
+                return None, f"{output_type} target '{target_name}' is not in the template"
+            sheet_names[(output_type, target_name)] = sheet_name
+
+    if len(set(sheet_names.values())) < 2:
+        return None, "its targets are all on one sheet"
+
+    targets_by_sheet = {}
+    for (output_type, target_name), sheet_name in sheet_names.items():
+        data_source = type_config[output_type][target_name]
+        targets_by_sheet.setdefault(sheet_name, []).append(
+            (output_type, target_name, get_df_data(data_source, input_data_dict), get_source_settings(data_source))
+        )
+
+    return targets_by_sheet, None
+
+
+def render_template(
+        template_name,
+        type_config,
         input_data_dict,
         xlsx_templates_folder,
         outputs_folder,
-        report_date
+        cache_formulas=False,
+        metrics=None,
+        input_files_folder=None,
+        optimize_template=False,
+        template_cache=None,
+        sheet_workers=DEFAULT_SHEET_WORKERS,
 ):
-    logger.info("")
-    logger.info("-" * 50)
-    logger.info("ADDING DATA TO FILES")
-    logger.info("-" * 50)
+    """
+    Renders one template: copies it to the outputs folder and writes the input data into its tables and sheets.
 
-    for template_name, type_config in output_from_input_dict.items():
-        output_path=copy_template_to_output(xlsx_templates_folder, outputs_folder, template_name)
-        logger.info("-")
-        logger.info(f"Adding data to {output_path}.")
+    Tables whose source sets `append: true` keep the rows written by the previous run: the previous
+    output is reopened and only the rows added to the input since then are written below them. Sheets
+    are still rewritten in full; the continuation sheets a spilled sheet added to that output are removed first.
 
-        # Load workbook once at the start
+    With `optimize_template`, phantom rows and columns and unused cell formats are trimmed from the
+    fresh copy of the template before any data is written (see `optimize_templates.optimize_workbook`).
+
+    With `template_cache` (a `ParsedTemplateCache`), a fresh copy is restored from the parsed template
+    cached by an earlier run instead of parsing the template again.
+
+    With `sheet_workers` above 1, a fresh copy whose targets are on several worksheets is rendered one
+    worksheet per worker process (see `render_sheets.render_sheets_in_parallel`). Templates that append
+    to tables, cache formula values or spill sheets are rendered in this process.
+
+    Returns:
+        str: The path to the rendered output.
+    """
+    template_start = time.perf_counter()
+    template_path = os.path.join(xlsx_templates_folder, template_name)
+    output_path = os.path.join(outputs_folder, template_name)
+
+    # Reuse the previous output when it holds appended tables that can be trusted
+    append_tables = {
+        table_name for table_name, data_source in type_config.get("tables", {}).items()
+        if get_source_settings(data_source).get("append", False)
+    }
+    append_state = load_append_state(output_path, template_path) if append_tables else None
+    fresh_copy = append_state is None
+    if fresh_copy:
+        output_path=copy_template_to_output(xlsx_templates_folder, outputs_folder, template_name)
+        append_state = {"tables": {}}
+    else:
+        logger.info(f"♻️ Reusing previous output {output_path} to append new rows.")
+    logger.info("-")
+    logger.info(f"Adding data to {output_path}.")
+
+    # Load workbook once at the start
+    if template_cache is not None and fresh_copy:
+        wb, table_details = template_cache.get(template_path, get_excel_table_details)
+    else:
         wb, table_details = get_excel_table_details(output_path)
-        logger.debug(f"table_details:\n{table_details}")
-
-        for output_type, input_config in type_config.items():
-            if output_type == 'tables':
-                logger.debug(f"Adding data into tables")
-                logger.debug(f"input_config:\n{input_config}")
-                for table_name, data_source in input_config.items():
-                    logger.debug(f"table_name:{table_name}")
-                    logger.debug(f"data_source:{data_source}")
-                    logger.debug(f"input_data_dict:{input_data_dict}")
+    logger.debug(f"table_details:\n{table_details}")
+    if optimize_template and fresh_copy:
+        optimize_workbook(wb)
+    formula_evaluator = TableFormulaEvaluator() if cache_formulas else None
+    if append_tables:
+        wb.calculation.fullCalcOnLoad = True  # Formulas over appended tables are not cached
+    if not fresh_copy:
+        # Spilled sheets are rewritten in full, so drop the continuation sheets the previous run added
+        with zipfile.ZipFile(template_path) as zf:
+            template_titles = get_sheet_part_names(zf)
+        for sheet_name, data_source in type_config.get("sheets", {}).items():
+            if get_source_settings(data_source).get("spill", False):
+                remove_continuation_sheets(wb, sheet_name, keep_titles=template_titles)
+
+    # Split the work by worksheet where the sheets can be rendered independently
+    if sheet_workers > 1:
+        if append_tables:
+            targets_by_sheet, reason = None, "it appends to tables"
+        elif formula_evaluator is not None:
+            targets_by_sheet, reason = None, "--cache_formulas evaluates formulas across sheets"
+        else:
+            targets_by_sheet, reason = get_sheet_targets(wb, table_details, type_config, input_data_dict)
+
+        if targets_by_sheet is None:
+            logger.info(f"Rendering {template_name} in one process: {reason}.")
+        else:
+            target_results = render_sheets_in_parallel(wb, table_details, targets_by_sheet, output_path, sheet_workers)
+            if metrics is not None:
+                for target_result in target_results:
+                    metrics.record_target(template_name, *target_result)
+                metrics.record_template(template_name, time.perf_counter() - template_start, output_path)
+            return output_path
+
+    for output_type, input_config in type_config.items():
+        if output_type == 'tables':
+            logger.debug(f"Adding data into tables")
+            logger.debug(f"input_config:\n{input_config}")
+            for table_name, data_source in input_config.items():
+                target_start = time.perf_counter()
+                logger.debug(f"table_name:{table_name}")
+                logger.debug(f"data_source:{data_source}")
+                logger.debug(f"input_data_dict:{input_data_dict}")
+                source_settings = get_source_settings(data_source)
+                append_from_start = True
+                if table_name in append_tables:
+                    input_data, append_state["tables"][table_name], append_from_start = get_new_source_rows(
+                        input_files_folder,
+                        data_source,
+                        source_settings,
+                        append_state["tables"].get(table_name),
+                        load_all_rows=lambda: get_df_data(data_source, input_data_dict),
+                    )
+                else:
                     # Load workbook and table details
                     input_data = get_df_data(data_source, input_data_dict)
-                    logger.debug(f"input_data:{input_data}")
-                    wb, table_details = replace_table_data(
+                logger.debug(f"input_data:{input_data}")
+
+                if append_from_start:
+                    wb, table_details = write_target_data(
+                        wb, table_details, output_type, table_name, input_data, source_settings,
+                        formula_evaluator=formula_evaluator if table_name not in append_tables else None,
+                    )
+                else:
+                    wb, table_details = append_table_data(
                         wb=wb,
                         table_details=table_details,
                         table_name=table_name,
                         input_data=input_data,
+                        column_types=get_output_column_types(source_settings),
+                        date_format=source_settings.get("date_format", DEFAULT_DATE_FORMAT),
+                        date_input_format=source_settings.get("date_input_format"),
                     )
-                    # Save the workbook
-                    wb.save(output_path)
+                # Save the workbook
+                wb.save(output_path)
 
-            elif output_type == 'sheets':
-                logger.debug(f"Adding data into sheets")
+                if metrics is not None:
+                    table_row = table_details.loc[table_details["table_name"] == table_name].iloc[0]
+                    n_cols = table_row["end_col_number"] - table_row["start_col_number"] + 1
+                    metrics.record_target(template_name, "table", table_name, time.perf_counter() - target_start, len(input_data), n_cols)
 
-                for sheet_name, data_source in input_config.items():
-                    input_data = get_df_data(data_source, input_data_dict)
-                    wb = replace_sheet_data(
-                        wb=wb,
-                        sheet_name=sheet_name,
-                        df=input_data
-                    )
+        elif output_type == 'sheets':
+            logger.debug(f"Adding data into sheets")
 
-                # Save the workbook
-                wb.save(output_path)
+            for sheet_name, data_source in input_config.items():
+                target_start = time.perf_counter()
+                input_data = get_df_data(data_source, input_data_dict)
+                source_settings = get_source_settings(data_source)
+                wb, table_details = write_target_data(wb, table_details, output_type, sheet_name, input_data, source_settings)
+                if metrics is not None:
+                    metrics.record_target(template_name, "sheet", sheet_name, time.perf_counter() - target_start, len(input_data), len(input_data.columns))
+
+            # Save the workbook
+            wb.save(output_path)
+
+        else:
+            error_message = f"❌ Output type '{output_type}' not on of hte accepted values."
+            logger.error(error_message)
+            raise ValueError(error_message)
+
+    # Store cached values for the table-aggregate formulas that can be evaluated
+    if formula_evaluator is not None:
+        cached_values, all_evaluated = evaluate_workbook_formulas(wb, formula_evaluator)
+        if all_evaluated:
+            # Every formula has a cached value, so Excel does not need to recalculate on open
+            wb.calculation.fullCalcOnLoad = False
+        wb.save(output_path)
+        set_cached_formula_values(output_path, cached_values)
+
+    if append_tables:
+        save_append_state(output_path, template_path, append_state["tables"])
+
+    if metrics is not None:
+        metrics.record_template(template_name, time.perf_counter() - template_start, output_path)
+
+    return output_path
 
-            else:
-                error_message = f"❌ Output type '{output_type}' not on of hte accepted values."
-                logger.error(error_message)
-                raise ValueError(error_message)
 
+def add_data_to_files(
+        output_from_input_dict,
+        input_data_dict,
+        xlsx_templates_folder,
+        outputs_folder,
+        report_date,
+        cache_formulas=False,
+        metrics=None,
+        checkpoint=None,
+        template_hashes=None,
+        input_files_folder=None,
+        optimize_templates=False,
+        template_cache=None,
+        sheet_workers=DEFAULT_SHEET_WORKERS,
+):
+    """
+    Renders every template (see `render_template`).
+
+    A failing template is logged and the run carries on with the next one.
+    If `metrics` (a `RunMetrics`) is given, the wall time, rows and cells of every template and target are recorded.
+    If `checkpoint` (a `RunCheckpoint`) is given, the outcome of each template is saved as soon as it finishes,
+    together with its fingerprints from `template_hashes`.
+    If `optimize_templates` is set, each template copy is trimmed before rendering (see `render_template`).
+    If `template_cache` (a `ParsedTemplateCache`) is given, parsed templates are restored from it (see `render_template`).
+    If `sheet_workers` is above 1, the worksheets of each template are rendered in that many worker processes (see `render_template`).
+
+    Returns:
+        tuple: (render_results, failures)
+            - render_results (dict): {template_name: output_path} for each rendered template.
+            - failures (dict): {template_name: error message} for each failed template.
+    """
+    logger.info("")
+    logger.info("-" * 50)
+    logger.info("ADDING DATA TO FILES")
+    logger.info("-" * 50)
+
+    template_hashes = template_hashes or {}
+    render_results = {}
+    failures = {}
+    for template_name, type_config in output_from_input_dict.items():
+        try:
+            output_path = render_template(
+                template_name, type_config, input_data_dict, xlsx_templates_folder, outputs_folder, cache_formulas, metrics,
+                input_files_folder, optimize_templates, template_cache, sheet_workers,
+            )
+        except Exception as e:
+            logger.error(f"❌ Failed to render {template_name}: {e}", exc_info=True)
+            failures[template_name] = str(e)
+
+            # Never leave a half-written output that could be mistaken for a finished report
+            output_path = os.path.join(outputs_folder, template_name)
+            for path in (output_path, get_append_state_path(output_path)):
+                if os.path.exists(path):
+                    os.remove(path)
+            if checkpoint is not None:
+                checkpoint.mark(template_name, "failed", hashes=template_hashes.get(template_name), error=str(e))
+            continue
+
+        render_results[template_name] = output_path
+        if checkpoint is not None:
+            checkpoint.mark(template_name, "success", hashes=template_hashes.get(template_name), output_path=output_path)
+
+    if failures:
+        logger.error(f"❌ {len(failures)} of {len(output_from_input_dict)} templates failed: {list(failures)}")
+
+    return render_results, failures
@@ -1,6 +1,41 @@
 import os
+from pathlib import Path
 from datetime import datetime
 from logger_config import logger
+from transform_data import get_source_transforms, get_transforms_key
+
+# Supported input file extensions
+CSV_EXTENSIONS = {".csv"}
+COLUMNAR_EXTENSIONS = {".parquet", ".feather", ".arrow"}  # Arrow IPC files use `.arrow` or `.feather`
+FLAT_FILE_EXTENSIONS = CSV_EXTENSIONS | COLUMNAR_EXTENSIONS  # Files holding a single dataset
+SQLITE_EXTENSIONS = {".db", ".sqlite", ".sqlite3"}
+CSV_COMPRESSION_SUFFIXES = {".gz": "gzip", ".zst": "zstd"}  # Compressed CSVs, e.g. `feed.csv.gz`
+
+# Excel limits
+EXCEL_MAX_ROWS = 1_048_576
+EXCEL_MAX_SHEET_TITLE_LENGTH = 31
+
+
+def get_file_extension(file_name) -> str:
+    """
+    Returns the lower-case extension that decides how a file is read.
+    Compressed CSV files (`.csv.gz`, `.csv.zst`) count as `.csv`.
+    """
+    suffixes = [suffix.lower() for suffix in Path(file_name).suffixes]
+    if len(suffixes) >= 2 and suffixes[-1] in CSV_COMPRESSION_SUFFIXES and suffixes[-2] in CSV_EXTENSIONS:
+        return suffixes[-2]
+    return suffixes[-1] if suffixes else ""
+
+
+def is_glob_source(file_name) -> bool:
+    """True for sources naming several files with a glob pattern, e.g. `sales/2026-*/part-*.csv`."""
+    return any(char in str(file_name) for char in "*?[")
+
+
+def has_compression_suffix(file_name) -> bool:
+    """True for file names ending in a compression suffix, e.g. `feed.csv.gz`."""
+    return Path(file_name).suffix.lower() in CSV_COMPRESSION_SUFFIXES
+
 
 def validate_folder(folder_path):
     if os.path.exists(folder_path) and os.path.isdir(folder_path):
@@ -29,3 +64,29 @@ def is_valid_date(date_str):
         logger.error(f"❌ Date `{date_str}` is NOT in the correct format (yyyy-mm-dd)!")
         return False
 
+
+def get_sqlite_source_key(sqlite_settings):
+    """
+    Returns the key identifying a SQLite source within its database file: the table name or the query,
+    followed by its filter/aggregate/sort transforms (which run inside the database).
+
+    Parameters:
+        sqlite_settings (dict): The `sqlite` block of a source in `settings.yaml`.
+
+    Returns:
+        str: The table name or query text, plus the transforms key if the source has transforms.
+
+    Raises:
+        ValueError: If neither or both of `table` and `query` are given.
+    """
+    table = sqlite_settings.get("table")
+    query = sqlite_settings.get("query")
+    if bool(table) == bool(query):
+        raise ValueError("❌ Error: A `sqlite` source needs exactly one of `table` or `query`.")
+    source_key = table or query.strip()
+
+    transforms = get_source_transforms(sqlite_settings)
+    if transforms is not None:
+        source_key = f"{source_key} | {get_transforms_key(transforms)}"
+
+    return source_key
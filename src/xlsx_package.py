@@ -0,0 +1,184 @@
+import io
+import os
+import re
+import posixpath
+import zipfile
+import xml.etree.ElementTree as ET
+from logger_config import logger
+
+# Constants
+MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+PKG_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+# Formula cells as written by openpyxl, e.g. <c r="C3" s="1"><f>SUM(tbl[Col])</f><v /></c>
+FORMULA_CELL_PATTERN = re.compile(r'<c( [^>]*?\br="([A-Z]+[0-9]+)"[^>]*)>(<f>[^<]*</f>)(?:<v\s*/>|<v></v>)</c>')
+
+
+def get_sheet_part_names(zf: zipfile.ZipFile) -> dict:
+    """
+    Maps worksheet titles to their XML part names inside an xlsx package.
+
+    Parameters:
+        zf (zipfile.ZipFile): Open xlsx package.
+
+    Returns:
+        dict: {sheet_title: part_name}, e.g. {"Summary": "xl/worksheets/sheet1.xml"}
+    """
+    workbook = ET.fromstring(zf.read("xl/workbook.xml"))
+    rels = ET.fromstring(zf.read("xl/_rels/workbook.xml.rels"))
+
+    targets = {}
+    for rel in rels.findall(f"{{{PKG_REL_NS}}}Relationship"):
+        target = rel.get("Target")
+        if target.startswith("/"):
+            part_name = target.lstrip("/")
+        else:
+            part_name = posixpath.normpath(posixpath.join("xl", target))
+        targets[rel.get("Id")] = part_name
+
+    sheet_parts = {}
+    for sheet in workbook.iter(f"{{{MAIN_NS}}}sheet"):
+        sheet_parts[sheet.get("name")] = targets[sheet.get(f"{{{REL_NS}}}id")]
+
+    return sheet_parts
+
+
+def get_related_part_names(zf: zipfile.ZipFile, part_name: str) -> tuple:
+    """
+    Lists the parts a part of an xlsx package refers to through its relationships part.
+
+    Parameters:
+        zf (zipfile.ZipFile): Open xlsx package.
+        part_name (str): Part whose relationships to read, e.g. "xl/worksheets/sheet1.xml".
+
+    Returns:
+        tuple: (rels_part_name, related_part_names), e.g.
+            ("xl/worksheets/_rels/sheet1.xml.rels", ["xl/tables/table1.xml"]).
+            rels_part_name is None when the part has no relationships; external targets are left out.
+    """
+    part_folder, part_file = posixpath.split(part_name)
+    rels_part_name = posixpath.join(part_folder, "_rels", f"{part_file}.rels")
+    if rels_part_name not in zf.namelist():
+        return None, []
+
+    related_part_names = []
+    for rel in ET.fromstring(zf.read(rels_part_name)).findall(f"{{{PKG_REL_NS}}}Relationship"):
+        if rel.get("TargetMode") == "External":
+            continue
+        target = rel.get("Target")
+        if target.startswith("/"):
+            related_part_names.append(target.lstrip("/"))
+        else:
+            related_part_names.append(posixpath.normpath(posixpath.join(part_folder, target)))
+
+    return rels_part_name, related_part_names
+
+
+def _copy_package_parts(source, target, part_rewriters: dict):
+    with zipfile.ZipFile(source, "r") as zf_in, zipfile.ZipFile(target, "w", zipfile.ZIP_DEFLATED) as zf_out:
+        for item in zf_in.infolist():
+            data = zf_in.read(item.filename)
+            if item.filename in part_rewriters:
+                data = part_rewriters[item.filename](data)
+                logger.debug(f"Rewrote package part: {item.filename}")
+            zf_out.writestr(item, data)
+
+
+def rewrite_package_parts(file_path, part_rewriters: dict):
+    """
+    Rewrites selected parts of an xlsx package in place.
+
+    - Every other part is copied across unchanged.
+    - The package is written to a temporary file first, so a failure never leaves a half-written output.
+    - An in-memory package (a seekable binary buffer such as `io.BytesIO`) is rewritten in memory.
+
+    Parameters:
+        file_path (str | io.BytesIO): Path to the xlsx file, or a buffer holding it.
+        part_rewriters (dict): {part_name: function(bytes) -> bytes}
+
+    Returns:
+        str | io.BytesIO: The rewritten file path or buffer.
+    """
+    if not isinstance(file_path, (str, os.PathLike)):
+        rewritten = io.BytesIO()
+        file_path.seek(0)
+        _copy_package_parts(file_path, rewritten, part_rewriters)
+        file_path.seek(0)
+        file_path.truncate()
+        file_path.write(rewritten.getvalue())
+        return file_path
+
+    tmp_path = f"{file_path}.tmp"
+    _copy_package_parts(file_path, tmp_path, part_rewriters)
+    os.replace(tmp_path, file_path)
+    return file_path
+
+
+def _xml_escape(text: str) -> str:
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def cached_value_xml(value) -> tuple:
+    """
+    Builds the cell type attribute and `<v>` text for a cached formula result.
+
+    Parameters:
+        value: Result of the formula (bool, int, float or str).
+
+    Returns:
+        tuple: (type_attribute, value_text), e.g. (' t="str"', "abc") or ("", "12.5")
+    """
+    if isinstance(value, bool):
+        return ' t="b"', "1" if value else "0"
+    if isinstance(value, (int, float)):
+        return "", repr(value) if isinstance(value, float) else str(value)
+    return ' t="str"', _xml_escape(str(value))
+
+
+def set_cached_formula_values(file_path, cached_values: dict):
+    """
+    Stores cached results for formula cells in a saved xlsx file.
+
+    openpyxl writes formulas with an empty `<v />`, so readers that do not recalculate
+    (e.g. pandas) see empty cells. This fills in the `<v>` element of each listed cell.
+
+    Parameters:
+        file_path (str | io.BytesIO): Path to the saved xlsx file, or a buffer holding it.
+        cached_values (dict): {sheet_title: {cell_coordinate: value}}
+
+    Returns:
+        int: Number of cells that received a cached value.
+    """
+    if not any(cached_values.values()):
+        return 0
+
+    with zipfile.ZipFile(file_path, "r") as zf:
+        sheet_parts = get_sheet_part_names(zf)
+
+    n_cached = [0]
+
+    def make_rewriter(cell_values):
+        def add_value(match):
+            coordinate = match.group(2)
+            if coordinate not in cell_values:
+                return match.group(0)
+            type_attr, value_text = cached_value_xml(cell_values[coordinate])
+            n_cached[0] += 1
+            return f"<c{match.group(1)}{type_attr}>{match.group(3)}<v>{value_text}</v></c>"
+
+        def rewrite(data):
+            return FORMULA_CELL_PATTERN.sub(add_value, data.decode("utf-8")).encode("utf-8")
+
+        return rewrite
+
+    part_rewriters = {
+        sheet_parts[sheet_title]: make_rewriter(cell_values)
+        for sheet_title, cell_values in cached_values.items()
+        if cell_values
+    }
+
+    rewrite_package_parts(file_path, part_rewriters)
+    logger.info(f"✅ Stored {n_cached[0]} cached formula values in: {file_path if isinstance(file_path, (str, os.PathLike)) else 'in-memory workbook'}")
+
+    return n_cached[0]
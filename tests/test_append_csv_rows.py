@@ -0,0 +1,36 @@
+from append_tables import read_new_csv_rows
+
+COLUMNS = ["Id", "Name"]
+
+
+def test_partial_last_line_is_read_next_run(tmp_path):
+    """A last line still being written is left in the file until it is complete."""
+    feed = tmp_path / "feed.csv"
+    feed.write_bytes(b"Id,Name\n1,alpha\n2,bet")
+
+    df, state, from_start = read_new_csv_rows(feed, COLUMNS)
+    assert from_start
+    assert df.to_dict("records") == [{"Id": 1, "Name": "alpha"}]
+    assert state["offset"] == len(b"Id,Name\n1,alpha\n")
+
+    with open(feed, "ab") as file:
+        file.write(b"a\n3,gamma\n")
+
+    df, state, from_start = read_new_csv_rows(feed, COLUMNS, state)
+    assert not from_start
+    assert df.to_dict("records") == [{"Id": 2, "Name": "beta"}, {"Id": 3, "Name": "gamma"}]
+    assert state["offset"] == feed.stat().st_size
+
+
+def test_no_complete_new_line_reads_no_rows(tmp_path):
+    feed = tmp_path / "feed.csv"
+    feed.write_bytes(b"Id,Name\n1,alpha\n")
+    _, state, _ = read_new_csv_rows(feed, COLUMNS)
+
+    with open(feed, "ab") as file:
+        file.write(b"2,be")
+
+    df, new_state, from_start = read_new_csv_rows(feed, COLUMNS, state)
+    assert not from_start
+    assert df.empty
+    assert new_state["offset"] == state["offset"]
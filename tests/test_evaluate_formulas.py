@@ -0,0 +1,18 @@
+import pandas as pd
+from evaluate_formulas import TableFormulaEvaluator
+
+
+def make_evaluator():
+    df = pd.DataFrame({"Owner's": [1.0, 2.0, 3.0], "Col[1]": [10.0, 20.0, 30.0], "Region": ["AU", "NZ", "AU"]})
+    evaluator = TableFormulaEvaluator()
+    evaluator.add_table("T", df, [df[col].tolist() for col in df.columns], [None] * len(df.columns))
+    return evaluator
+
+
+def test_escaped_column_names():
+    """Column names with `'`-escaped characters resolve to the column Excel means."""
+    evaluator = make_evaluator()
+
+    assert evaluator.evaluate("=SUM(T[Owner''s])") == 6.0
+    assert evaluator.evaluate("=SUM(T[[Col'[1']]])") == 60.0
+    assert evaluator.evaluate("=SUMIFS(T[Col'[1']],T[Region],\"AU\")") == 40.0
@@ -0,0 +1,49 @@
+import tracemalloc
+import numpy as np
+import pandas as pd
+from update_xlsx_data import get_df_data, select_columns
+
+N_ROWS = 1_000_000
+N_TARGETS = 5
+
+
+def make_input_data_dict():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "Amount": rng.random(N_ROWS),
+        "Rate": rng.random(N_ROWS),
+        "Id": np.arange(N_ROWS, dtype="int64"),
+    })
+    return {"source.csv": {"data": df}}
+
+
+def test_targets_share_source_columns():
+    """Five targets over one 1M-row source allocate almost nothing: each is a view, not a copy."""
+    input_data_dict = make_input_data_dict()
+    source = input_data_dict["source.csv"]["data"]
+    data_source = {"source.csv": {"column_mapping": {"Amount": "Total", "Id": "Identifier"}}}
+
+    with pd.option_context("mode.copy_on_write", True):
+        tracemalloc.start()
+        targets = [get_df_data(data_source, input_data_dict) for _ in range(N_TARGETS)]
+        _, peak_bytes = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    # One copy of the two selected columns would take 16 MB
+    assert peak_bytes < 1024 ** 2, f"{N_TARGETS} targets allocated {peak_bytes:,} bytes"
+    for target in targets:
+        assert list(target.columns) == ["Total", "Identifier"]
+        assert np.shares_memory(target["Total"].to_numpy(), source["Amount"].to_numpy())
+        assert np.shares_memory(target["Identifier"].to_numpy(), source["Id"].to_numpy())
+
+
+def test_copy_on_write_keeps_source_unchanged():
+    """With copy-on-write enabled by the caller, a write to a selected view never reaches the source frame."""
+    source = pd.DataFrame({"a": [1.0, 2.0, 3.0], "b": [4.0, 5.0, 6.0]})
+
+    with pd.option_context("mode.copy_on_write", True):
+        view = select_columns(source, {"A": "a"})
+        view.loc[0, "A"] = 99.0
+
+    assert source["a"].tolist() == [1.0, 2.0, 3.0]
+    assert view["A"].tolist() == [99.0, 2.0, 3.0]
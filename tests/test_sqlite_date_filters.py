@@ -0,0 +1,28 @@
+import sqlite3
+import pandas as pd
+from load_input_data import load_sqlite_source
+from transform_data import get_source_transforms, apply_transforms
+
+DAYS = ["2026-01-31 00:00:00", "31/01/2026", "2026-02-01", "01/02/2026"]
+
+
+def make_connection():
+    connection = sqlite3.connect(":memory:")
+    connection.execute('CREATE TABLE sales ("Day" TEXT, "Amount" INTEGER)')
+    connection.executemany("INSERT INTO sales VALUES (?, ?)", [(day, i) for i, day in enumerate(DAYS, 1)])
+    return connection
+
+
+def test_date_filter_matches_pandas():
+    """Date filters on SQLite text columns select the same rows as the pandas filters."""
+    source_settings = {
+        "column_types": {"Day": "date", "Amount": "int"},
+        "filter": [{"column": "Day", "op": "==", "value": "2026-01-31"}],
+        "aggregate": {"Amount": "sum"},
+    }
+    transforms = get_source_transforms(source_settings)
+
+    df = load_sqlite_source(make_connection(), ["Amount", "Day"], source_settings["column_types"], table="sales", transforms=transforms)
+    expected = apply_transforms(pd.DataFrame({"Day": DAYS, "Amount": range(1, len(DAYS) + 1)}), transforms)
+
+    pd.testing.assert_frame_equal(df, expected)